@@ -0,0 +1,119 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import decode
+
+
+# Micro-benchmark of websocket frame decoding: the old path (full json.loads,
+# substring stream checks, a dict per trade) against decode.split/decode.trade
+# on every available JSON backend.  Frames come from a file with one raw
+# frame per line, or a seeded synthetic mix shaped like BTCUSDT traffic.
+
+
+def synth_frames(n: int, seed: int = 1) -> list[str]:
+    rnd  = random.Random(seed)
+    px   = 65000.0
+    tid  = 10 ** 9
+    uid  = 5 * 10 ** 10
+    out  = []
+    for i in range(n):
+        px  += rnd.gauss(0, 2)
+        ts   = 1_700_000_000_000 + i * 7
+        kind = rnd.random()
+        if kind < 0.85:
+            tid += 1
+            data = {"e": "trade", "E": ts + 1, "s": "BTCUSDT", "t": tid,
+                    "p": f"{px:.2f}", "q": f"{rnd.expovariate(20):.5f}",
+                    "T": ts, "m": rnd.random() < 0.5, "M": True}
+            stream = "btcusdt@trade"
+        elif kind < 0.97:
+            uid += 3
+            data = {"e": "depthUpdate", "E": ts, "s": "BTCUSDT", "U": uid - 2, "u": uid,
+                    "b": [[f"{px - rnd.random() * 50:.2f}", f"{rnd.random():.5f}"] for _ in range(12)],
+                    "a": [[f"{px + rnd.random() * 50:.2f}", f"{rnd.random():.5f}"] for _ in range(12)]}
+            stream = "btcusdt@depth@100ms"
+        else:
+            data = {"e": "kline", "E": ts, "s": "BTCUSDT",
+                    "k": {"t": ts // 60000 * 60000, "T": ts // 60000 * 60000 + 59999,
+                          "s": "BTCUSDT", "i": "1m", "o": f"{px:.2f}", "c": f"{px:.2f}",
+                          "h": f"{px + 5:.2f}", "l": f"{px - 5:.2f}", "v": "12.345",
+                          "n": 500, "x": False, "q": "800000.0"}}
+            stream = "btcusdt@kline_1m"
+        out.append(json.dumps({"stream": stream, "data": data}, separators=(",", ":")))
+    return out
+
+
+def legacy(frames):
+    trades = []
+    for raw in frames:
+        data   = json.loads(raw)
+        stream = data.get("stream", "")
+        pay    = data["data"]
+        if "@trade" in stream:
+            trades.append({
+                "t":      pay["T"] / 1000.0,
+                "price":  float(pay["p"]),
+                "qty":    float(pay["q"]),
+                "is_buy": not pay["m"],
+            })
+        elif "@kline" in stream:
+            pay["k"]["c"]
+        elif "@depth" in stream:
+            pay["u"]
+
+
+def fast(frames):
+    trades = []
+    push   = trades.append
+    table  = {
+        "btcusdt@trade":       lambda b: push(decode.trade(b)),
+        "btcusdt@kline_1m":    lambda b: decode.loads(b)["k"],
+        "btcusdt@depth@100ms": lambda b: decode.loads(b)["u"],
+    }
+    for raw in frames:
+        stream, body = decode.split(raw)
+        h = table.get(stream)
+        if h is not None:
+            h(body)
+
+
+def timeit(fn, frames, reps):
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn(frames)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="websocket frame decode benchmark")
+    ap.add_argument("--frames", help="file with one raw frame per line")
+    ap.add_argument("-n", type=int, default=50_000, help="synthetic frame count")
+    ap.add_argument("--reps", type=int, default=5)
+    args = ap.parse_args()
+
+    if args.frames:
+        with open(args.frames, encoding="utf-8") as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+    else:
+        frames = synth_frames(args.n)
+
+    n = len(frames)
+    base = timeit(legacy, frames, args.reps)
+    print(f"{n} frames")
+    print(f"  {'legacy json':<16} {base / n * 1e6:7.2f} µs/frame")
+    for name in decode.BACKENDS:
+        decode.use(name)
+        t = timeit(fast, frames, args.reps)
+        print(f"  {'fast ' + name:<16} {t / n * 1e6:7.2f} µs/frame   ×{base / t:.2f}")
+
+
+if __name__ == "__main__":
+    main()
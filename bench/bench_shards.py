@@ -0,0 +1,103 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, HERE)
+
+import config
+import feeds
+import shard
+import snapshot as snp
+from bench_decode import synth_frames
+from book import OrderBook
+from candles import CandleSeries
+from ingest import Ingest
+from trades import TradeBuffer
+
+
+# Scaling benchmark for the sharded runtime.  S symbols' worth of synthetic
+# Binance frames go through the worker path (split, route, apply, then a
+# snapshot published into the shared-memory slots) on 1, 2, … P worker
+# processes.  The total work is fixed, so the wall time shows how well it
+# spreads over cores; with one core per process it should fall ~1/P.
+#
+#   python bench/bench_shards.py --symbols 8 --procs 1,2,4,8
+
+
+def _symbol():
+    book = OrderBook()
+    book.load({"lastUpdateId": 5 * 10 ** 10, "bids": [], "asks": []})
+    trades = TradeBuffer()
+    series = [CandleSeries("1m"), CandleSeries("15m")]
+    routes = feeds.symbol_routes("BTCUSDT", book, trades, series)
+    # synth frames are @trade; the same handler serves @aggTrade
+    routes["btcusdt@trade"] = routes.pop("btcusdt@aggTrade", None) or routes["btcusdt@trade"]
+    return routes, feeds.State(book, trades, series[1])
+
+
+def _work(name: str, n_slots: int, idx: list[int], frames: int, start, out):
+    slots = shard.Slots(n_slots, name)
+    syms  = []
+    for i in idx:
+        raw = synth_frames(frames, seed=i + 1)
+        batches = [[(0.0, r) for r in raw[j:j + config.INGEST_BATCH]]
+                   for j in range(0, frames, config.INGEST_BATCH)]
+        syms.append((i, *_symbol(), batches))
+    ing = Ingest()
+
+    start.wait()
+    t0 = time.perf_counter()
+    for b in range(max(len(s[3]) for s in syms)):
+        for i, routes, st, batches in syms:
+            if b < len(batches):
+                ing.apply(batches[b], routes)
+                slots.write(i, json.dumps(snp.take(st).to_dict(), separators=(",", ":")).encode())
+    out.put(time.perf_counter() - t0)
+    slots.close()
+
+
+def run(symbols: int, procs: int, frames: int) -> float:
+    ctx   = mp.get_context("spawn")
+    slots = shard.Slots(symbols)
+    start = ctx.Barrier(procs + 1)
+    out   = ctx.Queue()
+    ps = [ctx.Process(target=_work, args=(slots.name, symbols, list(range(symbols))[k::procs], frames, start, out))
+          for k in range(procs)]
+    try:
+        for p in ps:
+            p.start()
+        start.wait()
+        wall = max(out.get() for _ in ps)
+        for p in ps:
+            p.join()
+    finally:
+        slots.close()
+        slots.unlink()
+    return wall
+
+
+def main():
+    ap = argparse.ArgumentParser(description="sharded worker scaling benchmark")
+    ap.add_argument("--symbols", type=int, default=8, help="symbols, spread round-robin over the processes")
+    ap.add_argument("--procs", default=f"1,2,4,{os.cpu_count() or 1}", help="process counts, comma-separated")
+    ap.add_argument("--frames", type=int, default=20_000, help="synthetic frames per symbol")
+    args = ap.parse_args()
+
+    counts = sorted({min(int(x), args.symbols) for x in args.procs.split(",") if x.strip()})
+    total  = args.symbols * args.frames
+    print(f"{args.symbols} symbols × {args.frames:,} frames, {os.cpu_count()} cores")
+    print(f"  {'procs':>5} {'wall s':>8} {'frames/s':>12} {'speedup':>8}")
+    base = None
+    for n in counts:
+        wall = run(args.symbols, n, args.frames)
+        base = base or wall
+        print(f"  {n:>5} {wall:>8.2f} {total / wall:>12,.0f} {base / wall:>7.2f}×")
+
+
+if __name__ == "__main__":
+    main()
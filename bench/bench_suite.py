@@ -0,0 +1,344 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+
+from rich.console import Console
+
+import config
+import dashboard
+import decode
+import feeds
+import indicators as ind
+import profiler
+import vector as vec
+from bench_decode import synth_frames
+from book import OrderBook
+from bookstats import BookStats
+from candles import CandleSeries
+from candlestore import CandleStore
+from ingest import Ingest
+from trades import TradeBuffer
+from vprofile import VolumeProfile
+
+
+# Benchmark suite over seeded synthetic market data: every indicators.py
+# function at several input sizes, the Binance frame handler path, trend
+# scoring and a full dashboard render.  Results go to JSON so two runs can
+# be compared; --compare exits non-zero when a case got slower than the
+# baseline by more than --threshold.
+#
+#   python bench/bench_suite.py --out base.json
+#   python bench/bench_suite.py --compare base.json --threshold 0.15
+
+
+# ── generators ─────────────────────────────────────────────────
+def synth_klines(n: int, seed: int = 1, t0: float = 1_700_000_000.0, secs: int = 60) -> list[dict]:
+    rnd = random.Random(seed)
+    px  = 65000.0
+    out = []
+    for i in range(n):
+        o  = px
+        px = max(1.0, px + rnd.gauss(0, 25))
+        h  = max(o, px) + rnd.random() * 15
+        l  = min(o, px) - rnd.random() * 15
+        out.append({"t": t0 + i * secs, "o": o, "h": h, "l": l, "c": px,
+                    "v": rnd.expovariate(1 / 40)})
+    return out
+
+
+def synth_trades(n: int, seed: int = 1, span: float = 600.0, now: float | None = None) -> list[dict]:
+    # n trades spread evenly over the last `span` seconds
+    rnd = random.Random(seed)
+    now = time.time() if now is None else now
+    px  = 65000.0
+    out = []
+    for i in range(n):
+        px += rnd.gauss(0, 1)
+        out.append({"t": now - span + span * i / n, "price": px,
+                    "qty": rnd.expovariate(20), "is_buy": rnd.random() < 0.5})
+    return out
+
+
+def synth_book(levels: int, seed: int = 1, mid: float = 65000.0, tick: float = 0.01):
+    # (bids, asks) best first, with an occasional wall
+    rnd = random.Random(seed)
+
+    def side(sign):
+        out = []
+        for i in range(levels):
+            q = rnd.expovariate(4)
+            if rnd.random() < 0.02:
+                q *= 20
+            out.append((round(mid + sign * (tick / 2 + i * tick * (1 + rnd.random())), 2), q))
+        out.sort(key=lambda lv: sign * lv[0])
+        return out
+    return side(-1), side(1)
+
+
+def synth_state(levels: int, trades: int, klines: int, iv: str = "1m") -> feeds.State:
+    bids, asks = synth_book(levels)
+    book = OrderBook(depth=max(levels, 1))
+    book.load({"lastUpdateId": 1, "bids": bids, "asks": asks})
+
+    buf = TradeBuffer(cap=max(trades, 1))
+    ser = CandleSeries(iv)
+    st  = feeds.State(book, buf, ser)
+
+    ks  = synth_klines(klines + 1, t0=time.time() // 60 * 60 - klines * 60)
+    ser.seed(ks[:-1])
+    ser.update(ks[-1], False)
+    for t in synth_trades(trades):
+        buf.push(t["t"], t["price"], t["qty"], t["is_buy"])
+    st.pm_up, st.pm_dn = 0.55, 0.46
+    return st
+
+
+# ── timing ─────────────────────────────────────────────────────
+def measure(fn, setup=None, reps: int = 5, min_time: float = 0.05) -> dict:
+    # per-call seconds; each rep loops until min_time has passed, setup() is
+    # untimed and its result is the call's argument
+    arg   = setup() if setup else None
+    t0    = time.perf_counter()
+    fn(arg)
+    one   = time.perf_counter() - t0
+    loops = max(1, int(min_time / one)) if one > 0 else 1000
+
+    times = []
+    for _ in range(reps):
+        total = 0.0
+        for _ in range(loops):
+            arg = setup() if setup else None
+            t0  = time.perf_counter()
+            fn(arg)
+            total += time.perf_counter() - t0
+        times.append(total / loops)
+    return {"best": min(times), "median": statistics.median(times), "loops": loops, "reps": reps}
+
+
+# ── cases ──────────────────────────────────────────────────────
+def cases(sizes: dict) -> list[tuple[str, object, object]]:
+    out = []
+
+    for n in sizes["levels"]:
+        bids, asks = synth_book(n)
+        mid = (bids[0][0] + asks[0][0]) / 2
+        out += [
+            (f"ind.obi/levels={n}",       lambda _, b=bids, a=asks, m=mid: ind.obi(b, a, m),       None),
+            (f"ind.walls/levels={n}",     lambda _, b=bids, a=asks: ind.walls(b, a),               None),
+            (f"ind.depth_usd/levels={n}", lambda _, b=bids, a=asks, m=mid: ind.depth_usd(b, a, m), None),
+        ]
+
+        def analytics(_, b=bids, a=asks, m=mid):
+            bs = BookStats.from_levels(b, a)
+            return bs.obi(m), bs.walls(), bs.depth_usd(m)
+        out.append((f"bookstats.all/levels={n}", analytics, None))
+
+    for n in sizes["trades"]:
+        tr = synth_trades(n)
+        out.append((f"ind.cvd/trades={n}", lambda _, tr=tr: ind.cvd(tr, 300), None))
+
+        def vp_push(_, tr=tr):
+            vp = VolumeProfile()
+            for t in tr:
+                vp.push(t["t"], t["price"], t["qty"], t["is_buy"])
+            return vp.view()
+        out.append((f"vprofile.push+view/trades={n}", vp_push, None))
+
+    for n in sizes["klines"]:
+        ks = synth_klines(n)
+        for name in ("vol_profile", "rsi", "macd", "vwap", "emas", "heikin_ashi"):
+            fn = getattr(ind, name)
+            out.append((f"ind.{name}/klines={n}", lambda _, fn=fn, ks=ks: fn(ks), None))
+
+        def store_append(_, ks=ks):
+            cs = CandleStore(cap=len(ks))
+            cs.extend(ks)
+            return cs
+        cs = store_append(None)
+        out += [
+            (f"candlestore.append/klines={n}", store_append,                                     None),
+            (f"candlestore.rows/klines={n}",   lambda _, cs=cs: list(cs.rows(config.KLINE_MAX)), None),
+        ]
+
+    # the same indicators for a universe of symbols: per-symbol loop vs vector.py
+    uni = [synth_klines(config.KLINE_MAX, seed=i) for i in range(sizes["symbols"])]
+    names = ("rsi", "macd", "vwap", "emas", "heikin_ashi", "vol_profile")
+
+    def scalar_all(_):
+        for ks in uni:
+            for name in names:
+                getattr(ind, name)(ks)
+
+    def vector_all(_):
+        k = vec.stack(uni)
+        for name in names:
+            getattr(vec, name)(k)
+
+    out += [
+        (f"ind.all/symbols={len(uni)}",    scalar_all, None),
+        (f"vector.all/symbols={len(uni)}", vector_all, None),
+    ]
+
+    # the Binance handler path: split + route + apply, one ingest batch at a time
+    n_frames = sizes["frames"]
+    frames   = synth_frames(n_frames)
+    batches  = [[(0.0, raw) for raw in frames[i:i + config.INGEST_BATCH]]
+                for i in range(0, n_frames, config.INGEST_BATCH)]
+
+    def fresh_routes():
+        book = OrderBook()
+        book.load({"lastUpdateId": 5 * 10 ** 10, "bids": [], "asks": []})
+        routes = feeds.symbol_routes("BTCUSDT", book, TradeBuffer(), [CandleSeries("1m"), CandleSeries("15m")])
+        # synth frames are @trade; the same handler serves @aggTrade
+        routes["btcusdt@trade"] = routes.pop("btcusdt@aggTrade", None) or routes["btcusdt@trade"]
+        return routes
+
+    def handle(routes):
+        ing = Ingest()
+        profiler.track(routes)
+        try:
+            for b in batches:
+                ing.apply(b, routes)
+        finally:
+            profiler.untrack(routes)
+    out.append((f"feeds.binance_handler/frames={n_frames}", handle, fresh_routes))
+
+    # scoring and rendering on a full state
+    lv, tn, kn = max(sizes["levels"]), max(sizes["trades"]), config.KLINE_MAX
+    st  = synth_state(lv, tn, kn)
+    con = Console(file=io.StringIO(), width=160, force_terminal=True, color_system="truecolor")
+
+    def cold(_):
+        st.snapshot = None
+        return dashboard._score_trend(st)
+
+    def draw(_):
+        con.file = io.StringIO()
+        con.print(dashboard.render(st, "BTC", "15m"))
+
+    def draw_cold(_):
+        st.snapshot = None
+        dashboard._views.clear()
+        draw(_)
+
+    def draw_tick(_):
+        st.book._ver += 1          # only the book moved since the last frame
+        draw(_)
+
+    out += [
+        (f"dashboard._score_trend/cold/levels={lv},trades={tn}", cold, None),
+        (f"dashboard._score_trend/warm/levels={lv},trades={tn}", lambda _: dashboard._score_trend(st), None),
+        (f"dashboard.render/levels={lv},trades={tn}", draw_cold, None),
+        (f"dashboard.render/book_tick/levels={lv},trades={tn}", draw_tick, None),
+    ]
+    return out
+
+
+# ── results ────────────────────────────────────────────────────
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results: dict, base: dict, threshold: float) -> list[str]:
+    # cases present in both runs whose best time grew past the threshold
+    slow = []
+    for name, r in results.items():
+        b = base.get(name)
+        if b is None:
+            continue
+        ratio = r["best"] / b["best"] if b["best"] else 1.0
+        mark  = ""
+        if ratio > 1 + threshold:
+            slow.append(name)
+            mark = "  REGRESSION"
+        elif ratio < 1 - threshold:
+            mark = "  faster"
+        print(f"  {name:<56} {b['best'] * 1e6:12.1f} → {r['best'] * 1e6:12.1f} µs   ×{ratio:.2f}{mark}")
+    return slow
+
+
+def _ints(s: str) -> list[int]:
+    return [int(x) for x in s.split(",") if x]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="indicator / feed / render benchmark suite")
+    ap.add_argument("--klines", type=_ints, default=[150, 10_000, 1_000_000], help="kline counts, comma-separated")
+    ap.add_argument("--trades", type=_ints, default=[5_000, 500_000], help="trade counts, comma-separated")
+    ap.add_argument("--levels", type=_ints, default=[20, 5_000], help="book levels per side, comma-separated")
+    ap.add_argument("--frames", type=int, default=20_000, help="synthetic Binance frames for the handler case")
+    ap.add_argument("--symbols", type=int, default=200, help="symbols in the universe-scan cases")
+    ap.add_argument("--quick", action="store_true", help="drop the largest kline and trade sizes")
+    ap.add_argument("--reps", type=int, default=5)
+    ap.add_argument("--min-time", type=float, default=0.05, help="seconds per rep (calls are looped)")
+    ap.add_argument("-k", dest="filter", help="only run cases whose name contains this")
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--compare", metavar="BASE", help="baseline results JSON to compare against")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown before a case fails (0.10 = 10%%)")
+    ap.add_argument("--profile", metavar="PATH", nargs="?", const=config.PROFILE_OUT,
+                    help="run the cases under the in-process profiler; collapsed stacks to PATH")
+    args = ap.parse_args()
+    if args.profile:
+        # wrapped before the cases capture any function
+        profiler.enable()
+
+    sizes = {"klines": args.klines, "trades": args.trades, "levels": args.levels, "frames": args.frames,
+             "symbols": args.symbols}
+    if args.quick:
+        for k in ("klines", "trades"):
+            if len(sizes[k]) > 1:
+                sizes[k] = sorted(sizes[k])[:-1]
+
+    results = {}
+    for name, fn, setup in cases(sizes):
+        if args.filter and args.filter not in name:
+            continue
+        r = measure(fn, setup, args.reps, args.min_time)
+        results[name] = r
+        print(f"  {name:<56} {r['best'] * 1e6:12.1f} µs  (median {r['median'] * 1e6:.1f})")
+
+    doc = {
+        "meta": {
+            "time":    time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit":  _commit(),
+            "python":  platform.python_version(),
+            "machine": platform.machine(),
+            "decode":  decode.BACKEND,
+            "sizes":   sizes,
+            "profiled": bool(args.profile),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+    if args.profile:
+        print(f"\nprofile (timings above include its overhead) → {args.profile}\n{profiler.summary()}")
+        profiler.dump(args.profile)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)["results"]
+        print(f"\nvs {args.compare}  (threshold {args.threshold:.0%})")
+        slow = compare(results, base, args.threshold)
+        if slow:
+            print(f"\n{len(slow)} regression(s)")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import sys
 import os
+import argparse
 import asyncio
+import time
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
@@ -11,9 +13,20 @@ if sys.platform == "win32":
 from rich.console import Console
 from rich.live   import Live
 
+import backtest
+import checkpoint
 import config
 import feeds
 import dashboard
+import fanout
+import metrics
+import profiler
+import shard
+import tape
+from candles import CandleSeries
+from candlestore import CandleStore
+from rollover import MarketScheduler, pm_meta
+from scanner import Scanner
 
 console = Console(force_terminal=True)
 
@@ -34,43 +47,269 @@ def pick(title: str, options: list[str]) -> str:
 
 
 async def display_loop(state: feeds.State, coin: str, tf: str):
-    await asyncio.sleep(2)
-    with Live(console=console, refresh_per_second=1, transient=False) as live:
+    # redraw only when something the dashboard shows changed, at most
+    # MAX_FPS times a second however fast the feeds update; nothing is
+    # drawn until the book has synced and candles are in
+    frame = 1 / config.MAX_FPS
+    last  = None
+    with Live(console=console, auto_refresh=False, transient=False) as live:
         while True:
             if state.mid > 0 and state.klines:
-                live.update(dashboard.render(state, coin, tf))
+                key = dashboard.changed(state)
+                if key != last:
+                    t0 = time.time()
+                    live.update(dashboard.render(state, coin, tf), refresh=True)
+                    last = key
+                    if metrics.on:
+                        metrics.rendered(state.snapshot.stamp, t0)
+            await asyncio.sleep(frame)
+
+
+async def scan_loop(view):
+    # view() → the scan table panel
+    with Live(console=console, refresh_per_second=1, transient=False) as live:
+        while True:
+            live.update(view())
             await asyncio.sleep(config.REFRESH)
 
 
-async def main():
+async def sharded(shards: int, warm: bool, consume):
+    # feeds and indicators in worker processes; this process only runs
+    # consume(coordinator) on the snapshots they publish
+    with shard.Coordinator(shards, warm=warm) as coord:
+        console.print(f"  {len(coord.keys)} markets on {len(coord.groups)} worker processes "
+                      f"(logs in {config.SHARD_LOGS}/) …")
+        await asyncio.gather(coord.run(), consume(coord))
+
+
+async def scan(warm: bool, shards: int | None):
+    console.print("\n[bold magenta]═══ CRYPTO PREDICTION SCANNER ═══[/bold magenta]\n")
+
+    if shards:
+        await sharded(shards, warm, lambda c: scan_loop(lambda: dashboard.render_scan_snaps(c.latest())))
+        return
+
+    scanner = Scanner(store_dir=config.CANDLE_DIR)
+    console.print(f"  bootstrapping {len(scanner.markets)} markets …")
+    path = checkpoint.path_for("scan")
+    await scanner.bootstrap(warm, path)
+    if tape.recorder is not None:
+        tape.recorder.write_json(tape.SRC_META, scanner.meta())
+
+    await asyncio.gather(
+        scanner.run(),
+        scan_loop(lambda: dashboard.render_scan(scanner.markets)),
+        checkpoint.run(scanner.symbols(), path),
+    )
+
+
+async def serve(host: str, port: int, warm: bool, shards: int | None):
+    console.print("\n[bold magenta]═══ CRYPTO PREDICTION SERVER ═══[/bold magenta]\n")
+
+    if shards:
+        await sharded(shards, warm, lambda c: fanout.Server(c.snaps, host, port, poll=c.poll).run())
+        return
+
+    scanner = Scanner(store_dir=config.CANDLE_DIR)
+    console.print(f"  bootstrapping {len(scanner.markets)} markets …")
+    path = checkpoint.path_for("serve")
+    await scanner.bootstrap(warm, path)
+    if tape.recorder is not None:
+        tape.recorder.write_json(tape.SRC_META, scanner.meta())
+
+    await asyncio.gather(
+        scanner.run(),
+        fanout.Server(scanner.markets, host, port).run(),
+        checkpoint.run(scanner.symbols(), path),
+    )
+
+
+async def remote_loop(remote: fanout.Remote, coin: str, tf: str):
+    frame  = 1 / config.MAX_FPS
+    market = f"{coin} {tf}"
+    last   = None
+    with Live(console=console, auto_refresh=False, transient=False) as live:
+        while True:
+            s = remote.snaps.get(market)
+            if s is not None and (remote.seq, remote.connected) != last:
+                t0 = time.time()
+                live.update(dashboard.render_snapshot(s, coin, tf, not remote.connected), refresh=True)
+                last = remote.seq, remote.connected
+                if metrics.on:
+                    metrics.rendered(s.stamp, t0)
+            await asyncio.sleep(frame)
+
+
+async def connect(host: str, port: int, coin: str | None, tf: str | None):
+    console.print("\n[bold magenta]═══ CRYPTO PREDICTION DASHBOARD ═══[/bold magenta]\n")
+
+    coin = coin or pick("Select coin:", config.COINS)
+    tf   = tf   or pick("Select timeframe:", config.TIMEFRAMES)
+
+    console.print(f"\n[bold green]Subscribing to {coin} {tf} on {host}:{port} …[/bold green]\n")
+    remote = fanout.Remote(host, port, [f"{coin} {tf}"])
+    await asyncio.gather(
+        remote.run(),
+        remote_loop(remote, coin, tf),
+    )
+
+
+def _addr(s: str) -> tuple[str, int]:
+    host, _, port = s.rpartition(":")
+    return host or config.SERVE_HOST, int(port)
+
+
+async def with_services(coro, args):
+    # the /metrics endpoint and the profiler's reports run next to
+    # whichever mode was picked
+    extra = []
+    if args.metrics is not None:
+        extra.append(metrics.serve(*args.metrics))
+    if args.profile is not None:
+        extra.append(profiler.run(args.profile))
+    await asyncio.gather(coro, *extra)
+
+
+async def main(coin: str | None, tf: str | None, warm: bool):
     console.print("\n[bold magenta]═══ CRYPTO PREDICTION DASHBOARD ═══[/bold magenta]\n")
 
-    coin = pick("Select coin:", config.COINS)
-    tf   = pick("Select timeframe:", config.TIMEFRAMES)
+    coin = coin or pick("Select coin:", config.COINS)
+    tf   = tf   or pick("Select timeframe:", config.TIMEFRAMES)
 
     console.print(f"\n[bold green]Starting {coin} {tf} …[/bold green]\n")
 
-    state = feeds.State()
+    binance_sym = config.COIN_BINANCE[coin]
+    kline_iv    = config.TF_KLINE[tf]
+    store = CandleStore.open(config.CANDLE_DIR, binance_sym, kline_iv)
+    state = feeds.State(series=CandleSeries(kline_iv, store))
+    sched = MarketScheduler({(coin, tf): state})
 
-    state.pm_up_id, state.pm_dn_id = feeds.fetch_pm_tokens(coin, tf)
+    # candles come from the checkpoint when it is recent enough; the first
+    # connect's backfill then fetches only the minutes since it was written
+    symbols = {binance_sym: (state.trades, [state.series])}
+    path    = checkpoint.path_for(coin, tf)
+    warm    = warm and binance_sym in checkpoint.restore(symbols, path)
+    if not warm:
+        console.print("  [Binance] bootstrapping candles …")
+    await asyncio.gather(
+        sched.bootstrap(),
+        *(() if warm else (feeds.bootstrap(binance_sym, [state.series], state.trades),)),
+    )
     if state.pm_up_id:
         console.print(f"  [PM] Up   → {state.pm_up_id[:24]}…")
         console.print(f"  [PM] Down → {state.pm_dn_id[:24]}…")
     else:
-        console.print("  [yellow][PM] no market for this coin/timeframe – prices will not show[/yellow]")
-
-    binance_sym = config.COIN_BINANCE[coin]
-    kline_iv    = config.TF_KLINE[tf]
-    console.print("  [Binance] bootstrapping candles …")
-    await feeds.bootstrap(binance_sym, kline_iv, state)
+        console.print("  [yellow][PM] no market for this coin/timeframe yet – waiting for the next window[/yellow]")
+    if tape.recorder is not None:
+        tape.recorder.write_json(tape.SRC_META, {"coins": [coin], "tfs": [tf], **pm_meta(sched.markets)})
 
     await asyncio.gather(
-        feeds.ob_poller(binance_sym, state),
-        feeds.binance_feed(binance_sym, kline_iv, state),
-        feeds.pm_feed(state),
+        feeds.binance_feed(binance_sym, state),
+        sched.feed(),
         display_loop(state, coin, tf),
+        checkpoint.run(symbols, path),
     )
 
 
+async def replay(path: str, speed: float):
+    console.print(f"\n[bold magenta]═══ REPLAY {path} ═══[/bold magenta]\n")
+
+    meta    = tape.meta(path)
+    scanner = Scanner(meta.get("coins", config.COINS), meta.get("tfs", config.TIMEFRAMES))
+    scanner.load_meta(meta)
+
+    if len(scanner.markets) == 1:
+        (coin, tf), state = next(iter(scanner.markets.items()))
+        view = display_loop(state, coin, tf)
+    else:
+        view = scan_loop(lambda: dashboard.render_scan(scanner.markets))
+
+    await asyncio.gather(
+        tape.replay(path, scanner, speed),
+        view,
+    )
+
+
+async def run_backtest(days: int, tape_path: str | None):
+    console.print(f"\n[bold]Backtesting trend score over {days} days of 1m candles …[/bold]\n")
+    results = await backtest.run(config.COINS, days, tape_path)
+    console.print(dashboard.render_backtest(results, days))
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Polymarket crypto assistant")
+    parser.add_argument("--scan", action="store_true",
+                        help="watch every coin × timeframe in one summary table")
+    parser.add_argument("--coin", choices=config.COINS,
+                        help="coin to show, instead of the interactive prompt")
+    parser.add_argument("--tf", choices=config.TIMEFRAMES,
+                        help="timeframe to show, instead of the interactive prompt")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore the checkpoint and bootstrap everything from REST")
+    parser.add_argument("--shards", metavar="N", type=int, nargs="?", const=config.SHARDS,
+                        help="with --scan / --serve: run the feeds and indicators in N worker "
+                             f"processes (default {config.SHARDS}, at most one per coin)")
+    parser.add_argument("--serve", metavar="[HOST:]PORT", type=_addr,
+                        help="headless: run the feeds once and publish snapshots to clients")
+    parser.add_argument("--connect", metavar="[HOST:]PORT", type=_addr,
+                        help="run the dashboard as a thin client of a --serve process")
+    parser.add_argument("--record", metavar="PATH",
+                        help="append every raw feed frame to a tape file")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="replay a tape instead of connecting to the feeds "
+                             "(with --backtest: source of recorded OBI / CVD / walls)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--backtest", type=int, metavar="DAYS",
+                        help="score-vs-resolution hit rates over DAYS of history")
+    parser.add_argument("--metrics", metavar="[HOST:]PORT", type=_addr, nargs="?",
+                        const=(config.METRICS_HOST, config.METRICS_PORT),
+                        help="serve latency histograms in Prometheus text format "
+                             f"(default {config.METRICS_HOST}:{config.METRICS_PORT})")
+    parser.add_argument("--diag", action="store_true",
+                        help="show the latency diagnostics panel under the dashboard")
+    parser.add_argument("--profile", metavar="PATH", nargs="?", const=config.PROFILE_OUT,
+                        help="time indicator / panel / handler calls; periodic summaries and "
+                             f"collapsed stacks to PATH (default {config.PROFILE_OUT}); "
+                             "SIGUSR1 toggles it")
+    args = parser.parse_args()
+    if args.backtest is not None and args.backtest < 1:
+        parser.error("--backtest needs at least 1 day")
+    if args.shards is not None:
+        if not (args.scan or args.serve) or args.replay or args.backtest is not None or args.connect:
+            parser.error("--shards works with --scan or --serve")
+        if args.record:
+            parser.error("--record needs a single process; drop --shards")
+        if args.metrics is not None or args.diag or args.profile is not None:
+            # these record in the process they run in, and the shards' work
+            # happens in the workers
+            parser.error("--metrics, --diag and --profile need a single process; drop --shards")
+        if args.shards < 1:
+            parser.error("--shards needs at least 1 worker")
+
+    config.DIAGNOSTICS = config.DIAGNOSTICS or args.diag
+    metrics.on = args.metrics is not None or config.DIAGNOSTICS
+    if args.profile is not None:
+        profiler.enable()
+
+    if args.backtest is not None:
+        asyncio.run(run_backtest(args.backtest, args.replay))
+    elif args.replay:
+        asyncio.run(with_services(replay(args.replay, args.speed), args))
+    elif args.connect:
+        asyncio.run(with_services(connect(*args.connect, args.coin, args.tf), args))
+    else:
+        # a recorded tape must carry its own bootstrap, so recording starts cold
+        warm = not args.fresh and not args.record
+        if args.record:
+            tape.recorder = tape.Recorder(args.record)
+        try:
+            if args.serve:
+                asyncio.run(with_services(serve(*args.serve, warm, args.shards), args))
+            elif args.scan:
+                asyncio.run(with_services(scan(warm, args.shards), args))
+            else:
+                asyncio.run(with_services(main(args.coin, args.tf, warm), args))
+        finally:
+            if tape.recorder is not None:
+                tape.recorder.close()
@@ -0,0 +1,340 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import config
+import feeds
+import snapshot
+import tape
+from resample import BASE_IV, iv_secs
+from scanner import Scanner
+from snapshot import TREND_THRESH
+
+
+# Vectorized backtest of the trend score.  Every component of
+# snapshot.score_trend is computed as an array over the whole history in
+# one pass, then each Polymarket window of each timeframe is resolved
+# Up/Down from 1m candles and compared to the label the score gave at the
+# window's open.
+#
+# Candles are struct-of-arrays: dict of "t", "o", "h", "l", "c", "v".
+
+
+# ── kernels ────────────────────────────────────────────────────
+def ema_scan(x: np.ndarray, a: float, y0: float) -> np.ndarray:
+    # y[i] = a·x[i] + (1 - a)·y[i-1], y[-1] = y0
+    # Closed form inside blocks short enough that d^-L stays ≤ 1e6 (so the
+    # scaling costs ~6 digits at most), then a scalar carry across blocks.
+    n = len(x)
+    if n == 0:
+        return np.empty(0)
+    d  = 1.0 - a
+    L  = max(1, int(6 / -np.log10(d)))
+    nb = -(-n // L)
+    xb = np.zeros(nb * L)
+    xb[:n] = x
+    xb = xb.reshape(nb, L)
+
+    k    = np.arange(1, L + 1, dtype=float)
+    up   = d ** -k
+    down = d ** k
+    part = a * np.cumsum(xb * up, axis=1) * down
+
+    carry = np.empty(nb)
+    c, dL = y0, d ** L
+    for b, last in enumerate(part[:, -1].tolist()):
+        carry[b] = c
+        c = dL * c + last
+    return (part + carry[:, None] * down).ravel()[:n]
+
+
+def ema(x: np.ndarray, period: int) -> np.ndarray:
+    # same seeding as indicators._ema_series: SMA of the first `period`
+    out = np.full(len(x), np.nan)
+    if len(x) < period:
+        return out
+    out[period - 1] = x[:period].mean()
+    out[period:] = ema_scan(x[period:], 2.0 / (period + 1), out[period - 1])
+    return out
+
+
+def rsi(c: np.ndarray, n: int = config.RSI_PERIOD) -> np.ndarray:
+    out = np.full(len(c), np.nan)
+    if len(c) < n + 1:
+        return out
+    ch = np.diff(c)
+    up, dn = np.maximum(ch, 0), np.maximum(-ch, 0)
+    ag = np.empty(len(ch))
+    al = np.empty(len(ch))
+    ag[n - 1], al[n - 1] = up[:n].mean(), dn[:n].mean()
+    ag[n:] = ema_scan(up[n:], 1.0 / n, ag[n - 1])
+    al[n:] = ema_scan(dn[n:], 1.0 / n, al[n - 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = np.where(al[n - 1:] == 0, 100.0, 100.0 - 100.0 / (1 + ag[n - 1:] / al[n - 1:]))
+    out[n:] = r
+    return out
+
+
+def macd(c: np.ndarray):
+    m = ema(c, config.MACD_FAST) - ema(c, config.MACD_SLOW)
+    s = np.full(len(c), np.nan)
+    first = config.MACD_SLOW - 1
+    if len(c) > first:
+        s[first:] = ema(m[first:], config.MACD_SIG)
+    return m, s, m - s
+
+
+def vwap(h, l, c, v, window: int = config.KLINE_MAX) -> np.ndarray:
+    pv = np.concatenate(([0.0], np.cumsum((h + l + c) / 3 * v)))
+    vv = np.concatenate(([0.0], np.cumsum(v)))
+    i  = np.arange(1, len(c) + 1)
+    j  = np.maximum(0, i - window)
+    num, den = pv[i] - pv[j], vv[i] - vv[j]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / den, 0.0)
+
+
+def heikin_ashi(o, h, l, c):
+    hc = (o + h + l + c) / 4
+    ho = np.empty(len(c))
+    if len(c):
+        ho[0] = (o[0] + c[0]) / 2
+        ho[1:] = ema_scan(hc[:-1], 0.5, ho[0])
+    return ho, hc, hc >= ho
+
+
+def resample(k: dict, secs: int) -> dict:
+    # 1m struct-of-arrays → `secs` candles; partial leading bucket dropped
+    b = (k["t"] // secs).astype(np.int64)
+    keep = b > b[0] if len(b) and k["t"][0] % secs else np.ones(len(b), bool)
+    b = b[keep]
+    src = {f: k[f][keep] for f in k}
+    if not len(b):
+        return {f: np.empty(0) for f in k}
+    starts = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    ends   = np.r_[starts[1:], len(b)] - 1
+    return {
+        "t": b[starts] * float(secs),
+        "o": src["o"][starts],
+        "h": np.maximum.reduceat(src["h"], starts),
+        "l": np.minimum.reduceat(src["l"], starts),
+        "c": src["c"][ends],
+        "v": np.add.reduceat(src["v"], starts),
+    }
+
+
+# ── score ──────────────────────────────────────────────────────
+def _sign(x):
+    return np.where(np.isnan(x), 0, np.sign(np.nan_to_num(x)))
+
+
+def score(k: dict, flow: dict | None = None) -> tuple[np.ndarray, dict]:
+    # trend score after each candle closes, plus the component arrays;
+    # price is the candle close.  `flow` may hold recorded "obi", "cvd5",
+    # "bw", "aw" arrays aligned to the candles.
+    c = k["c"]
+    comp = {}
+
+    r = rsi(c)
+    comp["rsi"] = np.where(r > config.RSI_OB, -1, np.where(r < config.RSI_OS, 1, 0))
+
+    _, _, hist = macd(c)
+    comp["macd"] = _sign(hist)
+
+    vw = vwap(k["h"], k["l"], c, k["v"])
+    comp["vwap"] = np.where(vw > 0, np.where(c > vw, 1, -1), 0)
+
+    es, el = ema(c, config.EMA_S), ema(c, config.EMA_L)
+    both = ~np.isnan(es) & ~np.isnan(el)
+    comp["ema"] = np.where(both, np.where(es > el, 1, -1), 0)
+
+    _, _, green = heikin_ashi(k["o"], k["h"], k["l"], c)
+    g3 = np.zeros(len(c), int)
+    if len(c) >= 3:
+        up3 = green[2:] & green[1:-1] & green[:-2]
+        dn3 = ~green[2:] & ~green[1:-1] & ~green[:-2]
+        g3[2:] = np.where(up3, 1, np.where(dn3, -1, 0))
+    comp["ha"] = g3
+
+    if flow:
+        if "obi" in flow:
+            obi = flow["obi"]
+            comp["obi"] = np.where(obi > config.OBI_THRESH, 1, np.where(obi < -config.OBI_THRESH, -1, 0))
+        if "cvd5" in flow:
+            comp["cvd"] = _sign(flow["cvd5"])
+        if "bw" in flow:
+            comp["walls"] = np.minimum(flow["bw"], 2) - np.minimum(flow.get("aw", 0), 2)
+
+    total = np.sum(list(comp.values()), axis=0)
+    return total, comp
+
+
+# ── windows ────────────────────────────────────────────────────
+def window_starts(tf: str, t0: float, t1: float) -> np.ndarray:
+    # open times of every Polymarket window of `tf` fully inside [t0, t1)
+    if tf == "daily":
+        # noon ET → noon ET
+        out = []
+        day = datetime.fromtimestamp(t0, timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        while day.timestamp() < t1:
+            noon = day + timedelta(hours=12)
+            out.append((noon - feeds.et_offset(noon)).timestamp())
+            day += timedelta(days=1)
+        st = np.array(out)
+        return st[(st >= t0) & (st + 86400 <= t1)]
+
+    length, offset = {"15m": (900, 0), "1h": (3600, 0), "4h": (14400, 3600)}[tf]
+    first = -(-(t0 - offset) // length) * length + offset
+    st = np.arange(first, t1 - length + 1, length, dtype=float)
+    return st
+
+
+def window_length(tf: str) -> int:
+    return {"15m": 900, "1h": 3600, "4h": 14400, "daily": 86400}[tf]
+
+
+def ta_candles(k1m: dict, tf: str) -> dict:
+    iv = iv_secs(config.TF_KLINE[tf])
+    return k1m if iv == iv_secs(BASE_IV) else resample(k1m, iv)
+
+
+def evaluate(k1m: dict, tf: str, flow: dict | None = None) -> dict:
+    # `flow` arrays, when given, are aligned to ta_candles(k1m, tf)
+    t1m = k1m["t"]
+    if not len(t1m):
+        none = np.empty(0)
+        return _summary(tf, none, none, none.astype(bool))
+
+    base = iv_secs(BASE_IV)
+    iv   = iv_secs(config.TF_KLINE[tf])
+    ta   = ta_candles(k1m, tf)
+    sc, _ = score(ta, flow)
+
+    starts = window_starts(tf, t1m[0], t1m[-1] + base)
+    ends   = starts + window_length(tf)
+
+    # resolution from the 1m candles at the window's edges
+    i_open  = np.searchsorted(t1m, starts)
+    i_close = np.searchsorted(t1m, ends - base)
+    ok = (i_open < len(t1m)) & (i_close < len(t1m))
+    ok[ok] &= (t1m[i_open[ok]] == starts[ok]) & (t1m[i_close[ok]] == ends[ok] - base)
+
+    # score of the last TA candle closed by the window's open
+    i_ta = np.searchsorted(ta["t"] + iv, starts, side="right") - 1
+    ok  &= i_ta >= max(config.MACD_SLOW + config.MACD_SIG, config.RSI_PERIOD + 1)
+
+    starts, i_open, i_close, i_ta = starts[ok], i_open[ok], i_close[ok], i_ta[ok]
+    up = k1m["c"][i_close] >= k1m["o"][i_open]
+    return _summary(tf, starts, sc[i_ta], up)
+
+
+def _summary(tf: str, starts: np.ndarray, s: np.ndarray, up: np.ndarray) -> dict:
+    # hit rates of the window-open scores `s` against the outcomes `up`
+    bull  = s >= TREND_THRESH
+    bear  = s <= -TREND_THRESH
+    calls = bull | bear
+    hits  = (bull & up) | (bear & ~up)
+
+    n = int(calls.sum())
+    return {
+        "tf":       tf,
+        "windows":  int(len(starts)),
+        "up_rate":  float(up.mean()) if len(up) else 0.0,
+        "calls":    n,
+        "bull":     int(bull.sum()),
+        "bear":     int(bear.sum()),
+        "hits":     int(hits.sum()),
+        "hit_rate": float(hits.sum() / n) if n else 0.0,
+        "scores":   s,
+        "up":       up,
+        "starts":   starts,
+    }
+
+
+# ── history ────────────────────────────────────────────────────
+def _cache_path(symbol: str) -> str:
+    return os.path.join(config.BACKTEST_DIR, f"{symbol}_{BASE_IV}.npz")
+
+
+async def load_history(symbol: str, days: int) -> dict:
+    # 1m history for the last `days`, cached on disk; only the missing
+    # head/tail is fetched
+    base = iv_secs(BASE_IV)
+    end  = int(time.time()) // base * base - base          # last closed 1m
+    beg  = end - days * 86400 + base
+
+    path = _cache_path(symbol)
+    have = None
+    if os.path.exists(path):
+        with np.load(path) as z:
+            have = {f: z[f] for f in z.files}
+
+    parts = []
+    if have is None or not len(have["t"]) or have["t"][0] > beg or have["t"][-1] < beg:
+        have = None
+        parts.append((beg, end))
+    else:
+        parts.append((int(have["t"][-1]) + base, end))
+
+    for a, b in parts:
+        if b < a:
+            continue
+        rows = await feeds.fetch_klines(symbol, BASE_IV, a * 1000, (b - a) // base + 1)
+        got  = {f: np.array([r[f] for r in rows], dtype=float) for f in "tohlcv"}
+        have = got if have is None else {f: np.concatenate([have[f], got[f]]) for f in "tohlcv"}
+
+    t, idx = np.unique(have["t"], return_index=True)
+    have = {f: have[f][idx] for f in "tohlcv"}
+    os.makedirs(config.BACKTEST_DIR, exist_ok=True)
+    np.savez(path, **have)
+
+    keep = have["t"] >= beg
+    return {f: have[f][keep] for f in "tohlcv"}
+
+
+async def flow_from_tape(path: str, coin: str, ta_t: dict[str, np.ndarray]) -> dict[str, dict]:
+    # OBI / CVD 5m / wall counts as they stood at each TA candle close, for
+    # every timeframe in `ta_t` from one replay of a recorded tape; candles
+    # outside the tape stay NaN / 0
+    scanner = Scanner([coin], list(ta_t))
+    flows, marks = {}, []
+    for tf, t in ta_t.items():
+        flows[tf] = {
+            "obi":  np.full(len(t), np.nan),
+            "cvd5": np.full(len(t), np.nan),
+            "bw":   np.zeros(len(t), int),
+            "aw":   np.zeros(len(t), int),
+        }
+        closes = t + iv_secs(config.TF_KLINE[tf])
+        marks.append([scanner.markets[(coin, tf)], closes, flows[tf], None])
+
+    def sample(ts, _src):
+        for m in marks:
+            st, closes, flow, i = m
+            if i is None:
+                i = int(np.searchsorted(closes, ts))
+            while i < len(closes) and closes[i] <= ts:
+                if st.mid:
+                    s = snapshot.take(st)
+                    flow["obi"][i], flow["cvd5"][i] = s.obi, s.cvd.get(300, 0.0)
+                    flow["bw"][i],  flow["aw"][i]   = len(s.bw), len(s.aw)
+                i += 1
+            m[3] = i
+
+    await tape.replay(path, scanner, 0, on_frame=sample)
+    return flows
+
+
+async def run(coins: list[str], days: int, tape_path: str | None = None) -> dict:
+    out = {}
+    for coin in coins:
+        k1m   = await load_history(config.COIN_BINANCE[coin], days)
+        flows = {}
+        if tape_path and len(k1m["t"]):
+            ta_t  = {tf: ta_candles(k1m, tf)["t"] for tf in config.TIMEFRAMES}
+            flows = await flow_from_tape(tape_path, coin, ta_t)
+        for tf in config.TIMEFRAMES:
+            out[(coin, tf)] = evaluate(k1m, tf, flows.get(tf))
+    return out
@@ -0,0 +1,121 @@
+from bisect import bisect_left, insort
+
+import config
+from bookstats import BookStats
+
+
+# Local L2 book kept in sync from the Binance `@depth@100ms` diff stream.
+#
+# Sync protocol (lastUpdateId): diffs are buffered until a REST snapshot is
+# loaded; diffs with u <= lastUpdateId are stale and dropped, and any diff
+# whose first id U skips past lastUpdateId + 1 means we missed an update,
+# so the book drops out of sync and a fresh snapshot is needed.
+#
+# Prices are kept in sorted lists (bids negated so index 0 is always the
+# best level) next to a price → qty dict; lookups are a bisect.
+
+
+class OrderBook:
+    def __init__(self, depth: int = config.OB_DEPTH):
+        self.depth   = depth
+        self.last_id = 0
+        self.synced  = False
+        self.syncing = False
+        self.pending: list[dict] = []
+
+        self._bpx: list[float] = []      # -price, ascending
+        self._apx: list[float] = []      # price, ascending
+        self._bq:  dict[float, float] = {}
+        self._aq:  dict[float, float] = {}
+
+        self._ver  = 0
+        self._view = (-1, [], [])
+        self._stats: tuple[int, BookStats | None] = (-1, None)
+
+    # ── sync ──────────────────────────────────────────────────
+    def load(self, snap: dict) -> bool:
+        self._bpx, self._apx, self._bq, self._aq = [], [], {}, {}
+        for p, q in snap["bids"]:
+            self._set(self._bpx, self._bq, -float(p), float(q))
+        for p, q in snap["asks"]:
+            self._set(self._apx, self._aq, float(p), float(q))
+        self.last_id = snap["lastUpdateId"]
+        self.synced  = True
+        self._ver   += 1
+
+        pending, self.pending = self.pending, []
+        for i, ev in enumerate(pending):
+            if not self.on_diff(ev):
+                # gap: on_diff kept ev for the resync, keep what followed it too
+                self.pending.extend(pending[i + 1:])
+                return False
+        return True
+
+    def on_diff(self, ev: dict) -> bool:
+        if not self.synced:
+            self.pending.append(ev)
+            return False
+        if ev["u"] <= self.last_id:
+            return True
+        if ev["U"] > self.last_id + 1:
+            self.synced  = False
+            self.pending = [ev]
+            return False
+
+        for p, q in ev["b"]:
+            self._set(self._bpx, self._bq, -float(p), float(q))
+        for p, q in ev["a"]:
+            self._set(self._apx, self._aq, float(p), float(q))
+        self.last_id = ev["u"]
+        self._ver   += 1
+        return True
+
+    def _set(self, px, qty, key, q):
+        if q == 0:
+            if qty.pop(key, None) is not None:
+                del px[bisect_left(px, key)]
+            return
+        if key not in qty:
+            insort(px, key)
+            if len(px) > self.depth:
+                worst = px.pop()
+                if worst == key:
+                    return
+                del qty[worst]
+        qty[key] = q
+
+    # ── views ─────────────────────────────────────────────────
+    @property
+    def version(self) -> int:
+        return self._ver
+
+    def _levels(self):
+        if self._view[0] != self._ver:
+            bq, aq = self._bq, self._aq
+            self._view = (
+                self._ver,
+                [(-p, bq[p]) for p in self._bpx],
+                [(p, aq[p]) for p in self._apx],
+            )
+        return self._view
+
+    @property
+    def bids(self) -> list[tuple[float, float]]:
+        return self._levels()[1]
+
+    @property
+    def asks(self) -> list[tuple[float, float]]:
+        return self._levels()[2]
+
+    def analytics(self) -> BookStats:
+        # prefix-sum view of this version, for band / depth / wall queries
+        if self._stats[0] != self._ver:
+            ver, bids, asks = self._levels()
+            self._stats = (ver, BookStats.from_levels(bids, asks))
+        return self._stats[1]
+
+    @property
+    def mid(self) -> float:
+        if not self._bpx or not self._apx:
+            return 0.0
+        return (-self._bpx[0] + self._apx[0]) / 2
@@ -0,0 +1,105 @@
+import config
+from candlestore import CandleStore, Rows
+from engine import IndicatorEngine
+from resample import BASE_IV, Resampler, iv_secs
+
+
+# Closed candles plus the in-progress one for a single symbol/interval,
+# with the incremental indicator engine that follows them.  Several
+# markets that chart the same symbol and interval share one series.
+# Every series is fed from the symbol's 1m stream and resamples locally.
+# Closed candles live in a columnar CandleStore (on disk when given one);
+# `klines` is a view of the last KLINE_MAX of them since the last gap.
+
+
+class CandleSeries:
+    def __init__(self, interval: str = BASE_IV, store: CandleStore | None = None):
+        self.interval = interval
+        self.secs     = iv_secs(interval)
+        self._rs      = Resampler(self.secs) if interval != BASE_IV else None
+
+        self.store = CandleStore() if store is None else store
+        self.cur: dict | None = None
+        self.engine  = IndicatorEngine()
+        self.version = 0
+        self.base_t: float | None = None      # newest closed 1m candle ingested
+
+    @property
+    def klines(self) -> Rows:
+        return self.store.tail(config.KLINE_MAX)
+
+    def history(self, n: int | None = None) -> dict:
+        # zero-copy column views of the last n closed candles (all by default)
+        return self.store.columns(n)
+
+    def seed(self, klines: list[dict]):
+        # candles the store already holds are skipped, so a deep on-disk
+        # history survives the bootstrap; history that starts after a gap
+        # (downtime) starts a new segment instead of joining the old rows
+        last = self.store.last_t
+        if klines and last is not None and klines[0]["t"] > last + self.secs:
+            self.store.split()
+        self.store.extend(klines)
+        self.engine.seed(self.klines)
+        self.version += 1
+
+    def seed_base(self, base: list[dict]):
+        # 1m history whose last candle is still open
+        if not base:
+            return
+        if len(base) > 1:
+            self.base_t = base[-2]["t"]
+        if self._rs is None:
+            self.seed(base[:-1])
+            self.cur = base[-1]
+            return
+
+        self._rs = Resampler(self.secs)
+        closed   = []
+        for k in base[:-1]:
+            if not closed and self._rs.t is None and k["t"] % self.secs:
+                continue            # leading partial bucket
+            done, _ = self._rs.update(k, True)
+            closed.extend(done)
+        self.seed(closed)
+        self.ingest(base[-1], False)
+
+    def update(self, candle: dict, closed: bool):
+        self.cur = candle
+        if closed:
+            self.store.append(candle)
+            self.engine.push(candle)
+        self.version += 1
+
+    def ingest(self, k: dict, closed: bool):
+        # one 1m kline update from the stream; already-closed minutes are
+        # skipped so a backfill and the live stream can overlap
+        if self.base_t is not None and k["t"] <= self.base_t:
+            return
+        if closed:
+            self.base_t = k["t"]
+        if self._rs is None:
+            return self.update(k, closed)
+        done, cur = self._rs.update(k, closed)
+        for c in done:
+            self.update(c, True)
+        if cur is not None:
+            self.cur = cur
+            self.version += 1
+
+    # ── checkpoint ────────────────────────────────────────────
+    def checkpoint(self) -> dict:
+        rs = self._rs
+        return {
+            "interval": self.interval,
+            "klines":   list(self.klines),
+            "cur":      self.cur,
+            "base_t":   self.base_t,
+            "rs":       None if rs is None else [rs.t, rs.acc],
+        }
+
+    def restore(self, d: dict):
+        self.seed(d["klines"])
+        self.cur, self.base_t = d["cur"], d["base_t"]
+        if self._rs is not None and d["rs"] is not None:
+            self._rs.t, self._rs.acc = d["rs"]
@@ -0,0 +1,216 @@
+import os
+
+import numpy as np
+
+import config
+
+try:
+    import fcntl
+except ImportError:         # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Columnar candle history: t, o, h, l, c, v as float64 columns.  A store
+# with a path lives in a memory-mapped file (a 64-byte header, then each
+# column as one contiguous block), so appends are a slot write, reads of
+# the last N candles are zero-copy column slices, and deep histories cost
+# page cache rather than resident memory.  A full file is rewritten at
+# twice the capacity.  Without a path the store is an in-memory window of
+# STORE_MEM rows that drops its older half when full.
+#
+# A file store is held under an exclusive lock on <path>.lock, so two
+# processes charting the same symbol/interval never share a mapping (nor
+# swap the file out from under each other when it grows); the one that
+# finds the lock taken keeps that series in memory instead.
+#
+# History stored before downtime can end well before a fresh bootstrap
+# starts; split() marks where the newest unbroken run of candles begins,
+# and tail() reads only from there.
+#
+# rows() is the list-of-dicts face for code written against klines lists;
+# dicts are only built for the rows actually read.
+
+FIELDS = ("t", "o", "h", "l", "c", "v")
+
+_MAGIC = b"CANDLES1"
+_HEAD  = 64
+
+
+def _lock(path: str) -> int | None:
+    # an exclusive lock without waiting: the open fd, or None if it's held
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+class Rows:
+    # read-only sequence of candle dicts over [start, stop) of the columns
+    __slots__ = ("_cols", "_start", "_stop")
+
+    def __init__(self, cols: np.ndarray, start: int, stop: int):
+        self._cols  = cols
+        self._start = start
+        self._stop  = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            a, b, step = i.indices(len(self))
+            if step != 1:
+                return list(self)[i]
+            return Rows(self._cols, self._start + a, self._start + max(a, b))
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("candle index out of range")
+        return dict(zip(FIELDS, self._cols[:, self._start + i].tolist()))
+
+    def __iter__(self):
+        for vals in zip(*self._cols[:, self._start:self._stop].tolist()):
+            yield dict(zip(FIELDS, vals))
+
+    def __eq__(self, other):
+        if isinstance(other, (Rows, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {f: self._cols[j, self._start:self._stop] for j, f in enumerate(FIELDS)}
+
+
+class CandleStore:
+    def __init__(self, path: str | None = None, cap: int | None = None):
+        self.path  = path
+        self._n    = 0
+        self._seg  = 0
+        self._lock = None
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._lock = _lock(path + ".lock")
+            if self._lock is None:
+                print(f"  [store] {path} is in use by another process – keeping it in memory")
+                self.path = path = None
+        if path is None:
+            self._cols = np.empty((len(FIELDS), cap or config.STORE_MEM))
+            self._head = None
+            return
+        if os.path.exists(path) and os.path.getsize(path) >= _HEAD:
+            self._map(path)
+        else:
+            self._create(path, cap or config.STORE_CHUNK)
+
+    @classmethod
+    def open(cls, root: str, symbol: str, interval: str) -> "CandleStore":
+        return cls(os.path.join(root, f"{symbol}_{interval}.candles"))
+
+    # ── file ──────────────────────────────────────────────────
+    def _create(self, path: str, cap: int):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_MAGIC + np.array([0, cap, 0], np.int64).tobytes())
+            f.truncate(_HEAD + len(FIELDS) * cap * 8)
+        self._map(path)
+
+    def _map(self, path: str):
+        with open(path, "rb") as f:
+            head = f.read(_HEAD)
+        if head[:8] != _MAGIC:
+            raise ValueError(f"{path}: not a candle store")
+        cap = int(np.frombuffer(head, np.int64, 1, 16)[0])
+        self._head = np.memmap(path, np.int64, "r+", 8, (3,))
+        self._cols = np.memmap(path, np.float64, "r+", _HEAD, (len(FIELDS), cap))
+        self._n    = int(self._head[0])
+        self._seg  = int(self._head[2])
+
+    def _grow(self):
+        if self.path is None:
+            keep = self.cap // 2
+            self._cols[:, :keep] = self._cols[:, self._n - keep:self._n]
+            self._seg = max(0, self._seg - (self._n - keep))
+            self._n   = keep
+            return
+        n, seg, cap, old = self._n, self._seg, self.cap, np.array(self._cols[:, :self._n])
+        self._unmap()
+        tmp = self.path + ".tmp"
+        self._create(tmp, cap * 2)
+        self._cols[:, :n] = old
+        self._head[0] = self._n   = n
+        self._head[2] = self._seg = seg
+        self._unmap()
+        os.replace(tmp, self.path)
+        self._map(self.path)
+
+    def flush(self):
+        if self._head is not None:
+            self._cols.flush()
+            self._head.flush()
+
+    def _unmap(self):
+        self.flush()
+        self._cols = self._head = None
+
+    def close(self):
+        self._unmap()
+        if self._lock is not None:
+            os.close(self._lock)
+            self._lock = None
+
+    # ── data ──────────────────────────────────────────────────
+    @property
+    def cap(self) -> int:
+        return self._cols.shape[1]
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def last_t(self) -> float | None:
+        return float(self._cols[0, self._n - 1]) if self._n else None
+
+    def append(self, k: dict):
+        # candles arrive in time order; anything not newer than the last
+        # stored one is already there (seed after restart, backfill overlap)
+        n = self._n
+        if n and k["t"] <= self._cols[0, n - 1]:
+            return
+        if n == self.cap:
+            self._grow()
+            n = self._n
+        self._cols[:, n] = (k["t"], k["o"], k["h"], k["l"], k["c"], k["v"])
+        self._n = n + 1
+        if self._head is not None:
+            self._head[0] = self._n
+
+    def extend(self, klines):
+        for k in klines:
+            self.append(k)
+
+    def split(self):
+        # what comes next doesn't continue the stored candles
+        self._seg = self._n
+        if self._head is not None:
+            self._head[2] = self._seg
+
+    def rows(self, n: int | None = None) -> Rows:
+        start = 0 if n is None else max(0, self._n - n)
+        return Rows(self._cols, start, self._n)
+
+    def tail(self, n: int | None = None) -> Rows:
+        # rows() within the newest unbroken segment
+        return self.rows(self._n - self._seg if n is None else min(n, self._n - self._seg))
+
+    def columns(self, n: int | None = None) -> dict[str, np.ndarray]:
+        return self.rows(n).columns()
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import time
+from array import array
+
+import numpy as np
+
+import config
+from resample import BASE_IV, iv_secs
+
+
+# Warm restarts.  Every CHECKPOINT_EVERY seconds the candle series, trade
+# buffer and volume profiles of each symbol go to one compressed .npz
+# (trade / profile columns as arrays, the small candle state as JSON).
+# On startup a checkpoint recent enough to be bridged by REST is loaded
+# instead of the full bootstrap; the supervisor's first ready() then runs
+# the usual reconnect backfill, which fetches only what the process missed.
+# Polymarket tokens already persist in rollover.TokenCache.
+#
+# Each kind of process keeps its own file (path_for), and writes go
+# through a per-process temp file, so two running at once don't trip
+# over each other.
+#
+# `symbols` maps a Binance symbol to (trade buffer, candle series).
+
+_TRADE_COLS = (("ts", "d", np.float64), ("px", "d", np.float64),
+               ("qty", "d", np.float64), ("buy", "b", np.int8))
+
+
+def path_for(*key: str) -> str:
+    # data/checkpoint.scan.npz, data/checkpoint.BTC-15m.npz, ...
+    root, ext = os.path.splitext(config.CHECKPOINT_PATH)
+    return f"{root}.{'-'.join(key)}{ext}"
+
+
+def _collect(symbols: dict) -> tuple[dict, dict]:
+    meta   = {"saved": time.time(), "symbols": {}}
+    arrays = {}
+    for sym, (trades, series) in symbols.items():
+        idx = np.arange(trades.tail, trades.head) % trades.cap
+        for f, _, dt in _TRADE_COLS:
+            arrays[f"{sym}/{f}"] = np.frombuffer(getattr(trades, f), dt)[idx]
+        vps = []
+        for i, vp in enumerate(trades.profiles):
+            d = vp.checkpoint()
+            arrays[f"{sym}/vp{i}"] = np.array(d.pop("rows"), dtype=float).reshape(-1, 4)
+            vps.append(d)
+        meta["symbols"][sym] = {
+            "series":   [ser.checkpoint() for ser in series],
+            "profiles": vps,
+        }
+    return meta, arrays
+
+
+def _write(path: str, meta: dict, arrays: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez_compressed(tmp, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp, path)
+
+
+def save(symbols: dict, path: str = config.CHECKPOINT_PATH):
+    _write(path, *_collect(symbols))
+
+
+async def run(symbols: dict, path: str = config.CHECKPOINT_PATH, every: float = config.CHECKPOINT_EVERY):
+    # columns are copied on the loop, compression and the write happen off it
+    # a failed write (disk full, directory gone) is logged, not fatal
+    try:
+        while True:
+            await asyncio.sleep(every)
+            try:
+                await asyncio.to_thread(_write, path, *_collect(symbols))
+            except OSError as e:
+                print(f"  [checkpoint] write failed: {e}")
+    finally:
+        try:
+            save(symbols, path)
+        except OSError as e:
+            print(f"  [checkpoint] write failed: {e}")
+
+
+def restore(symbols: dict, path: str = config.CHECKPOINT_PATH) -> set[str]:
+    # loads every symbol whose checkpoint the backfill can still bridge;
+    # returns those symbols, the rest need a full bootstrap
+    try:
+        z = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return set()
+
+    done = set()
+    with z:
+        meta = json.loads(str(z["meta"]))
+        now  = time.time()
+        base = iv_secs(BASE_IV)
+        for sym, (trades, series) in symbols.items():
+            rec = meta["symbols"].get(sym)
+            if rec is None:
+                continue
+            saved = {d["interval"]: d for d in rec["series"]}
+            if any(ser.interval not in saved or saved[ser.interval]["base_t"] is None for ser in series):
+                continue
+            if len(rec["profiles"]) != len(trades.profiles):
+                continue
+            # backfill_klines fetches at most the bootstrap depth
+            need = max((config.KLINE_BOOT + 1) * ser.secs // base for ser in series)
+            if now - min(saved[ser.interval]["base_t"] for ser in series) > (need - 1) * base:
+                continue
+
+            for ser in series:
+                ser.restore(saved[ser.interval])
+            cols = []
+            for f, code, _ in _TRADE_COLS:
+                a = array(code)
+                a.frombytes(z[f"{sym}/{f}"].tobytes())
+                cols.append(a)
+            trades.load(*cols)
+            for i, (vp, d) in enumerate(zip(trades.profiles, rec["profiles"])):
+                vp.restore({**d, "rows": z[f"{sym}/vp{i}"].tolist()})
+            done.add(sym)
+            age = now - meta["saved"]
+            print(f"  [checkpoint] {sym} restored ({len(trades)} trades, saved {age:.0f}s ago)")
+    return done
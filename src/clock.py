@@ -0,0 +1,17 @@
+import time
+
+
+# Wall clock for everything time-windowed (CVD windows, snapshot expiry).
+# Replay pins it to the tape's timestamps so offline runs see the same
+# windows the live run did.
+
+_pinned: float | None = None
+
+
+def now() -> float:
+    return time.time() if _pinned is None else _pinned
+
+
+def pin(t: float | None):
+    global _pinned
+    _pinned = t
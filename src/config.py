@@ -14,20 +14,60 @@ COIN_PM_LONG = {"BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana", "XRP": "xr
 # ── Timeframes ──────────────────────────────────────────────────
 TIMEFRAMES = ["15m", "1h", "4h", "daily"]
 
-# Binance kline interval used for TA candles
+# TA candle interval per timeframe (resampled locally from the 1m stream)
 TF_KLINE = {"15m": "1m", "1h": "1m", "4h": "15m", "daily": "1h"}
 
 # ── Binance ─────────────────────────────────────────────────────
 BINANCE_WS   = "wss://stream.binance.com/stream"
 BINANCE_REST = "https://api.binance.com/api/v3"
-OB_LEVELS    = 20          # depth levels in stream (Binance: 5 / 10 / 20)
+OB_DEPTH     = 1000        # local book depth per side (REST snapshot limit)
 TRADE_TTL    = 600         # keep 10 min of trades
+TRADE_CAP    = 300_000     # trade ring buffer capacity (rows)
 KLINE_MAX    = 150         # max candles in memory
 KLINE_BOOT   = 100         # candles fetched on startup
 
+# ── Ingestion ──────────────────────────────────────────────────
+INGEST_BATCH  = 256        # max frames applied per pass
+INGEST_QUEUE  = 10_000     # queued frames before the socket reader waits
+LAG_DEGRADED  = 1.0        # seconds behind the exchange → degraded (coalescing) mode
+USE_AGG_TRADE = False      # @aggTrade instead of @trade (fewer messages)
+
+# ── Reconnect ───────────────────────────────────────────────────
+RECONNECT_BASE  = 0.5      # first retry delay (s), doubled per failed attempt
+RECONNECT_MAX   = 30       # retry delay cap (s); every delay is jittered ±50 %
+RECONNECT_RESET = 60       # a connection up this long resets the backoff
+
+# ── REST ────────────────────────────────────────────────────────
+HTTP_TIMEOUT  = 5          # seconds per REST request
+HTTP_MAX_CONC = 8          # concurrent REST requests (also pool size per host)
+
+# ── Fan-out server ─────────────────────────────────────────────
+SERVE_HOST   = "127.0.0.1"
+SERVE_PORT   = 8765
+SERVE_BUFFER = 256 * 1024  # unsent bytes per client before its updates conflate
+
+# ── Sharding ───────────────────────────────────────────────────
+SHARDS     = 4             # worker processes for --shards without a count (≤ one per coin)
+SHM_SLOT   = 32 * 1024     # shared-memory bytes per market snapshot
+SHARD_LOGS = "data/shards" # worker stdout / stderr, one log per shard
+
+# ── Metrics ────────────────────────────────────────────────────
+METRICS_HOST  = "127.0.0.1"
+METRICS_PORT  = 9108
+HIST_SUB_BITS = 5          # latency histograms: 2**5 buckets per power of two (~3 %)
+DIAGNOSTICS   = False      # latency panel under the dashboard (--diag)
+PROFILE_OUT   = "profile.folded"   # --profile collapsed stacks (flamegraph.pl / speedscope)
+PROFILE_EVERY = 30         # seconds between --profile summaries
+
 # ── Polymarket ──────────────────────────────────────────────────
 PM_GAMMA = "https://gamma-api.polymarket.com/events"
 PM_WS    = "wss://ws-subscriptions-clob.polymarket.com/ws/market"
+PM_DEPTH_CENTS = 2          # PM book depth counted within N cents of the best price
+PM_CACHE       = "data/pm_tokens.json"   # slug → token ids, shared across runs
+PM_CACHE_TTL   = 6 * 3600   # seconds a cached slug lookup stays valid
+PM_PREFETCH    = 300        # resolve the next window's tokens this long before expiry
+PM_SWITCH_LEAD = 15         # subscribe the next tokens this long before the boundary
+PM_RETRY       = 20         # seconds between lookups of a window Gamma hasn't listed yet
 
 # ── Orderbook indicators ───────────────────────────────────────
 OBI_BAND_PCT = 1.0          # % band around mid for OBI calc
@@ -49,8 +89,27 @@ MACD_SIG   = 9
 EMA_S      = 5
 EMA_L      = 20
 
+# ── Backtest ───────────────────────────────────────────────────
+BACKTEST_DIR = "data"          # cached 1m histories (.npz)
+
+# ── Candle store ───────────────────────────────────────────────
+CANDLE_DIR  = "data/candles"    # memory-mapped candle history per symbol/interval
+STORE_CHUNK = 65_536            # initial rows per store file; doubled when full
+STORE_MEM   = 4_096             # rows kept by in-memory stores (replay, bench)
+
+# ── Checkpoint ─────────────────────────────────────────────────
+CHECKPOINT_PATH  = "data/checkpoint.npz"   # candles, trades & profiles for warm restarts
+CHECKPOINT_EVERY = 30                      # seconds between checkpoint writes
+
+# ── Volume profile ─────────────────────────────────────────────
+VP_TICK_BP = 1.0           # bucket width in basis points of the first traded price
+VP_WINDOW  = 4 * 3600      # rolling window (s); 0 keeps everything
+VP_SESSION = False         # True: one profile per market, reset at each PM window start
+VP_VALUE   = 0.70          # value area share of volume
+
 # ── Dashboard ──────────────────────────────────────────────────
 HA_COUNT   = 8          # Heikin Ashi candles shown
 VP_BINS    = 30         # volume profile price buckets
 VP_SHOW    = 9          # VP rows visible
-REFRESH    = 10         # seconds between dashboard redraws
+MAX_FPS    = 10         # dashboard redraws per second at most (only on change)
+REFRESH    = 10         # seconds between scanner table redraws
@@ -5,7 +5,9 @@ from rich.text    import Text
 from rich         import box as bx
 
 import config
-import indicators as ind
+import metrics
+import snapshot as snp
+import supervisor
 
 
 class _Group:
@@ -17,6 +19,49 @@ class _Group:
             yield r
 
 
+# Panels are cached per market and keyed on the inputs they display.  A
+# cached panel keeps its rendered lines too, so a redraw where only the
+# book moved re-lays-out the book and header panels and replays the rest.
+
+
+class _Cached:
+    def __init__(self, build):
+        self.build = build
+        self.key   = object()
+        self.panel = None
+        self._opts = None
+        self._lines = None
+
+    def get(self, key, *args) -> "_Cached":
+        if key != self.key:
+            self.key   = key
+            self.panel = self.build(*args)
+            self._lines = None
+        return self
+
+    def __rich_console__(self, console, options):
+        opts = (options.max_width, options.height)
+        if self._lines is None or self._opts != opts:
+            self._lines = console.render_lines(self.panel, options, new_lines=True)
+            self._opts  = opts
+        for line in self._lines:
+            yield from line
+
+
+class _View:
+    def __init__(self):
+        self.header  = _Cached(_header)
+        self.ob      = _Cached(_ob_panel)
+        self.flow    = _Cached(_flow_panel)
+        self.ta      = _Cached(_ta_panel)
+        self.pm      = _Cached(_pm_panel)
+        self.signals = _Cached(_signals_panel)
+        self.diag    = _Cached(_diag_panel)
+
+
+_views: dict[tuple[str, str], _View] = {}
+
+
 def _p(val, d=2):
     if val is None:
         return "—"
@@ -33,74 +78,35 @@ def _col(val):
     return "green" if val > 0 else "red"
 
 
-TREND_THRESH = 3
-
-
 def _score_trend(st):
-    score = 0
-
-    obi_v = ind.obi(st.bids, st.asks, st.mid) if st.mid else 0.0
-    if obi_v > config.OBI_THRESH:
-        score += 1
-    elif obi_v < -config.OBI_THRESH:
-        score -= 1
-
-    cvd5 = ind.cvd(st.trades, 300)
-    score += 1 if cvd5 > 0 else -1 if cvd5 < 0 else 0
-
-    rsi_v = ind.rsi(st.klines)
-    if rsi_v is not None:
-        if rsi_v > config.RSI_OB:
-            score -= 1
-        elif rsi_v < config.RSI_OS:
-            score += 1
-
-    _, _, hv = ind.macd(st.klines)
-    if hv is not None:
-        score += 1 if hv > 0 else -1
-
-    vwap_v = ind.vwap(st.klines)
-    if vwap_v and st.mid:
-        score += 1 if st.mid > vwap_v else -1
-
-    es, el = ind.emas(st.klines)
-    if es is not None and el is not None:
-        score += 1 if es > el else -1
-
-    bw, aw = ind.walls(st.bids, st.asks)
-    score += min(len(bw), 2)
-    score -= min(len(aw), 2)
-
-    ha = ind.heikin_ashi(st.klines)
-    if len(ha) >= 3:
-        last3 = ha[-3:]
-        if all(c["green"] for c in last3):
-            score += 1
-        elif all(not c["green"] for c in last3):
-            score -= 1
-
-    if score >= TREND_THRESH:
-        return score, "BULLISH",  "green"
-    elif score <= -TREND_THRESH:
-        return score, "BEARISH",  "red"
-    else:
-        return score, "NEUTRAL",  "yellow"
+    s = snp.take(st)
+    return s.score, s.label, s.col
 
 
-def _header(st, coin, tf):
-    score, label, col = _score_trend(st)
+def _header(s, coin, tf, stale=False):
+    score, label, col = s.score, s.label, s.col
 
     parts = [
         (f"  {coin} ", "bold white on dark_blue"),
         (f" {tf} ", "bold white on dark_green"),
-        (f"  Price: {_p(st.mid)}  ", "bold white"),
+        (f"  Price: {_p(s.mid)}  ", "bold white"),
     ]
-    if st.pm_up is not None and st.pm_dn is not None:
-        parts.append((f"  PM ↑ {st.pm_up:.3f}  ↓ {st.pm_dn:.3f}  ", "cyan"))
+    if s.pm_up is not None and s.pm_dn is not None:
+        parts.append((f"  PM ↑ {s.pm_up:.3f}  ↓ {s.pm_dn:.3f}  ", "cyan"))
 
     parts.append((f" {label} ", f"bold white on {col}"))
     parts.append((f"  ({score:+d})", col))
 
+    if s.lag is not None:
+        lc = "red" if s.degraded else "dim"
+        parts.append((f"  lag {s.lag * 1000:.0f}ms", lc))
+        if s.degraded:
+            parts.append(("  DEGRADED", "bold red"))
+    if s.reconnects:
+        parts.append((f"  ⟳ {s.reconnects} (gap {s.gap:.1f}s)", "yellow"))
+    if stale:
+        parts.append(("  STALE – reconnecting", "bold red"))
+
     parts.append(("\n", ""))
     parts.append(("  Polymarket Crypto Assistant", "dim white"))
     parts.append(("  |  @SolSt1ne", "dim cyan"))
@@ -113,10 +119,10 @@ def _header(st, coin, tf):
     )
 
 
-def _ob_panel(st):
-    obi_v      = ind.obi(st.bids, st.asks, st.mid) if st.mid else 0.0
-    bw, aw     = ind.walls(st.bids, st.asks)
-    dep        = ind.depth_usd(st.bids, st.asks, st.mid) if st.mid else {}
+def _ob_panel(s):
+    obi_v      = s.obi
+    bw, aw     = s.bw, s.aw
+    dep        = s.depth
 
     if obi_v > config.OBI_THRESH:
         oc, os = "green", "BULLISH"
@@ -151,9 +157,9 @@ def _ob_panel(st):
     return Panel(t, title="ORDER BOOK", box=bx.ROUNDED, expand=True)
 
 
-def _flow_panel(st):
-    cvds = {s: ind.cvd(st.trades, s) for s in config.CVD_WINDOWS}
-    poc, vp = ind.vol_profile(st.klines)
+def _flow_panel(s):
+    cvds    = s.cvd
+    poc, vp = s.poc, s.vp
 
     t = Table(box=None, show_header=False, pad_edge=False, expand=True)
     t.add_column("label", style="dim", width=16)
@@ -167,13 +173,15 @@ def _flow_panel(st):
                   f"[{c}]{_p(v)}[/{c}]",
                   f"[{c}]{'↑' if v > 0 else '↓'}[/{c}]")
 
-    delta_v = ind.cvd(st.trades, config.DELTA_WINDOW)
+    delta_v = s.delta
     dc = _col(delta_v)
     t.add_row("Delta 1m",
               f"[{dc}]{_p(delta_v)}[/{dc}]",
               f"[{dc}]{'↑' if delta_v > 0 else '↓'}[/{dc}]")
 
     t.add_row("POC", f"[bold]{_p(poc)}[/bold]", "")
+    if s.vah > s.val:
+        t.add_row("Value area", f"{_p(s.val)} – {_p(s.vah)}", "")
 
     if vp:
         max_v  = max(v for _, v in vp) or 1
@@ -186,9 +194,11 @@ def _flow_panel(st):
         for i in range(end - 1, start - 1, -1):
             p, v = vp[i]
             bar_len = int(v / max_v * 14)
-            bar     = "█" * bar_len + "░" * (14 - bar_len)
+            buy_len = round(bar_len * s.vp_buy[i]) if i < len(s.vp_buy) else bar_len
+            bar     = (f"[green]{'█' * buy_len}[/green][red]{'█' * (bar_len - buy_len)}[/red]"
+                       + "░" * (14 - bar_len))
             is_poc  = i == poc_i
-            style   = "green bold" if is_poc else "dim"
+            style   = "bold" if is_poc else "dim"
             marker  = " ◄ POC" if is_poc else ""
             t.add_row(f"[{style}]{_p(p)}[/{style}]",
                       f"[{style}]{bar}{marker}[/{style}]", "")
@@ -196,12 +206,12 @@ def _flow_panel(st):
     return Panel(t, title="FLOW & VOLUME", box=bx.ROUNDED, expand=True)
 
 
-def _ta_panel(st):
-    rsi_v              = ind.rsi(st.klines)
-    macd_v, sig_v, hv  = ind.macd(st.klines)
-    vwap_v             = ind.vwap(st.klines)
-    ema_s, ema_l       = ind.emas(st.klines)
-    ha                 = ind.heikin_ashi(st.klines)
+def _ta_panel(s):
+    rsi_v              = s.rsi
+    macd_v, sig_v, hv  = s.macd, s.sig, s.hist
+    vwap_v             = s.vwap
+    ema_s, ema_l       = s.ema_s, s.ema_l
+    ha                 = s.ha
 
     t = Table(box=None, show_header=False, pad_edge=False, expand=True)
     t.add_column("label",  style="dim", width=16)
@@ -228,9 +238,9 @@ def _ta_panel(st):
     else:
         t.add_row("MACD", "[dim]—[/dim]", "")
 
-    if vwap_v and st.mid:
-        vc  = "green" if st.mid > vwap_v else "red"
-        vr  = "above" if st.mid > vwap_v else "below"
+    if vwap_v and s.mid:
+        vc  = "green" if s.mid > vwap_v else "red"
+        vr  = "above" if s.mid > vwap_v else "below"
         t.add_row("VWAP", _p(vwap_v), f"[{vc}]price {vr}[/{vc}]")
 
     if ema_s is not None and ema_l is not None:
@@ -250,53 +260,79 @@ def _ta_panel(st):
     return Panel(t, title="TECHNICAL", box=bx.ROUNDED, expand=True)
 
 
-def _signals_panel(st):
+def _pm_panel(s):
+    up, dn = s.pm_liq.get("up"), s.pm_liq.get("dn")
+
+    t = Table(box=None, show_header=True, header_style="dim", pad_edge=False, expand=True)
+    t.add_column("",     style="dim", width=16)
+    t.add_column("Up",                width=18)
+    t.add_column("Down",              width=18)
+
+    def row(label, fmt):
+        t.add_row(label, fmt(up) if up else "[dim]—[/dim]", fmt(dn) if dn else "[dim]—[/dim]")
+
+    def px(v):
+        return "—" if v is None else f"{v:.3f}"
+
+    row("Bid / Ask", lambda b: f"[green]{px(b['bid'])}[/green] / [red]{px(b['ask'])}[/red]")
+    row("Spread",    lambda b: "—" if b["spread"] is None else f"{b['spread'] * 100:.1f}¢")
+    row("Micro",     lambda b: px(b["micro"]))
+    row(f"Depth ±{config.PM_DEPTH_CENTS}¢", lambda b: f"{b['bid_depth']:,.0f} / {b['ask_depth']:,.0f}")
+
+    if s.pm_over is not None:
+        oc = "red" if s.pm_over > 0 else "green"
+        t.add_row("Overround", f"[{oc}]{s.pm_over * 100:+.1f}¢[/{oc}]", "")
+
+    return Panel(t, title="POLYMARKET BOOK", box=bx.ROUNDED, expand=True)
+
+
+def _signals(s) -> list[str]:
     sigs = []
 
-    obi_v = ind.obi(st.bids, st.asks, st.mid) if st.mid else 0.0
+    obi_v = s.obi
     if abs(obi_v) > config.OBI_THRESH:
         c = "green" if obi_v > 0 else "red"
         d = "BULLISH" if obi_v > 0 else "BEARISH"
         sigs.append(f"[{c}]OBI → {d} ({obi_v * 100:+.1f} %)[/{c}]")
 
-    cvd5 = ind.cvd(st.trades, 300)
+    cvd5 = s.cvd.get(300, 0.0)
     if cvd5 != 0:
         c = "green" if cvd5 > 0 else "red"
         d = "buy pressure" if cvd5 > 0 else "sell pressure"
         sigs.append(f"[{c}]CVD 5m → {d} ({_p(cvd5)})[/{c}]")
 
-    rsi_v = ind.rsi(st.klines)
+    rsi_v = s.rsi
     if rsi_v is not None:
         if rsi_v > config.RSI_OB:
             sigs.append(f"[red]RSI → overbought ({rsi_v:.0f})[/red]")
         elif rsi_v < config.RSI_OS:
             sigs.append(f"[green]RSI → oversold ({rsi_v:.0f})[/green]")
 
-    _, _, hv = ind.macd(st.klines)
+    hv = s.hist
     if hv is not None:
         c = "green" if hv > 0 else "red"
         d = "bullish" if hv > 0 else "bearish"
         sigs.append(f"[{c}]MACD hist → {d}[/{c}]")
 
-    vwap_v = ind.vwap(st.klines)
-    if vwap_v and st.mid:
-        c = "green" if st.mid > vwap_v else "red"
-        d = "above" if st.mid > vwap_v else "below"
+    vwap_v = s.vwap
+    if vwap_v and s.mid:
+        c = "green" if s.mid > vwap_v else "red"
+        d = "above" if s.mid > vwap_v else "below"
         sigs.append(f"[{c}]Price {d} VWAP[/{c}]")
 
-    es, el = ind.emas(st.klines)
+    es, el = s.ema_s, s.ema_l
     if es is not None and el is not None:
         c = "green" if es > el else "red"
         d = "golden" if es > el else "death"
         sigs.append(f"[{c}]EMA → {d} cross[/{c}]")
 
-    bw, aw = ind.walls(st.bids, st.asks)
+    bw, aw = s.bw, s.aw
     if bw:
         sigs.append(f"[green]BUY wall × {len(bw)} levels[/green]")
     if aw:
         sigs.append(f"[red]SELL wall × {len(aw)} levels[/red]")
 
-    ha = ind.heikin_ashi(st.klines)
+    ha = s.ha
     if len(ha) >= 3:
         last3 = ha[-3:]
         if all(c["green"] for c in last3):
@@ -307,26 +343,148 @@ def _signals_panel(st):
     if not sigs:
         sigs.append("[dim]No active signals[/dim]")
 
-    score, label, col = _score_trend(st)
+    score, label, col = s.score, s.label, s.col
     max_score = 10
     filled = int(min(abs(score), max_score) / max_score * 14)
     bar    = "█" * filled + "░" * (14 - filled)
     sigs.append("[dim]─────────────────────────────[/dim]")
     sigs.append(f"[{col} bold]TREND: {label}[/{col} bold]  "
                 f"[{col}]{bar}[/{col}]  [{col}]{score:+d}[/{col}]")
+    return sigs
+
+
+def _signals_panel(text):
+    return Panel(text, title="SIGNALS", box=bx.ROUNDED, expand=True)
+
+
+def _ms(secs):
+    return f"{secs * 1000:.1f}" if secs < 1 else f"{secs * 1000:,.0f}"
+
 
-    return Panel("\n".join(sigs), title="SIGNALS", box=bx.ROUNDED, expand=True)
+def _diag_panel():
+    t = Table(box=bx.SIMPLE_HEAD, expand=True, padding=(0, 1))
+    t.add_column("Feed",  style="bold")
+    t.add_column("Stage")
+    t.add_column("p50 ms", justify="right")
+    t.add_column("p99 ms", justify="right")
+    t.add_column("max ms", justify="right", style="dim")
+    t.add_column("n",      justify="right", style="dim")
+    for (feed, stage), h in sorted(metrics.hists.items()):
+        p99 = h.quantile(0.99)
+        c   = "red" if p99 > config.LAG_DEGRADED else "yellow" if p99 > 0.25 else "white"
+        t.add_row(feed, stage, _ms(h.quantile(0.5)), f"[{c}]{_ms(p99)}[/{c}]", _ms(h.max), f"{h.count:,}")
+    for name, m in sorted(supervisor.stats.items()):
+        state = "[green]up[/green]" if m.up else "[red]down[/red]"
+        t.add_row(name, state, "", "", f"{m.max_gap * 1000:,.0f}" if m.reconnects else "",
+                  f"⟳ {m.reconnects}" if m.reconnects else "")
+    return Panel(t, title="DIAGNOSTICS", box=bx.ROUNDED, expand=True)
 
 
 def render(st, coin, tf) -> "_Group":
-    header = _header(st, coin, tf)
+    return render_snapshot(snp.take(st), coin, tf)
+
+
+def render_snapshot(s, coin, tf, stale: bool = False) -> "_Group":
+    v = _views.get((coin, tf))
+    if v is None:
+        v = _views[(coin, tf)] = _View()
+
+    book_ver, trade_ver, sec, kline_ver, pm_ver = s.key
+    lag  = None if s.lag is None else round(s.lag * 1000)
+    sigs = "\n".join(_signals(s))
+
+    header = v.header.get((s.mid, s.pm_up, s.pm_dn, s.score, lag, s.degraded, s.reconnects, stale),
+                          s, coin, tf, stale)
+    ob     = v.ob.get(book_ver, s)
+    ta     = v.ta.get((kline_ver, bool(s.vwap and s.mid > s.vwap)), s)
+    flow   = v.flow.get((trade_ver, sec, kline_ver), s)
 
     grid = Table(box=None, pad_edge=False, show_header=False, expand=True)
     grid.add_column(ratio=1)
     grid.add_column(ratio=1)
-    grid.add_row(
-        Group(_ob_panel(st), _ta_panel(st)),
-        _flow_panel(st),
-    )
-
-    return _Group(header, grid, _signals_panel(st))
+    left = [ob, ta]
+    if any(s.pm_liq.values()):
+        left.append(v.pm.get(pm_ver, s))
+    grid.add_row(Group(*left), flow)
+
+    if config.DIAGNOSTICS:
+        # histograms fill in continuously; redrawn with the once-a-second tick
+        return _Group(header, grid, v.signals.get(sigs, sigs), v.diag.get(sec))
+    return _Group(header, grid, v.signals.get(sigs, sigs))
+
+
+def changed(st) -> tuple:
+    # what render() output depends on; the display loop redraws when it moves
+    lag = None if st.ingest is None else (round(st.ingest.lag * 1000), st.ingest.degraded)
+    return snp.version(st), lag
+
+
+def render_scan(markets) -> Panel:
+    return render_scan_snaps({k: snp.take(st) if st.mid else None for k, st in markets.items()})
+
+
+def _breadth(snaps) -> str:
+    b  = snp.breadth(snaps)
+    sc = _col(b["score"]) if b["score"] else "yellow"
+    out = (f"[green]{b['bull']} bullish[/green] · [red]{b['bear']} bearish[/red] · "
+           f"[yellow]{b['neutral']} neutral[/yellow] · mean [{sc}]{b['score']:+.1f}[/{sc}]")
+    for coin, label in b["aligned"].items():
+        col, arrow = ("green", "↑") if label == "BULLISH" else ("red", "↓")
+        out += f" · [{col}]{coin} {arrow} all TFs[/{col}]"
+    return out
+
+
+def render_scan_snaps(snaps) -> Panel:
+    # (coin, tf) → Snapshot, None while a market is still syncing
+    t = Table(box=bx.SIMPLE_HEAD, expand=True)
+    t.add_column("Market", style="bold")
+    t.add_column("Price",  justify="right")
+    t.add_column("PM ↑",   justify="right", style="cyan")
+    t.add_column("PM ↓",   justify="right", style="cyan")
+    t.add_column("RSI",    justify="right")
+    t.add_column("CVD 5m", justify="right")
+    t.add_column("Trend",  justify="center")
+    t.add_column("Score",  justify="right")
+
+    for (coin, tf), s in snaps.items():
+        if s is None:
+            t.add_row(f"{coin} {tf}", "[dim]syncing…[/dim]", "", "", "", "", "", "")
+            continue
+        cvd5 = s.cvd.get(300, 0.0)
+        cc   = _col(cvd5)
+        t.add_row(
+            f"{coin} {tf}",
+            _p(s.mid),
+            f"{s.pm_up:.3f}" if s.pm_up is not None else "—",
+            f"{s.pm_dn:.3f}" if s.pm_dn is not None else "—",
+            f"{s.rsi:.0f}" if s.rsi is not None else "—",
+            f"[{cc}]{_p(abs(cvd5))}[/{cc}]",
+            f"[bold white on {s.col}] {s.label} [/bold white on {s.col}]",
+            f"[{s.col}]{s.score:+d}[/{s.col}]",
+        )
+
+    return Panel(t, title="POLYMARKET CRYPTO ASSISTANT — SCANNER", subtitle=_breadth(snaps),
+                 box=bx.DOUBLE, expand=True)
+
+
+def render_backtest(results, days) -> Panel:
+    t = Table(box=bx.SIMPLE_HEAD, expand=True)
+    t.add_column("Market", style="bold")
+    t.add_column("Windows", justify="right")
+    t.add_column("Up rate", justify="right")
+    t.add_column("Calls",   justify="right")
+    t.add_column("Bull / Bear", justify="right")
+    t.add_column("Hit rate", justify="right")
+
+    for (coin, tf), r in results.items():
+        hc = "green" if r["hit_rate"] > 0.5 else "red" if r["calls"] else "dim"
+        t.add_row(
+            f"{coin} {tf}",
+            f"{r['windows']}",
+            f"{r['up_rate'] * 100:.1f} %",
+            f"{r['calls']}",
+            f"{r['bull']} / {r['bear']}",
+            f"[{hc}]{r['hit_rate'] * 100:.1f} %[/{hc}]" if r["calls"] else "[dim]—[/dim]",
+        )
+
+    return Panel(t, title=f"TREND SCORE BACKTEST — last {days} days", box=bx.DOUBLE, expand=True)
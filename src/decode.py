@@ -0,0 +1,65 @@
+import json
+import re
+
+
+# Websocket frame decoding.  The JSON backend is pluggable: orjson or
+# msgspec are used when installed, the stdlib otherwise, and use() can
+# switch at runtime (the decode benchmark compares them).
+#
+# Binance combined-stream frames always look like
+#     {"stream":"<name>","data":{...}}
+# so the stream name and the raw payload are sliced out without parsing,
+# and trade payloads go straight to typed fields without building a dict.
+
+
+def _backends():
+    out = {"json": json.loads}
+    try:
+        import orjson
+        out["orjson"] = orjson.loads
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        out["msgspec"] = msgspec.json.Decoder().decode
+    except ImportError:
+        pass
+    return out
+
+
+BACKENDS = _backends()
+BACKEND  = next(b for b in ("orjson", "msgspec", "json") if b in BACKENDS)
+loads    = BACKENDS[BACKEND]
+
+
+def use(name: str):
+    global BACKEND, loads
+    loads   = BACKENDS[name]
+    BACKEND = name
+
+
+_PREFIX = '{"stream":"'
+_DATA   = '","data":'
+
+
+def split(raw: str) -> tuple[str | None, str]:
+    if raw.startswith(_PREFIX):
+        end = raw.find('"', 11)
+        if raw.startswith(_DATA, end):
+            return raw[11:end], raw[end + 9:-1]
+    msg = loads(raw)
+    return msg.get("stream"), json.dumps(msg.get("data"))
+
+
+# "p" and "q" come before "T" and "m" in both @trade and @aggTrade payloads
+_TRADE = re.compile(r'"p":"([^"]+)","q":"([^"]+)".*?"T":(\d+),"m":(t|f)')
+
+
+def trade(body: str) -> tuple[float, float, float, bool]:
+    # (time s, price, qty, is_buy)
+    m = _TRADE.search(body)
+    if m is not None:
+        p, q, t, side = m.groups()
+        return int(t) / 1000.0, float(p), float(q), side == "f"
+    pay = loads(body)
+    return pay["T"] / 1000.0, float(pay["p"]), float(pay["q"]), not pay["m"]
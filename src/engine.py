@@ -0,0 +1,191 @@
+from collections import deque
+
+import config
+
+
+# Incremental counterparts of the kline indicators in indicators.py.
+# Every closed candle is pushed once (O(1)); the in-progress candle is
+# folded in on read without being committed, which gives provisional values.
+
+
+class _Ema:
+    # seeded with the SMA of the first `period` values, like _ema_series
+    __slots__ = ("period", "mult", "n", "acc", "value")
+
+    def __init__(self, period):
+        self.period = period
+        self.mult   = 2.0 / (period + 1)
+        self.n      = 0
+        self.acc    = 0.0
+        self.value  = None
+
+    def peek(self, v):
+        if self.n + 1 < self.period:
+            return None
+        if self.n + 1 == self.period:
+            return (self.acc + v) / self.period
+        return v * self.mult + self.value * (1 - self.mult)
+
+    def push(self, v):
+        val = self.peek(v)
+        if self.n < self.period:
+            self.acc += v
+        self.n    += 1
+        self.value = val
+        return val
+
+
+class _Rsi:
+    # Wilder smoothing, seeded with the plain average of the first `period` changes
+    __slots__ = ("period", "n", "prev", "ag", "al")
+
+    def __init__(self, period):
+        self.period = period
+        self.n      = 0
+        self.prev   = None
+        self.ag     = 0.0
+        self.al     = 0.0
+
+    def _step(self, c):
+        n  = self.period
+        ch = c - self.prev
+        up, dn = max(ch, 0), max(-ch, 0)
+        if self.n + 1 < n:
+            return self.ag + up, self.al + dn
+        if self.n + 1 == n:
+            return (self.ag + up) / n, (self.al + dn) / n
+        return (self.ag * (n - 1) + up) / n, (self.al * (n - 1) + dn) / n
+
+    @staticmethod
+    def _value(ag, al):
+        return 100.0 if al == 0 else 100.0 - 100.0 / (1 + ag / al)
+
+    def value(self):
+        return self._value(self.ag, self.al) if self.n >= self.period else None
+
+    def peek(self, c):
+        if self.prev is None or self.n + 1 < self.period:
+            return None
+        return self._value(*self._step(c))
+
+    def push(self, c):
+        if self.prev is not None:
+            self.ag, self.al = self._step(c)
+            self.n += 1
+        self.prev = c
+
+
+def _ha(k, prev):
+    c = (k["o"] + k["h"] + k["l"] + k["c"]) / 4
+    o = (k["o"] + k["c"]) / 2 if prev is None else (prev["o"] + prev["c"]) / 2
+    return {
+        "o": o,
+        "h": max(k["h"], o, c),
+        "l": min(k["l"], o, c),
+        "c": c,
+        "green": c >= o,
+    }
+
+
+class IndicatorEngine:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.last_t = None
+
+        self._rsi   = _Rsi(config.RSI_PERIOD)
+        self._fast  = _Ema(config.MACD_FAST)
+        self._slow  = _Ema(config.MACD_SLOW)
+        self._sig   = _Ema(config.MACD_SIG)
+        self._macd  = None
+        self._ema_s = _Ema(config.EMA_S)
+        self._ema_l = _Ema(config.EMA_L)
+
+        # VWAP runs over the same window as state.klines
+        self._vw    = deque()
+        self._pv    = 0.0
+        self._v     = 0.0
+
+        self._ha    = deque(maxlen=config.HA_COUNT)
+
+    def seed(self, klines):
+        self.reset()
+        for k in klines:
+            self.push(k)
+
+    def push(self, k):
+        c = k["c"]
+        self._rsi.push(c)
+
+        f = self._fast.push(c)
+        s = self._slow.push(c)
+        if f is not None and s is not None:
+            self._macd = f - s
+            self._sig.push(self._macd)
+
+        self._ema_s.push(c)
+        self._ema_l.push(c)
+
+        pv = (k["h"] + k["l"] + c) / 3 * k["v"]
+        self._vw.append((pv, k["v"]))
+        self._pv += pv
+        self._v  += k["v"]
+        if len(self._vw) > config.KLINE_MAX:
+            opv, ov = self._vw.popleft()
+            self._pv -= opv
+            self._v  -= ov
+
+        self._ha.append(_ha(k, self._ha[-1] if self._ha else None))
+        self.last_t = k["t"]
+
+    def _live(self, cur):
+        # ignore a "current" candle that has already been committed
+        if cur is None or (self.last_t is not None and cur["t"] <= self.last_t):
+            return None
+        return cur
+
+    def rsi(self, cur=None):
+        cur = self._live(cur)
+        return self._rsi.value() if cur is None else self._rsi.peek(cur["c"])
+
+    def macd(self, cur=None):
+        cur = self._live(cur)
+        if cur is None:
+            m, s = self._macd, self._sig.value
+        else:
+            f = self._fast.peek(cur["c"])
+            sl = self._slow.peek(cur["c"])
+            if f is None or sl is None:
+                return None, None, None
+            m = f - sl
+            s = self._sig.peek(m)
+        if m is None:
+            return None, None, None
+        h = (m - s) if s is not None else None
+        return m, s, h
+
+    def vwap(self, cur=None):
+        cur = self._live(cur)
+        pv, v = self._pv, self._v
+        if cur is not None:
+            pv += (cur["h"] + cur["l"] + cur["c"]) / 3 * cur["v"]
+            v  += cur["v"]
+            if len(self._vw) >= config.KLINE_MAX:
+                opv, ov = self._vw[0]
+                pv -= opv
+                v  -= ov
+        return pv / v if v else 0.0
+
+    def emas(self, cur=None):
+        cur = self._live(cur)
+        if cur is None:
+            return self._ema_s.value, self._ema_l.value
+        return self._ema_s.peek(cur["c"]), self._ema_l.peek(cur["c"])
+
+    def heikin_ashi(self, cur=None):
+        cur = self._live(cur)
+        ha = list(self._ha)
+        if cur is not None:
+            ha.append(_ha(cur, ha[-1] if ha else None))
+        return ha
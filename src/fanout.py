@@ -0,0 +1,197 @@
+import asyncio
+import json
+
+import config
+import snapshot as snp
+import supervisor
+from snapshot import Snapshot
+
+
+# Headless fan-out: one process runs the feeds and indicators, any number
+# of clients subscribe over a local TCP socket.  The wire format is one
+# JSON object per line:
+#
+#   client → server   {"markets": ["BTC 15m", …]}     (empty / missing = all)
+#   server → client   {"type": "hello",    "markets": [...]}
+#                     {"type": "snapshot", "market": m, "data": {...}}
+#                     {"type": "delta",    "market": m, "data": {changed fields}}
+#
+# The publisher never waits on a socket.  Each client has a pending dict
+# per market that new deltas merge into; its writer task sends whatever
+# is pending once the previous write drained, so a slow client simply
+# receives fewer, conflated updates.
+
+
+def _line(msg: dict) -> bytes:
+    return json.dumps(msg, separators=(",", ":")).encode() + b"\n"
+
+
+def _hello(line: bytes) -> set[str] | None:
+    # the client's subscription: market names, None for all
+    hello = json.loads(line or b"{}")
+    subs  = hello.get("markets") if isinstance(hello, dict) else ()
+    if not isinstance(subs, (list, type(None))) or not all(isinstance(m, str) for m in subs or ()):
+        raise ValueError(f"malformed hello: {line!r}")
+    return set(subs) if subs else None
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter, markets: set[str] | None):
+        self.writer  = writer
+        self.markets = markets
+        self.pending: dict[str, dict] = {}
+        self.full:    set[str] = set()
+        self.wake    = asyncio.Event()
+
+        self.sent      = 0
+        self.conflated = 0
+
+    def wants(self, market: str) -> bool:
+        return self.markets is None or market in self.markets
+
+    def offer(self, market: str, data: dict, full: bool = False):
+        pend = self.pending.get(market)
+        if pend is None or full:
+            self.pending[market] = dict(data)
+        else:
+            pend.update(data)
+            self.conflated += 1
+        if full:
+            self.full.add(market)
+        self.wake.set()
+
+    async def run(self):
+        w = self.writer
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            pending, self.pending = self.pending, {}
+            full,    self.full    = self.full, set()
+            for market, data in pending.items():
+                kind = "snapshot" if market in full else "delta"
+                w.write(_line({"type": kind, "market": market, "data": data}))
+                self.sent += 1
+            await w.drain()
+
+
+class Server:
+    def __init__(self, markets: dict, host: str = config.SERVE_HOST, port: int = config.SERVE_PORT,
+                 poll=None):
+        # poll() → [(market, snapshot dict)] for the markets that changed
+        # since the last call; by default `markets` holds States and their
+        # snapshots are taken here (the sharded coordinator reads its own)
+        self.markets = {f"{c} {tf}": st for (c, tf), st in markets.items()}
+        self.host    = host
+        self.port    = port
+        self.poll    = poll or self._poll_states
+        self.clients: set[_Client] = set()
+
+        self._last: dict[str, dict]  = {}
+        self._vers: dict[str, tuple] = {}
+
+    async def run(self):
+        srv = await asyncio.start_server(self._serve, self.host, self.port)
+        print(f"  [serve] listening on {self.host}:{self.port} – {len(self.markets)} markets")
+        async with srv:
+            await self.publish()
+
+    async def publish(self):
+        frame = 1 / config.MAX_FPS
+        while True:
+            for name, d in self.poll():
+                prev  = self._last.get(name, {})
+                delta = {k: v for k, v in d.items() if prev.get(k) != v}
+                self._last[name] = d
+                for c in self.clients:
+                    if c.wants(name):
+                        c.offer(name, delta)
+            await asyncio.sleep(frame)
+
+    def _poll_states(self) -> list[tuple[str, dict]]:
+        out = []
+        for name, st in self.markets.items():
+            if not st.mid:
+                continue
+            ver = snp.version(st)
+            if ver == self._vers.get(name):
+                continue
+            self._vers[name] = ver
+            out.append((name, snp.take(st).to_dict()))
+        return out
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername")
+        try:
+            subs = _hello(await asyncio.wait_for(reader.readline(), 5))
+        except (asyncio.TimeoutError, ValueError):
+            writer.close()
+            return
+
+        client = _Client(writer, subs)
+        writer.transport.set_write_buffer_limits(high=config.SERVE_BUFFER)
+        writer.write(_line({"type": "hello", "markets": [m for m in self.markets if client.wants(m)]}))
+        for name, d in self._last.items():
+            if client.wants(name):
+                client.offer(name, d, full=True)
+
+        self.clients.add(client)
+        print(f"  [serve] client {peer} – {len(self.clients)} connected")
+        task = asyncio.create_task(client.run())
+        try:
+            while await reader.readline():
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            task.cancel()
+            writer.close()
+            print(f"  [serve] client {peer} left – {client.sent} sent, {client.conflated} conflated")
+
+
+class Remote:
+    # client side: mirrors the server's snapshots for the subscribed markets
+    def __init__(self, host: str = config.SERVE_HOST, port: int = config.SERVE_PORT,
+                 markets: list[str] | None = None):
+        self.host    = host
+        self.port    = port
+        self.subs    = markets or []
+        self.markets: list[str] = []
+        self.snaps:   dict[str, Snapshot] = {}
+        self.seq     = 0
+        # False while reconnecting; the last snapshots are then stale
+        self.connected = False
+
+        self._data: dict[str, dict] = {}
+
+    async def run(self):
+        # reconnects with the feeds' backoff; every connect re-sends the
+        # subscription and the server answers with full snapshots
+        await supervisor.run("remote", self._connect)
+
+    async def _connect(self, ready):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(_line({"markets": self.subs}))
+            await writer.drain()
+            self.connected = True
+            await ready()
+            print(f"  [remote] connected to {self.host}:{self.port}")
+            while line := await reader.readline():
+                self.apply(json.loads(line))
+        finally:
+            self.connected = False
+            writer.close()
+
+    def apply(self, msg: dict):
+        kind = msg.get("type")
+        if kind == "hello":
+            self.markets = msg["markets"]
+            return
+        market = msg["market"]
+        if kind == "snapshot" or market not in self._data:
+            self._data[market] = msg["data"]
+        else:
+            self._data[market].update(msg["data"])
+        self.snaps[market] = Snapshot.from_dict(self._data[market])
+        self.seq += 1
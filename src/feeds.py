@@ -2,111 +2,328 @@ import asyncio
 import json
 import time
 
-import requests
 import websockets
 from datetime import datetime, timezone, timedelta
 
 import config
+import decode
+import metrics
+import rest
+import supervisor
+import tape
+from book import OrderBook
+from ingest import Ingest
+from pmbook import PmBook
+from candles import CandleSeries
+from resample import BASE_IV, iv_secs
+from trades import TradeBuffer
+from vprofile import VolumeProfile
 
 
-class State:
-    def __init__(self):
-        self.bids: list[tuple[float, float]] = []
-        self.asks: list[tuple[float, float]] = []
-        self.mid: float = 0.0
+# A State is one market's view.  Book and trades are per symbol and the
+# candle series per symbol/interval, so markets on the same symbol can
+# share them and every stream is decoded and applied exactly once.
 
-        self.trades: list[dict] = []
 
-        self.klines: list[dict] = []
-        self.cur_kline: dict | None = None
+class State:
+    def __init__(self, book: OrderBook | None = None, trades: TradeBuffer | None = None,
+                 series: CandleSeries | None = None, profile: VolumeProfile | None = None):
+        self.book   = OrderBook()    if book   is None else book
+        self.trades = TradeBuffer()  if trades is None else trades
+        self.series = CandleSeries() if series is None else series
+        if profile is None:
+            profile = VolumeProfile()
+            self.trades.profiles.append(profile)
+        self.profile = profile
 
         self.pm_up_id:  str | None = None
         self.pm_dn_id:  str | None = None
-        self.pm_up:     float | None = None
+        self.pm_up:     float | None = None     # best ask per token
         self.pm_dn:     float | None = None
+        self.pm_books:  dict[str, PmBook] = {}
+        # next window's (up, dn) tokens, subscribed ahead of the rollover
+        self.pm_next:   tuple[str, str] | None = None
+
+        # bumped on every PM update; the other slices are versioned by
+        # their (possibly shared) owners so readers can memoize per slice
+        self.pm_ver   = 0
+        self.snapshot = None
+
+        self.ingest: Ingest | None = None
+        # (feed, exchange t, recv t, applied t) of the newest PM event, with metrics on
+        self.pm_stamp = None
+
+    def pm_book(self, asset: str | None) -> PmBook:
+        book = self.pm_books.get(asset)
+        if book is None:
+            book = self.pm_books[asset] = PmBook()
+        return book
+
+    @property
+    def pm_up_book(self) -> PmBook:
+        return self.pm_book(self.pm_up_id)
+
+    @property
+    def pm_dn_book(self) -> PmBook:
+        return self.pm_book(self.pm_dn_id)
+
+    def pm_switch(self, up: str | None, dn: str | None):
+        # roll over to another window's tokens, keeping their (warm) books
+        self.pm_up_id, self.pm_dn_id = up, dn
+        if self.pm_next and tuple(self.pm_next) == (up, dn):
+            self.pm_next = None
+        keep = (up, dn, *(self.pm_next or ()))
+        self.pm_books = {a: b for a, b in self.pm_books.items() if a in keep}
+        self.pm_up = self.pm_up_book.best_ask if up else None
+        self.pm_dn = self.pm_dn_book.best_ask if dn else None
+        self.pm_ver += 1
+
+    @property
+    def bids(self) -> list[tuple[float, float]]:
+        return self.book.bids
+
+    @property
+    def asks(self) -> list[tuple[float, float]]:
+        return self.book.asks
+
+    @property
+    def mid(self) -> float:
+        return self.book.mid
+
+    @property
+    def klines(self) -> list[dict]:
+        return self.series.klines
+
+    @property
+    def cur_kline(self) -> dict | None:
+        return self.series.cur
+
+    @property
+    def engine(self):
+        return self.series.engine
+
+    @property
+    def book_ver(self) -> int:
+        return self.book.version
+
+    @property
+    def trade_ver(self) -> int:
+        return self.trades.head
+
+    @property
+    def kline_ver(self) -> int:
+        return self.series.version
+
+
+KLINE_PAGE = 1000          # Binance /klines max limit
+
+
+async def book_sync(symbol: str, book: OrderBook):
+    book.syncing = True
+    url = f"{config.BINANCE_REST}/depth"
+    try:
+        while not book.synced:
+            try:
+                snap = await rest.get_json(url, {"symbol": symbol, "limit": config.OB_DEPTH})
+            except Exception:
+                await asyncio.sleep(1)
+                continue
+            if tape.recorder is not None:
+                tape.recorder.write_json(tape.SRC_DEPTH, {"symbol": symbol, "snap": snap})
+            if book.load(snap):
+                print(f"  [Binance OB] {symbol} synced @ {book.last_id}")
+            else:
+                # snapshot older than the buffered diffs – fetch again
+                await asyncio.sleep(0.5)
+    finally:
+        book.syncing = False
+
+
+# Route handlers take the raw payload text of their stream.
+
+def _on_trade(trades: TradeBuffer):
+    push, parse = trades.push, decode.trade
+
+    def handle(body):
+        push(*parse(body))
+    return handle
+
+
+def _on_kline(series: list[CandleSeries]):
+    def handle(body):
+        k = decode.loads(body)["k"]
+        candle = {
+            "t": k["t"] / 1000.0,
+            "o": float(k["o"]), "h": float(k["h"]),
+            "l": float(k["l"]), "c": float(k["c"]),
+            "v": float(k["v"]),
+        }
+        for ser in series:
+            ser.ingest(candle, k["x"])
+    return handle
 
 
-OB_POLL_INTERVAL = 2
-
-
-async def ob_poller(symbol: str, state: State):
-    url = f"{config.BINANCE_REST}/depth"
-    print(f"  [Binance OB] polling {symbol} every {OB_POLL_INTERVAL}s")
-    while True:
-        try:
-            resp = requests.get(url, params={"symbol": symbol, "limit": 20}, timeout=3).json()
-            state.bids = [(float(p), float(q)) for p, q in resp["bids"]]
-            state.asks = [(float(p), float(q)) for p, q in resp["asks"]]
-            if state.bids and state.asks:
-                state.mid = (state.bids[0][0] + state.asks[0][0]) / 2
-        except Exception:
-            pass
-        await asyncio.sleep(OB_POLL_INTERVAL)
+def _on_depth(symbol: str, book: OrderBook):
+    def handle(body):
+        # degraded ingestion hands over already-merged diffs
+        ev = body if isinstance(body, dict) else decode.loads(body)
+        if not book.on_diff(ev) and not book.syncing:
+            book.syncing = True
+            asyncio.create_task(book_sync(symbol, book))
+    return handle
 
 
-async def binance_feed(symbol: str, kline_iv: str, state: State):
+def symbol_routes(symbol: str, book: OrderBook, trades: TradeBuffer,
+                  series: list[CandleSeries]) -> dict:
+    # every candle series of the symbol is resampled from the one 1m stream
     sym = symbol.lower()
-    streams = "/".join([
-        f"{sym}@trade",
-        f"{sym}@kline_{kline_iv}",
-    ])
-    url = f"{config.BINANCE_WS}?streams={streams}"
-
-    async with websockets.connect(url, ping_interval=20) as ws:
-        print(f"  [Binance WS] connected – {symbol}")
-        while True:
-            data   = json.loads(await ws.recv())
-            stream = data.get("stream", "")
-            pay    = data["data"]
-
-            if "@trade" in stream:
-                state.trades.append({
-                    "t":      pay["T"] / 1000.0,
-                    "price":  float(pay["p"]),
-                    "qty":    float(pay["q"]),
-                    "is_buy": not pay["m"],
-                })
-                if len(state.trades) > 5000:
-                    cut = time.time() - config.TRADE_TTL
-                    state.trades = [t for t in state.trades if t["t"] >= cut]
-
-            elif "@kline" in stream:
-                k = pay["k"]
-                candle = {
-                    "t": k["t"] / 1000.0,
-                    "o": float(k["o"]), "h": float(k["h"]),
-                    "l": float(k["l"]), "c": float(k["c"]),
-                    "v": float(k["v"]),
-                }
-                state.cur_kline = candle
-                if k["x"]:
-                    state.klines.append(candle)
-                    state.klines = state.klines[-config.KLINE_MAX:]
-
-
-async def bootstrap(symbol: str, interval: str, state: State):
-    resp = requests.get(
-        f"{config.BINANCE_REST}/klines",
-        params={"symbol": symbol, "interval": interval, "limit": config.KLINE_BOOT},
-    ).json()
-    state.klines = [
-        {
-            "t": r[0] / 1e3,
-            "o": float(r[1]), "h": float(r[2]),
-            "l": float(r[3]), "c": float(r[4]),
-            "v": float(r[5]),
-        }
-        for r in resp
-    ]
-    print(f"  [Binance] loaded {len(state.klines)} historical candles")
+    trade = "aggTrade" if config.USE_AGG_TRADE else "trade"
+    return {
+        f"{sym}@{trade}":          _on_trade(trades),
+        f"{sym}@depth@100ms":      _on_depth(symbol, book),
+        f"{sym}@kline_{BASE_IV}":  _on_kline(series),
+    }
+
+
+async def binance_stream(routes: dict, label: str = "", ingest: Ingest | None = None, ready=None):
+    url = f"{config.BINANCE_WS}?streams={'/'.join(routes)}"
+
+    async with websockets.connect(url, ping_interval=20, max_size=None) as ws:
+        print(f"  [Binance WS] connected – {label or len(routes)}")
+        await (ingest or Ingest()).run(ws, routes, ready)
+
+
+async def binance_feed(symbol: str, state: State):
+    routes = symbol_routes(symbol, state.book, state.trades, [state.series])
+    if state.ingest is None:
+        state.ingest = Ingest()
+    await supervisor.run(
+        f"Binance {symbol}",
+        lambda ready: binance_stream(routes, symbol, state.ingest, ready),
+        lambda: resume(symbol, state.book, state.trades, [state.series]),
+    )
+
+
+# ── reconnect backfill ─────────────────────────────────────────
+async def resume(symbol: str, book: OrderBook, trades: TradeBuffer, series: list[CandleSeries]):
+    # run once the socket is back, before queued live frames are applied:
+    # the book resyncs from a snapshot, klines and trades are filled from REST
+    book.synced = False
+    end = time.time()
+    klines, rows = await asyncio.gather(
+        backfill_klines(symbol, series, end),
+        backfill_trades(symbol, trades, end),
+    )
+    if not klines and not rows:
+        return
+    if tape.recorder is not None:
+        tape.recorder.write_json(tape.SRC_BACKFILL, {"symbol": symbol, "klines": klines, "trades": rows})
+    apply_backfill(trades, series, klines, rows, end)
+    print(f"  [Binance] {symbol} backfilled {len(klines)} klines, {len(rows)} trades")
+
+
+async def backfill_klines(symbol: str, series: list[CandleSeries], end: float) -> list[dict]:
+    # 1m candles after the newest closed one we have, up to the open one
+    last = max((ser.base_t for ser in series if ser.base_t is not None), default=None)
+    if last is None:
+        return []
+    base  = iv_secs(BASE_IV)
+    need  = max((config.KLINE_BOOT + 1) * ser.secs // base for ser in series)
+    now   = end // base * base
+    count = int(min(need, (now - last) // base))
+    if count <= 0:
+        return []
+    return await fetch_klines(symbol, BASE_IV, int((now - (count - 1) * base) * 1000), count)
+
+
+async def backfill_trades(symbol: str, trades: TradeBuffer, end: float) -> list[list]:
+    # /aggTrades after the newest trade we have (at most TRADE_TTL back)
+    last = trades.last_t
+    if last is None:
+        return []
+    start  = max(last, end - trades.ttl)
+    end_ms = int(end * 1000)
+    url    = f"{config.BINANCE_REST}/aggTrades"
+    params = {"symbol": symbol, "startTime": int(start * 1000) + 1, "endTime": end_ms, "limit": 1000}
+    rows   = []
+    while True:
+        page = await rest.get_json(url, params)
+        rows += [[r["T"] / 1000, float(r["p"]), float(r["q"]), not r["m"]]
+                 for r in page if r["T"] <= end_ms]
+        if len(page) < 1000 or page[-1]["T"] > end_ms:
+            return rows
+        params = {"symbol": symbol, "fromId": page[-1]["a"] + 1, "limit": 1000}
+
+
+def apply_backfill(trades: TradeBuffer, series: list[CandleSeries],
+                   klines: list[dict], rows: list[list], end: float):
+    base = iv_secs(BASE_IV)
+    for ser in series:
+        if klines and ser.base_t is not None and klines[0]["t"] > ser.base_t + base:
+            # the outage outlasted backfill_klines' window: start a new
+            # segment rather than join candles across the hole
+            ser.seed_base(klines)
+            continue
+        for k in klines:
+            ser.ingest(k, k["t"] + base <= end)
+    for t, p, q, buy in rows:
+        trades.push(t, p, q, buy)
+    if rows:
+        trades.floor = rows[-1][0]
+
+
+def _kline_row(r) -> dict:
+    return {
+        "t": r[0] / 1e3,
+        "o": float(r[1]), "h": float(r[2]),
+        "l": float(r[3]), "c": float(r[4]),
+        "v": float(r[5]),
+    }
+
+
+async def fetch_klines(symbol: str, interval: str, start_ms: int, count: int) -> list[dict]:
+    # `count` candles from `start_ms`, paged concurrently through the REST pool
+    step  = iv_secs(interval) * 1000
+    pages = await asyncio.gather(*(
+        rest.get_json(
+            f"{config.BINANCE_REST}/klines",
+            {"symbol": symbol, "interval": interval,
+             "startTime": start_ms + off * step, "limit": min(KLINE_PAGE, count - off)},
+        )
+        for off in range(0, count, KLINE_PAGE)
+    ))
+    rows = {r[0]: r for page in pages for r in page}
+    return [_kline_row(rows[t]) for t in sorted(rows)]
+
+
+async def bootstrap(symbol: str, series: list[CandleSeries], trades: TradeBuffer | None = None):
+    # one 1m history deep enough for the coarsest series, resampled locally
+    base  = iv_secs(BASE_IV)
+    need  = max((config.KLINE_BOOT + 1) * ser.secs // base for ser in series)
+    now   = int(time.time()) // base * base
+    start = (now - (need - 1) * base) * 1000
+
+    klines = await fetch_klines(symbol, BASE_IV, start, need)
+    if tape.recorder is not None:
+        tape.recorder.write_json(tape.SRC_KLINES, {"symbol": symbol, "klines": klines})
+    seed(klines, series, trades)
+    print(f"  [Binance] loaded {len(klines)} {symbol} {BASE_IV} candles → "
+          f"{', '.join(ser.interval for ser in series)}")
+
+
+def seed(klines: list[dict], series: list[CandleSeries], trades: TradeBuffer | None = None):
+    for ser in series:
+        ser.seed_base(klines)
+    # volume profiles start from the closed candles until trades take over
+    for vp in trades.profiles if trades is not None else ():
+        vp.seed(klines[:-1])
 
 
 _MONTHS = ["", "january", "february", "march", "april", "may", "june",
            "july", "august", "september", "october", "november", "december"]
 
 
-def _et_now() -> datetime:
-    utc = datetime.now(timezone.utc)
+def et_offset(utc: datetime) -> timedelta:
     year = utc.year
 
     mar1_dow  = datetime(year, 3, 1).weekday()
@@ -117,8 +334,7 @@ def _et_now() -> datetime:
     nov_sun  = 1 + (6 - nov1_dow) % 7
     dst_end  = datetime(year, 11, nov_sun, 6, 0, 0, tzinfo=timezone.utc)
 
-    offset = timedelta(hours=-4) if dst_start <= utc < dst_end else timedelta(hours=-5)
-    return utc + offset
+    return timedelta(hours=-4) if dst_start <= utc < dst_end else timedelta(hours=-5)
 
 
 def _to_12h(hour24: int) -> str:
@@ -131,10 +347,33 @@ def _to_12h(hour24: int) -> str:
     return f"{hour24 - 12}pm"
 
 
-def _build_slug(coin: str, tf: str) -> str | None:
-    now_utc = datetime.now(timezone.utc)
-    now_ts  = int(now_utc.timestamp())
-    et      = _et_now()
+def window_bounds(tf: str, at: float) -> tuple[float, float]:
+    # [start, end) of the Polymarket window of `tf` that contains `at`
+    if tf == "15m":
+        start = at // 900 * 900
+        return start, start + 900
+    if tf == "1h":
+        start = at // 3600 * 3600          # ET is a whole-hour offset
+        return start, start + 3600
+    if tf == "4h":
+        start = (at - 3600) // 14400 * 14400 + 3600
+        return start, start + 14400
+
+    # daily: noon ET → noon ET
+    utc  = datetime.fromtimestamp(at, timezone.utc)
+    et   = utc + et_offset(utc)
+    noon = et.replace(hour=12, minute=0, second=0, microsecond=0)
+    if et >= noon:
+        noon += timedelta(days=1)
+    guess = noon - et_offset(utc)                # in case DST flips before noon
+    end   = (noon - et_offset(guess)).timestamp()
+    return end - 86400, end
+
+
+def _build_slug(coin: str, tf: str, at: float | None = None) -> str | None:
+    now_ts  = int(time.time() if at is None else at)
+    now_utc = datetime.fromtimestamp(now_ts, timezone.utc)
+    et      = now_utc + et_offset(now_utc)
 
     if tf == "15m":
         ts = (now_ts // 900) * 900
@@ -157,51 +396,142 @@ def _build_slug(coin: str, tf: str) -> str | None:
     return None
 
 
-def fetch_pm_tokens(coin: str, tf: str) -> tuple:
-    slug = _build_slug(coin, tf)
-    if slug is None:
-        return None, None
+async def fetch_pm_batch(slugs: list[str]) -> dict[str, tuple[str, str]]:
+    # one Gamma request for many slugs → {slug: (up token, down token)}
+    if not slugs:
+        return {}
     try:
-        data = requests.get(config.PM_GAMMA, params={"slug": slug, "limit": 1}).json()
-        if not data or data[0].get("ticker") != slug:
-            print(f"  [PM] no active market for slug: {slug}")
-            return None, None
-        ids = json.loads(data[0]["markets"][0]["clobTokenIds"])
-        return ids[0], ids[1]
+        data = await rest.get_json(config.PM_GAMMA, {"slug": slugs, "limit": len(slugs)})
     except Exception as e:
-        print(f"  [PM] token fetch failed ({slug}): {e}")
+        print(f"  [PM] token fetch failed ({len(slugs)} slugs): {e}")
+        return {}
+    out = {}
+    for ev in data or []:
+        slug = ev.get("slug") or ev.get("ticker")
+        if slug not in slugs or not ev.get("markets"):
+            continue
+        ids = json.loads(ev["markets"][0]["clobTokenIds"])
+        out[slug] = (ids[0], ids[1])
+    return out
+
+
+def pm_assets(states) -> dict[str, State]:
+    # asset id → owning State, for the current and the prefetched window
+    assets = {}
+    for st in states:
+        for a in (st.pm_up_id, st.pm_dn_id, *(st.pm_next or ())):
+            if a:
+                assets[a] = st
+    return assets
+
+
+async def pm_stream(markets: dict[str, State], outbox: asyncio.Queue | None = None, ready=None):
+    # one socket for every token; `markets` maps asset id → owning State and
+    # may change while connected, with (un)subscribe messages sent via outbox.
+    # Every (re)subscribe is answered with full books, so no backfill.
+    async with websockets.connect(config.PM_WS, ping_interval=20) as ws:
+        await ws.send(json.dumps({"assets_ids": list(markets), "type": "market"}))
+        print(f"  [PM] connected – {len(markets)} tokens")
+        if ready is not None:
+            await ready()
+        sender = asyncio.create_task(_pm_send(ws, outbox)) if outbox is not None else None
+        try:
+            while True:
+                frame = await ws.recv()
+                recv  = time.time()
+                if tape.recorder is not None:
+                    tape.recorder.write(tape.SRC_PM, frame, recv)
+                stale = pm_frame(frame, markets, recv)
+                if stale:
+                    # a fresh `book` for each diverged token follows the resubscribe
+                    await ws.send(json.dumps({"assets_ids": stale, "operation": "subscribe"}))
+        finally:
+            if sender is not None:
+                sender.cancel()
+
+
+async def _pm_send(ws, outbox: asyncio.Queue):
+    while True:
+        await ws.send(json.dumps(await outbox.get()))
+
+
+def pm_frame(frame: str, markets: dict[str, State], recv: float | None = None) -> list[str]:
+    # applies one market-channel frame; returns the tokens that need a resync
+    raw   = decode.loads(frame)
+    evs   = raw if isinstance(raw, list) else [raw]
+    stale = []
+    for ev in evs:
+        if not isinstance(ev, dict):
+            continue
+        kind = ev.get("event_type")
+        if kind == "book" or (kind is None and "bids" in ev):
+            _pm_book(ev, markets)
+        elif kind == "price_change":
+            for ch in ev.get("price_changes", []):
+                if not _pm_change(ch, markets):
+                    stale.append(ch["asset_id"])
+    if metrics.on and recv is not None:
+        _pm_observe(evs, markets, recv)
+    return list(dict.fromkeys(stale))
+
+
+def _pm_observe(evs: list, markets: dict[str, State], recv: float):
+    now = time.time()
+    metrics.record("pm", "apply", now - recv)
+    for ev in evs:
+        if not isinstance(ev, dict):
+            continue
+        ts   = ev.get("timestamp")
+        exch = int(ts) / 1000 if ts else None
+        if exch is not None:
+            metrics.record("pm", "exchange", recv - exch)
+        assets = [ev.get("asset_id")] + [ch.get("asset_id") for ch in ev.get("price_changes", ())]
+        for a in assets:
+            st = markets.get(a)
+            if st is not None:
+                st.pm_stamp = ("pm", exch, recv, now)
+
+
+def _pm_side(asset, markets):
+    state = markets.get(asset)
+    if state is None:
         return None, None
+    return state, state.pm_book(asset)
 
 
-async def pm_feed(state: State):
-    if not state.pm_up_id:
-        print("  [PM] no tokens for this coin/timeframe – skipped")
+def _pm_book(ev, markets):
+    state, book = _pm_side(ev.get("asset_id"), markets)
+    if state is None:
+        return
+    book.load_pm(ev)
+    _pm_set(ev["asset_id"], book.best_ask, markets)
+
+
+def _pm_change(ch, markets) -> bool:
+    state, book = _pm_side(ch.get("asset_id"), markets)
+    if state is None:
+        return True
+    ok = book.change(ch)
+    # an unsynced book still shows the server's best ask until the resync;
+    # a change without one keeps the last known price
+    if book.synced:
+        price = book.best_ask
+    elif ch.get("best_ask"):
+        price = float(ch["best_ask"])
+    else:
+        return ok
+    _pm_set(ch["asset_id"], price, markets)
+    return ok
+
+
+def _pm_set(asset, price, markets):
+    state = markets.get(asset)
+    if state is None:
         return
-
-    assets = [state.pm_up_id, state.pm_dn_id]
-    async with websockets.connect(config.PM_WS, ping_interval=20) as ws:
-        await ws.send(json.dumps({"assets_ids": assets, "type": "market"}))
-        print("  [PM] connected")
-        while True:
-            raw = json.loads(await ws.recv())
-
-            if isinstance(raw, list):
-                for entry in raw:
-                    _pm_apply(entry.get("asset_id"), entry.get("asks", []), state)
-
-            elif isinstance(raw, dict) and raw.get("event_type") == "price_change":
-                for ch in raw.get("price_changes", []):
-                    if ch.get("best_ask"):
-                        _pm_set(ch["asset_id"], float(ch["best_ask"]), state)
-
-
-def _pm_apply(asset, asks, state):
-    if asks:
-        _pm_set(asset, min(float(a["price"]) for a in asks), state)
-
-
-def _pm_set(asset, price, state):
     if asset == state.pm_up_id:
         state.pm_up = price
     elif asset == state.pm_dn_id:
         state.pm_dn = price
+    else:
+        return                      # next window's token, still warming up
+    state.pm_ver += 1
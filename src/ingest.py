@@ -0,0 +1,158 @@
+import asyncio
+import re
+import time
+
+import config
+import decode
+import metrics
+import profiler
+import tape
+
+
+# Batched ingestion for a Binance combined stream.  A reader task only
+# timestamps frames and queues them; the apply task drains everything that
+# is waiting (up to INGEST_BATCH) and runs the route handlers in one pass.
+# A full queue makes the reader wait, which pushes back on the socket.
+#
+# Lag is measured on every batch as local time minus the exchange event
+# time `E` of its newest frame.  Past LAG_DEGRADED the stage goes degraded:
+# non-final kline updates collapse to the latest per stream and contiguous
+# depth diffs merge into one, so we catch up without losing book sync.
+
+_E      = re.compile(r'"E":(\d+)')
+_STREAM = re.compile(r'"stream":"[^@"]*@([A-Za-z]+)')
+
+
+class Ingest:
+    def __init__(self, batch: int = config.INGEST_BATCH, queue: int = config.INGEST_QUEUE,
+                 lag_max: float = config.LAG_DEGRADED):
+        self.batch   = batch
+        self.lag_max = lag_max
+        self.q: asyncio.Queue = asyncio.Queue(maxsize=queue)
+
+        self.lag       = 0.0      # exchange event → applied, newest frame (s)
+        self.wait      = 0.0      # received → applied, oldest frame (s)
+        self.depth     = 0        # frames still queued after the last drain
+        self.degraded  = False
+        self.frames    = 0
+        self.batches   = 0
+        self.coalesced = 0
+        # (feed, exchange t, recv t, applied t) of the newest frame, with metrics on
+        self.stamp     = None
+
+    async def run(self, ws, routes: dict, ready=None):
+        # frames queue from the first recv; applying them waits for ready()
+        # (the reconnect backfill) so history lands before live data
+        while not self.q.empty():
+            self.q.get_nowait()
+
+        async def start():
+            if ready is not None:
+                await ready()
+            await self._pump(routes)
+
+        async def read():
+            while True:
+                raw = await ws.recv()
+                ts  = time.time()
+                if tape.recorder is not None:
+                    tape.recorder.write(tape.SRC_BINANCE, raw, ts)
+                await self.q.put((ts, raw))
+
+        # whichever side fails first ends the connection with its error, so
+        # a raising handler reaches the supervisor instead of leaving the
+        # reader blocked on a full queue
+        reader = asyncio.create_task(read())
+        pump   = asyncio.create_task(start())
+        profiler.track(routes)
+        try:
+            done, _ = await asyncio.wait((reader, pump), return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            reader.cancel()
+            pump.cancel()
+            profiler.untrack(routes)
+
+    async def _pump(self, routes: dict):
+        q = self.q
+        while True:
+            batch = [await q.get()]
+            while len(batch) < self.batch and not q.empty():
+                batch.append(q.get_nowait())
+            self.depth = q.qsize()
+            self.apply(batch, routes)
+            # a queue that never empties would otherwise starve the loop
+            await asyncio.sleep(0)
+
+    def apply(self, batch: list[tuple[float, str]], routes: dict):
+        t0 = time.time()
+        frames = [decode.split(raw) for _, raw in batch]
+        if self.degraded:
+            n = len(frames)
+            frames = _coalesce(frames)
+            self.coalesced += n - len(frames)
+
+        for stream, body in frames:
+            handler = routes.get(stream)
+            if handler is not None:
+                handler(body)
+
+        now = time.time()
+        self.wait = now - batch[0][0]
+        m = _E.search(batch[-1][1])
+        if m is not None:
+            self.lag = now - int(m.group(1)) / 1000
+        self.degraded = max(self.lag, self.wait) > self.lag_max
+        self.frames  += len(batch)
+        self.batches += 1
+        if metrics.on:
+            self._observe(batch, t0, now)
+
+    def _observe(self, batch: list[tuple[float, str]], t0: float, now: float):
+        metrics.record("binance", "apply", now - t0)
+        for ts, raw in batch:
+            s = _STREAM.search(raw)
+            e = _E.search(raw)
+            feed = "binance." + (s.group(1) if s else "?")
+            exch = int(e.group(1)) / 1000 if e else None
+            metrics.record(feed, "queue", now - ts)
+            if exch is not None:
+                metrics.record(feed, "exchange", ts - exch)
+        self.stamp = (feed, exch, ts, now)
+
+
+def _coalesce(frames):
+    # drops the frames a later frame of the same stream supersedes; the
+    # rest keep their places, so the order across streams is the exchange's
+    out   = []
+    kline = {}           # stream → index of its latest non-final update
+    depth = {}           # stream → index of its merged diff
+    for stream, body in frames:
+        if "@kline" in stream:
+            i = kline.pop(stream, None)
+            if i is not None:
+                out[i] = None
+            if not decode.loads(body)["k"]["x"]:
+                kline[stream] = len(out)
+        elif "@depth" in stream:
+            ev   = decode.loads(body)
+            i    = depth.get(stream)
+            last = out[i][1] if i is not None else None
+            if last is not None and ev["U"] <= last["u"] + 1:
+                # the merged diff moves up to its newest part
+                out[i] = None
+                last["u"] = ev["u"]
+                last["b"].update(ev["b"])
+                last["a"].update(ev["a"])
+                body = last
+            else:
+                body = {"U": ev["U"], "u": ev["u"], "b": dict(ev["b"]), "a": dict(ev["a"])}
+            depth[stream] = len(out)
+        out.append((stream, body))
+
+    out = [f for f in out if f is not None]
+    for stream, body in out:
+        if isinstance(body, dict):
+            body["b"], body["a"] = list(body["b"].items()), list(body["a"].items())
+    return out
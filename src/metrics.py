@@ -0,0 +1,169 @@
+import asyncio
+import time
+
+import config
+import supervisor
+
+
+# Pipeline latency, per feed and stage, in fixed-size HDR-style histograms.
+# Stages, in pipeline order:
+#
+#   exchange   exchange event time (Binance `E`, PM `timestamp`) → socket recv
+#   queue      socket recv → handler applied                   (per frame)
+#   apply      handler time                                    (per batch / frame)
+#   compute    newest applied event → snapshot computed
+#   render     snapshot computed → frame drawn
+#   e2e        exchange event time → frame drawn
+#
+# plus the time each snapshot slice took under feed "indicators".  All of
+# it is off unless `on` is set (--metrics / --diag); the hot paths only
+# test that flag.
+
+on = False
+
+_SUB  = config.HIST_SUB_BITS
+_TOP  = 36                    # values are µs, clamped below 2**36 (~19 h)
+_SIZE = (_TOP - _SUB + 1) << _SUB
+
+
+class Histogram:
+    # log-linear buckets: exact below 2**_SUB µs, above that every power of
+    # two is split into 2**_SUB buckets (≈ 2**-_SUB relative error)
+    def __init__(self):
+        self.counts = [0] * _SIZE
+        self.count  = 0
+        self.sum    = 0.0
+        self.max    = 0.0
+
+    def record(self, secs: float):
+        if secs < 0:
+            secs = 0.0
+        v = min(int(secs * 1e6), (1 << _TOP) - 1)
+        if v < 1 << _SUB:
+            i = v
+        else:
+            k = v.bit_length() - _SUB - 1
+            i = ((k + 1) << _SUB) + (v >> k) - (1 << _SUB)
+        self.counts[i] += 1
+        self.count     += 1
+        self.sum       += secs
+        if secs > self.max:
+            self.max = secs
+
+    @staticmethod
+    def _value(i: int) -> float:
+        # midpoint of bucket i, in seconds
+        if i < 1 << _SUB:
+            return i / 1e6
+        k   = (i >> _SUB) - 1
+        low = ((1 << _SUB) + (i & ((1 << _SUB) - 1))) << k
+        return (low + ((1 << k) - 1) / 2) / 1e6
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self._value(i), self.max)
+        return self.max
+
+
+# (feed, stage) → histogram
+hists: dict[tuple[str, str], Histogram] = {}
+
+
+def record(feed: str, stage: str, secs: float):
+    h = hists.get((feed, stage))
+    if h is None:
+        h = hists[(feed, stage)] = Histogram()
+    h.record(secs)
+
+
+# ── end-to-end stamps ─────────────────────────────────────────
+# a stamp is (feed, exchange time, recv time, applied time) of the newest
+# event a State has applied; snapshots extend it with their compute time
+
+def computed(st) -> tuple | None:
+    stamps = [x for x in (st.ingest.stamp if st.ingest is not None else None, st.pm_stamp) if x]
+    if not stamps:
+        return None
+    feed, exch, recv, applied = max(stamps, key=lambda x: x[3])
+    now = time.time()
+    record(feed, "compute", now - applied)
+    return feed, exch, recv, applied, now
+
+
+_drawn = None
+
+
+def rendered(stamp, started: float):
+    # after a frame went out; each stamp is counted once however often it's drawn
+    global _drawn
+    now = time.time()
+    record("dashboard", "frame", now - started)
+    if not stamp or stamp == _drawn:
+        return
+    _drawn = stamp
+    feed, exch, _, _, comp = stamp
+    record(feed, "render", now - comp)
+    if exch:
+        record(feed, "e2e", now - exch)
+
+
+# ── Prometheus ────────────────────────────────────────────────
+_Q = (0.5, 0.9, 0.99, 0.999)
+
+
+def _labels(**kw) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in kw.items()) + "}"
+
+
+def prometheus() -> str:
+    out = [
+        "# HELP assistant_latency_seconds Pipeline stage latency.",
+        "# TYPE assistant_latency_seconds summary",
+    ]
+    for (feed, stage), h in sorted(hists.items()):
+        for q in _Q:
+            out.append(f"assistant_latency_seconds{_labels(feed=feed, stage=stage, quantile=q)} {h.quantile(q):.6f}")
+        out.append(f"assistant_latency_seconds_sum{_labels(feed=feed, stage=stage)} {h.sum:.6f}")
+        out.append(f"assistant_latency_seconds_count{_labels(feed=feed, stage=stage)} {h.count}")
+
+    feeds = sorted(supervisor.stats.items())
+    for name, kind, help_, get in (
+        ("assistant_feed_up",                 "gauge",   "Feed connected.",               lambda m: int(m.up)),
+        ("assistant_feed_reconnects_total",   "counter", "Reconnects after a drop.",      lambda m: m.reconnects),
+        ("assistant_feed_last_gap_seconds",   "gauge",   "Length of the last outage.",    lambda m: m.last_gap),
+        ("assistant_feed_gap_seconds_total",  "counter", "Time spent disconnected.",      lambda m: m.total_gap),
+    ):
+        out += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"]
+        out += [f"{name}{_labels(feed=n)} {get(m)}" for n, m in feeds]
+    return "\n".join(out) + "\n"
+
+
+async def serve(host: str = config.METRICS_HOST, port: int = config.METRICS_PORT):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            req = await asyncio.wait_for(reader.readline(), 5)
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            path = req.split()[1] if len(req.split()) > 1 else b"/"
+            if path.split(b"?")[0] == b"/metrics":
+                body, status = prometheus().encode(), "200 OK"
+            else:
+                body, status = b"not found\n", "404 Not Found"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    srv = await asyncio.start_server(handle, host, port)
+    print(f"  [metrics] http://{host}:{port}/metrics")
+    async with srv:
+        await srv.serve_forever()
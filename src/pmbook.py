@@ -0,0 +1,121 @@
+import config
+from book import OrderBook
+
+
+# Full L2 book for one Polymarket outcome token, built from the market
+# channel: `book` events replace it, `price_change` events set the size at
+# one price level (0 removes it).  Levels live in the same sorted lists
+# as the Binance book, so every update is a dict write plus a bisect.
+#
+# The channel carries no sequence numbers.  Each price_change does carry
+# the server's best bid / ask after the change, so those are compared
+# with the local book and any mismatch marks it out of sync.  The feed
+# then resubscribes the token, which makes the server send a fresh `book`.
+# The server's book hash is kept so recorded tapes show where a resync
+# came from.
+
+
+class PmBook(OrderBook):
+    def __init__(self):
+        super().__init__(depth=10 ** 6)      # PM books are shallow; never trim
+        self.hash: str | None = None
+        self.resyncs = 0
+
+    def load_pm(self, ev: dict):
+        self._bpx, self._apx, self._bq, self._aq = [], [], {}, {}
+        for lv in ev.get("bids", []):
+            self._set(self._bpx, self._bq, -float(lv["price"]), float(lv["size"]))
+        for lv in ev.get("asks", []):
+            self._set(self._apx, self._aq, float(lv["price"]), float(lv["size"]))
+        self.hash   = ev.get("hash")
+        self.synced = True
+        self._ver  += 1
+
+    def change(self, ch: dict) -> bool:
+        # one price_change entry; False once the book disagrees with the server
+        if not self.synced:
+            return True
+        p, q = float(ch["price"]), float(ch["size"])
+        if ch["side"] == "BUY":
+            self._set(self._bpx, self._bq, -p, q)
+        else:
+            self._set(self._apx, self._aq, p, q)
+        self.hash = ch.get("hash", self.hash)
+        self._ver += 1
+
+        if not self._agrees(ch.get("best_bid"), self.best_bid) or \
+           not self._agrees(ch.get("best_ask"), self.best_ask):
+            self.synced   = False
+            self.resyncs += 1
+            return False
+        return True
+
+    @staticmethod
+    def _agrees(theirs, ours) -> bool:
+        # an empty side is reported as 0 (bid) or 1 (ask) or omitted
+        if theirs is None or theirs == "":
+            return True
+        t = float(theirs)
+        if ours is None:
+            return t in (0.0, 1.0)
+        return abs(t - ours) < 1e-9
+
+    # ── stats ─────────────────────────────────────────────────
+    @property
+    def best_bid(self) -> float | None:
+        return -self._bpx[0] if self._bpx else None
+
+    @property
+    def best_ask(self) -> float | None:
+        return self._apx[0] if self._apx else None
+
+    @property
+    def spread(self) -> float | None:
+        if not self._bpx or not self._apx:
+            return None
+        return self._apx[0] + self._bpx[0]
+
+    @property
+    def microprice(self) -> float | None:
+        # size-weighted toward the side with less resting size
+        if not self._bpx or not self._apx:
+            return None
+        b, a   = -self._bpx[0], self._apx[0]
+        bq, aq = self._bq[self._bpx[0]], self._aq[a]
+        return (b * aq + a * bq) / (bq + aq)
+
+    def depth_near(self, cents: float = config.PM_DEPTH_CENTS) -> tuple[float, float]:
+        # shares resting within `cents` of the best bid / best ask
+        band = cents / 100 + 1e-9
+        bid = ask = 0.0
+        if self._bpx:
+            lim = self._bpx[0] + band
+            for k in self._bpx:
+                if k > lim:
+                    break
+                bid += self._bq[k]
+        if self._apx:
+            lim = self._apx[0] + band
+            for k in self._apx:
+                if k > lim:
+                    break
+                ask += self._aq[k]
+        return bid, ask
+
+    def stats(self) -> dict | None:
+        if not self.synced:
+            return None
+        bd, ad = self.depth_near()
+        return {
+            "bid": self.best_bid, "ask": self.best_ask,
+            "spread": self.spread, "micro": self.microprice,
+            "bid_depth": bd, "ask_depth": ad,
+        }
+
+
+def overround(up: PmBook, dn: PmBook) -> float | None:
+    # cost of buying one Up and one Down share at the best asks, minus the
+    # $1 payout; > 0 is the book's edge over a fair pair
+    if not up.synced or not dn.synced or up.best_ask is None or dn.best_ask is None:
+        return None
+    return up.best_ask + dn.best_ask - 1.0
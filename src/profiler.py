@@ -0,0 +1,183 @@
+import asyncio
+import functools
+import inspect
+import signal
+import time
+
+import config
+
+
+# In-process profiler for the hot paths: every indicators.py function, the
+# book analytics, the snapshot slices, the dashboard panel builders and the
+# feed handlers.
+# enable() swaps those module attributes for timing wrappers and disable()
+# puts the originals back, so nothing is paid while it is off.  Binance
+# handlers live in route dicts rather than modules; Ingest and the tape
+# replay track() theirs and the handlers are wrapped in place.
+#
+# Per function it keeps calls, total and self time; per call stack it keeps
+# self time, written as collapsed stacks ("a;b;c <µs>" per line) that
+# flamegraph.pl and speedscope read directly.
+
+enabled = False
+
+# name → [calls, total s, self s, max s]
+stats:  dict[str, list] = {}
+# "outer;inner" → self s
+stacks: dict[str, float] = {}
+
+_stack: list[str]   = []        # profiled calls in progress (all synchronous)
+_child: list[float] = []        # time spent in profiled children, per open call
+_saved: list[tuple[object, str, object]] = []
+_routes: list[dict] = []
+
+
+def _call(name: str, fn, *args, **kw):
+    _stack.append(name)
+    _child.append(0.0)
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kw)
+    finally:
+        dt   = time.perf_counter() - t0
+        own  = dt - _child.pop()
+        path = ";".join(_stack)
+        _stack.pop()
+        if _child:
+            _child[-1] += dt
+        s = stats.get(name)
+        if s is None:
+            s = stats[name] = [0, 0.0, 0.0, 0.0]
+        s[0] += 1
+        s[1] += dt
+        s[2] += own
+        if dt > s[3]:
+            s[3] = dt
+        stacks[path] = stacks.get(path, 0.0) + own
+
+
+def _wrap(name: str, fn):
+    @functools.wraps(fn)
+    def timed(*args, **kw):
+        return _call(name, fn, *args, **kw)
+    timed._profiled = fn
+    return timed
+
+
+def _targets() -> list[tuple[object, str]]:
+    import bookstats
+    import dashboard
+    import feeds
+    import indicators
+    import snapshot
+
+    out = [(indicators, n) for n, f in vars(indicators).items()
+           if inspect.isfunction(f) and f.__module__ == "indicators"]
+    out += [(bookstats.BookStats, n) for n in ("__init__", "obi", "depth_usd", "walls")]
+    out += [(snapshot, n) for n in ("take", "_book", "_flow", "_klines", "_pm", "score_trend")]
+    out += [(dashboard, n) for n in ("render", "render_snapshot", "render_scan", "render_scan_snaps",
+                                     "_score_trend", "_header", "_ob_panel", "_flow_panel", "_ta_panel",
+                                     "_pm_panel", "_signals", "_signals_panel", "_diag_panel")]
+    out += [(feeds, n) for n in ("pm_frame", "_pm_book", "_pm_change")]
+    return out
+
+
+def _wrap_routes(routes: dict):
+    for stream, fn in routes.items():
+        if not hasattr(fn, "_profiled"):
+            routes[stream] = _wrap(f"feeds.handle[{stream}]", fn)
+
+
+def _unwrap_routes(routes: dict):
+    for stream, fn in routes.items():
+        routes[stream] = getattr(fn, "_profiled", fn)
+
+
+def track(routes: dict):
+    _routes.append(routes)
+    if enabled:
+        _wrap_routes(routes)
+
+
+def untrack(routes: dict):
+    for i, r in enumerate(_routes):
+        if r is routes:
+            del _routes[i]
+            _unwrap_routes(routes)
+            return
+
+
+def enable():
+    global enabled
+    if enabled:
+        return
+    import dashboard
+    for mod, name in _targets():
+        fn = getattr(mod, name)
+        _saved.append((mod, name, fn))
+        setattr(mod, name, _wrap(f"{mod.__name__}.{name}", fn))
+    for routes in _routes:
+        _wrap_routes(routes)
+    # cached panels hold their builder; new views pick up the wrapped ones
+    dashboard._views.clear()
+    enabled = True
+
+
+def disable():
+    global enabled
+    if not enabled:
+        return
+    import dashboard
+    while _saved:
+        mod, name, fn = _saved.pop()
+        setattr(mod, name, fn)
+    for routes in _routes:
+        _unwrap_routes(routes)
+    dashboard._views.clear()
+    enabled = False
+
+
+def toggle():
+    (disable if enabled else enable)()
+    print(f"  [profile] {'on' if enabled else 'off'}")
+
+
+def reset():
+    stats.clear()
+    stacks.clear()
+
+
+# ── output ────────────────────────────────────────────────────
+def summary(top: int = 25) -> str:
+    rows = sorted(stats.items(), key=lambda kv: kv[1][2], reverse=True)[:top]
+    out  = [f"  {'function':<44} {'calls':>9} {'total ms':>10} {'self ms':>10} {'mean µs':>9} {'max ms':>8}"]
+    for name, (n, tot, own, mx) in rows:
+        out.append(f"  {name:<44} {n:>9,} {tot * 1e3:>10.1f} {own * 1e3:>10.1f} "
+                   f"{tot / n * 1e6:>9.1f} {mx * 1e3:>8.2f}")
+    return "\n".join(out)
+
+
+def dump(path: str = config.PROFILE_OUT):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, secs in sorted(stacks.items()):
+            us = round(secs * 1e6)
+            if us:
+                f.write(f"{stack} {us}\n")
+
+
+async def run(path: str = config.PROFILE_OUT, every: float = config.PROFILE_EVERY):
+    # periodic summary + collapsed-stack dump; SIGUSR1 toggles profiling
+    if hasattr(signal, "SIGUSR1"):
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, toggle)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        while True:
+            await asyncio.sleep(every)
+            if stats:
+                print(f"  [profile] top self time → {path}\n{summary()}")
+                dump(path)
+    finally:
+        if stats:
+            dump(path)
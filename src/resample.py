@@ -0,0 +1,56 @@
+BASE_IV = "1m"
+
+_UNIT = {"m": 60, "h": 3600, "d": 86400}
+
+
+def iv_secs(iv: str) -> int:
+    return int(iv[:-1]) * _UNIT[iv[-1]]
+
+
+# Builds candles of any epoch-aligned interval (15m, 1h, 4h, 1d, …) from
+# the 1m stream.  Closed 1m candles are folded into the bucket as they
+# arrive; the open 1m candle is merged on top to give the open bucket.
+
+
+def _merge(acc, k, t):
+    if acc is None:
+        return {"t": t, "o": k["o"], "h": k["h"], "l": k["l"], "c": k["c"], "v": k["v"]}
+    return {
+        "t": t,
+        "o": acc["o"],
+        "h": max(acc["h"], k["h"]),
+        "l": min(acc["l"], k["l"]),
+        "c": k["c"],
+        "v": acc["v"] + k["v"],
+    }
+
+
+class Resampler:
+    def __init__(self, secs: int, base: int = iv_secs(BASE_IV)):
+        self.secs = secs
+        self.base = base
+        self.t    = None      # open time of the bucket being built
+        self.acc  = None      # closed base candles of that bucket
+
+    def update(self, k: dict, closed: bool) -> tuple[list[dict], dict | None]:
+        done = []
+        t = k["t"] // self.secs * self.secs
+        if self.t is not None and t != self.t:
+            # the bucket's last base candle never closed (gap) – ship what we have
+            if self.acc is not None:
+                done.append(self.acc)
+            self.acc = None
+        self.t = t
+
+        cur = _merge(self.acc, k, t)
+        if not closed:
+            return done, cur
+
+        self.acc = cur
+        if k["t"] + self.base >= t + self.secs:
+            done.append(cur)
+            self.acc = None
+            self.t   = None
+            return done, None
+        return done, cur
+
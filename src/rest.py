@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+
+# Async front for the REST calls made by the feeds.  Requests run on a small
+# worker pool so a slow round-trip never blocks the event loop; each host
+# gets one pooled requests.Session so connections are kept alive between
+# calls.  The pool size doubles as the global concurrency cap.
+
+
+class RestClient:
+    def __init__(self, max_conc: int = config.HTTP_MAX_CONC,
+                 timeout: float = config.HTTP_TIMEOUT):
+        self.max_conc = max_conc
+        self.timeout  = timeout
+        self._pool    = ThreadPoolExecutor(max_workers=max_conc, thread_name_prefix="rest")
+        self._lock    = threading.Lock()
+        self._sessions: dict[str, requests.Session] = {}
+
+    def _session(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc
+        with self._lock:
+            sess = self._sessions.get(host)
+            if sess is None:
+                sess = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_conc)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                self._sessions[host] = sess
+            return sess
+
+    def _get(self, url, params, timeout):
+        resp = self._session(url).get(url, params=params, timeout=timeout or self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def get_json(self, url: str, params=None, timeout: float | None = None):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._get, url, params, timeout)
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        with self._lock:
+            for sess in self._sessions.values():
+                sess.close()
+            self._sessions.clear()
+
+
+client = RestClient()
+
+
+async def get_json(url: str, params=None, timeout: float | None = None):
+    return await client.get_json(url, params, timeout)
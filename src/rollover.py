@@ -0,0 +1,185 @@
+import asyncio
+import json
+import os
+import time
+
+import config
+import feeds
+import supervisor
+import tape
+
+
+# Keeps every market on its live Polymarket window.  A few minutes before
+# a window ends the next window's tokens are looked up; shortly before the
+# boundary they are subscribed on the open socket so their books are warm;
+# at the boundary each State switches to them and the old tokens are
+# unsubscribed.  Lookups for all markets due together go out as one Gamma
+# request, and results are cached on disk so restarts skip Gamma entirely.
+
+
+class TokenCache:
+    def __init__(self, path: str = config.PM_CACHE, ttl: float = config.PM_CACHE_TTL):
+        self.path = path
+        self.ttl  = ttl
+        self._d: dict[str, dict] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._d = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def get(self, slug: str) -> tuple[str, str] | None:
+        e = self._d.get(slug)
+        if e is None or time.time() - e["t"] > self.ttl:
+            return None
+        return tuple(e["ids"])
+
+    def put(self, found: dict[str, tuple[str, str]]):
+        now = time.time()
+        for slug, ids in found.items():
+            self._d[slug] = {"ids": list(ids), "t": now}
+        self._d = {s: e for s, e in self._d.items() if now - e["t"] <= self.ttl}
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._d, f)
+        os.replace(tmp, self.path)
+
+    async def resolve(self, slugs: list[str]) -> dict[str, tuple[str, str]]:
+        out  = {s: self.get(s) for s in slugs}
+        miss = [s for s, ids in out.items() if ids is None]
+        if miss:
+            found = await feeds.fetch_pm_batch(miss)
+            if found:
+                self.put(found)
+            out.update(found)
+        return {s: ids for s, ids in out.items() if ids}
+
+
+def pm_meta(markets: dict) -> dict:
+    # tape record of which tokens each market follows
+    return {
+        "pm":   {f"{c} {tf}": [st.pm_up_id, st.pm_dn_id] for (c, tf), st in markets.items()},
+        "next": {f"{c} {tf}": list(st.pm_next) for (c, tf), st in markets.items() if st.pm_next},
+    }
+
+
+class MarketScheduler:
+    def __init__(self, markets: dict[tuple[str, str], feeds.State], cache: TokenCache | None = None):
+        self.markets = markets
+        self.cache   = TokenCache() if cache is None else cache
+        self.assets: dict[str, feeds.State] = {}
+        self.outbox: asyncio.Queue = asyncio.Queue()
+
+        self._end:   dict[tuple[str, str], float] = {}
+        self._tried: dict[tuple[str, str], float] = {}
+
+    async def bootstrap(self):
+        now   = time.time()
+        slugs = {key: feeds._build_slug(*key, now) for key in self.markets}
+        found = await self.cache.resolve([s for s in slugs.values() if s])
+        for key, st in self.markets.items():
+            ids = found.get(slugs[key])
+            if ids is None:
+                print(f"  [PM] no active market for slug: {slugs[key]}")
+            st.pm_switch(*(ids or (None, None)))
+            self._end[key] = feeds.window_bounds(key[1], now)[1]
+        self.assets.update(feeds.pm_assets(self.markets.values()))
+
+    async def run(self):
+        while True:
+            now = time.time()
+            await self._prefetch(now)
+            self._subscribe_next(now)
+            self._switch(now)
+            await asyncio.sleep(1)
+
+    async def feed(self):
+        # the PM socket plus the rollover loop; waits until there is a token
+        async def stream():
+            while not self.assets:
+                await asyncio.sleep(1)
+            await supervisor.run("PM", lambda ready: feeds.pm_stream(self.assets, self.outbox, ready))
+        await asyncio.gather(stream(), self.run())
+
+    async def _prefetch(self, now: float):
+        # the next window's tokens ahead of the boundary, and the current
+        # window's for a market that has none (its bootstrap lookup failed
+        # or Gamma listed it late); an expired window is left to _switch,
+        # which moves it on first
+        due = []
+        for key, end in self._end.items():
+            st = self.markets[key]
+            if end <= now or now - self._tried.get(key, 0.0) < config.PM_RETRY:
+                continue
+            if st.pm_up_id is None:
+                due.append((key, now))
+            if end - now <= config.PM_PREFETCH and st.pm_next is None:
+                due.append((key, end))
+        if not due:
+            return
+        slugs = [feeds._build_slug(*key, at) for key, at in due]
+        found = await self.cache.resolve([s for s in slugs if s])
+        new   = []
+        for (key, at), slug in zip(due, slugs):
+            st  = self.markets[key]
+            ids = found.get(slug)
+            if ids is None:
+                self._tried[key] = now
+            elif at < self._end[key]:
+                st.pm_switch(*ids)
+                for a in ids:
+                    self.assets[a] = st
+                    new.append(a)
+                print(f"  [PM] {key[0]} {key[1]} found its market: {slug}")
+            else:
+                st.pm_next = ids
+        if new:
+            self.outbox.put_nowait({"assets_ids": new, "operation": "subscribe"})
+            if tape.recorder is not None:
+                tape.recorder.write_json(tape.SRC_META, pm_meta(self.markets))
+
+    def _subscribe_next(self, now: float):
+        new = []
+        for key, end in self._end.items():
+            st = self.markets[key]
+            if st.pm_next and end - now <= config.PM_SWITCH_LEAD and st.pm_next[0] not in self.assets:
+                for a in st.pm_next:
+                    self.assets[a] = st
+                    new.append(a)
+        if new:
+            self.outbox.put_nowait({"assets_ids": new, "operation": "subscribe"})
+
+    def _switch(self, now: float):
+        # an expired market always moves on to the window that contains now:
+        # onto pm_next if it was resolved for that window, otherwise to no
+        # market until a later window's lookup succeeds
+        old, moved = [], False
+        for key, end in self._end.items():
+            if now < end:
+                continue
+            st  = self.markets[key]
+            nxt = st.pm_next
+            cur = feeds.window_bounds(key[1], now)[1]
+            old += [a for a in (st.pm_up_id, st.pm_dn_id) if a]
+            if nxt and feeds.window_bounds(key[1], end)[1] == cur:
+                st.pm_switch(*nxt)
+                print(f"  [PM] {key[0]} {key[1]} rolled over")
+            else:
+                # no lookup in time, or it was for a window already gone
+                old += [a for a in (nxt or ()) if a]
+                st.pm_next = None
+                st.pm_switch(None, None)
+                print(f"  [PM] {key[0]} {key[1]}: no market this window")
+            self._end[key] = cur
+            self._tried.pop(key, None)
+            moved = True
+        if not moved:
+            return
+        for a in old:
+            self.assets.pop(a, None)
+        if old:
+            self.outbox.put_nowait({"assets_ids": old, "operation": "unsubscribe"})
+        if tape.recorder is not None:
+            tape.recorder.write_json(tape.SRC_META, pm_meta(self.markets))
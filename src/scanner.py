@@ -0,0 +1,134 @@
+import asyncio
+
+import checkpoint
+import config
+import feeds
+import supervisor
+from book import OrderBook
+from candlestore import CandleStore
+from rollover import MarketScheduler, pm_meta
+from ingest import Ingest
+from candles import CandleSeries
+from trades import TradeBuffer
+from vprofile import VolumeProfile
+
+
+# Every coin × timeframe market from one process: one combined Binance
+# stream and one Polymarket socket.  Book and trades are shared per symbol
+# and candles per symbol/interval (all resampled from the symbol's single
+# 1m stream), so cost grows with symbols only.
+
+
+class Scanner:
+    def __init__(self, coins: list[str] = config.COINS, tfs: list[str] = config.TIMEFRAMES,
+                 store_dir: str | None = None):
+        # store_dir: keep candle history in memory-mapped files there
+        # (live runs); replay and backtests stay in memory
+        self.markets: dict[tuple[str, str], feeds.State] = {}
+        self._books:  dict[str, OrderBook] = {}
+        self._trades: dict[str, TradeBuffer] = {}
+        self._series: dict[tuple[str, str], CandleSeries] = {}
+        self._profiles: dict[tuple[str, str | None], VolumeProfile] = {}
+        self.ingest  = Ingest()
+
+        for coin in coins:
+            sym = config.COIN_BINANCE[coin]
+            book   = self._books.setdefault(sym, OrderBook())
+            trades = self._trades.setdefault(sym, TradeBuffer())
+            for tf in tfs:
+                iv     = config.TF_KLINE[tf]
+                series = self._series.get((sym, iv))
+                if series is None:
+                    store  = CandleStore.open(store_dir, sym, iv) if store_dir else None
+                    series = self._series[(sym, iv)] = CandleSeries(iv, store)
+                st = feeds.State(book, trades, series, self._profile(sym, tf, trades))
+                st.ingest = self.ingest
+                self.markets[(coin, tf)] = st
+        self.scheduler = MarketScheduler(self.markets)
+
+    def _profile(self, sym: str, tf: str, trades: TradeBuffer) -> VolumeProfile:
+        # one rolling profile per symbol, or one per market in session mode
+        key = (sym, tf if config.VP_SESSION else None)
+        vp  = self._profiles.get(key)
+        if vp is None:
+            session = (lambda t, tf=tf: feeds.window_bounds(tf, t)) if config.VP_SESSION else None
+            vp = self._profiles[key] = VolumeProfile(session=session)
+            trades.profiles.append(vp)
+        return vp
+
+    async def bootstrap(self, warm: bool = False, path: str = config.CHECKPOINT_PATH):
+        # symbols restored from a checkpoint skip the REST bootstrap; the
+        # rest load concurrently with the PM token lookup
+        done = checkpoint.restore(self.symbols(), path) if warm else set()
+        await asyncio.gather(
+            self.scheduler.bootstrap(),
+            *(feeds.bootstrap(sym, self.symbol_series(sym), self._trades[sym])
+              for sym in self._books if sym not in done),
+        )
+
+    def symbols(self) -> dict[str, tuple[TradeBuffer, list[CandleSeries]]]:
+        return {sym: (self._trades[sym], self.symbol_series(sym)) for sym in self._books}
+
+    def seed(self, sym: str, klines: list[dict]):
+        if sym in self._trades:
+            feeds.seed(klines, self.symbol_series(sym), self._trades[sym])
+
+    @property
+    def books(self) -> dict[str, OrderBook]:
+        return self._books
+
+    def symbol_series(self, sym: str) -> list[CandleSeries]:
+        return [ser for (s, _), ser in self._series.items() if s == sym]
+
+    def routes(self) -> dict:
+        routes = {}
+        for sym, book in self._books.items():
+            routes.update(feeds.symbol_routes(sym, book, self._trades[sym],
+                                              self.symbol_series(sym)))
+        return routes
+
+    def backfill(self, sym: str, klines: list[dict], trades: list[list], end: float):
+        if sym in self._trades:
+            feeds.apply_backfill(self._trades[sym], self.symbol_series(sym), klines, trades, end)
+
+    def pm_assets(self) -> dict[str, feeds.State]:
+        return feeds.pm_assets(self.markets.values())
+
+    def pm_frame(self, frame: str) -> list[str]:
+        return feeds.pm_frame(frame, self.pm_assets())
+
+    def meta(self) -> dict:
+        return {
+            "coins": sorted({c for c, _ in self.markets}, key=config.COINS.index),
+            "tfs":   sorted({tf for _, tf in self.markets}, key=config.TIMEFRAMES.index),
+            **pm_meta(self.markets),
+        }
+
+    def load_meta(self, meta: dict):
+        # also replays rollovers: later meta records switch the tokens
+        for key, ids in meta.get("next", {}).items():
+            st = self.markets.get(tuple(key.split(" ")))
+            if st is not None:
+                st.pm_next = tuple(ids)
+        for key, (up, dn) in meta.get("pm", {}).items():
+            st = self.markets.get(tuple(key.split(" ")))
+            if st is not None and (st.pm_up_id, st.pm_dn_id) != (up, dn):
+                st.pm_switch(up, dn)
+
+    async def resume(self):
+        await asyncio.gather(*(
+            feeds.resume(sym, book, self._trades[sym], self.symbol_series(sym))
+            for sym, book in self._books.items()
+        ))
+
+    async def run(self):
+        routes = self.routes()
+        label  = f"{len(self._books)} symbols"
+        await asyncio.gather(
+            supervisor.run(
+                "Binance",
+                lambda ready: feeds.binance_stream(routes, label, self.ingest, ready),
+                self.resume,
+            ),
+            self.scheduler.feed(),
+        )
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import signal
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+import checkpoint
+import config
+import snapshot as snp
+from snapshot import Snapshot
+
+
+# Multi-process scanner.  Coins are dealt round-robin to worker processes;
+# each worker is a Scanner over its coins (its own Binance stream, PM
+# socket, books, candles and indicators) and publishes every market's
+# newest snapshot into one shared-memory block.  The coordinator only
+# reads that block: it renders the scan table, serves fan-out clients and
+# computes the cross-market view, so decoding and indicator math spread
+# over as many cores as there are shards.
+#
+# The block is one fixed-size slot per market, coin × timeframe order:
+#
+#   +0   seq   u64   even = stable, odd = write in progress
+#   +8   len   u32   payload bytes
+#   +16  data        Snapshot.to_dict() as JSON, up to SHM_SLOT - 16 bytes
+#
+# Every slot has exactly one writer, so a seqlock needs no lock: the
+# writer makes seq odd, writes, and makes it even again; a reader copies
+# the payload and keeps it only if seq was the same even value before
+# and after the copy.  Readers never block the writer.
+
+_SEQ = struct.Struct("<Q")
+_LEN = struct.Struct("<I")
+_PAD = 16
+_TRIES = 8        # reads of a slot that keeps changing, per poll
+
+
+class Slots:
+    def __init__(self, n: int, name: str | None = None):
+        size = n * config.SHM_SLOT
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.n    = n
+        self.name = self.shm.name
+        self.buf  = self.shm.buf
+
+    def write(self, i: int, payload: bytes) -> bool:
+        if len(payload) > config.SHM_SLOT - _PAD:
+            return False
+        off = i * config.SHM_SLOT
+        # a writer killed mid-write leaves seq odd; the next one (its
+        # restart) evens it first, or readers would skip the slot for good
+        seq = (_SEQ.unpack_from(self.buf, off)[0] + 1) & ~1
+        _SEQ.pack_into(self.buf, off, seq + 1)
+        self.buf[off + _PAD:off + _PAD + len(payload)] = payload
+        _LEN.pack_into(self.buf, off + 8, len(payload))
+        _SEQ.pack_into(self.buf, off, seq + 2)
+        return True
+
+    def seq(self, i: int) -> int:
+        return _SEQ.unpack_from(self.buf, i * config.SHM_SLOT)[0]
+
+    def read(self, i: int) -> tuple[int, bytes] | None:
+        # (seq, payload) of a consistent copy; None while the writer keeps
+        # the slot busy (try again next poll)
+        off = i * config.SHM_SLOT
+        cap = config.SHM_SLOT - _PAD
+        for _ in range(_TRIES):
+            seq = _SEQ.unpack_from(self.buf, off)[0]
+            if seq & 1:
+                continue
+            n    = min(_LEN.unpack_from(self.buf, off + 8)[0], cap)
+            data = bytes(self.buf[off + _PAD:off + _PAD + n])
+            if _SEQ.unpack_from(self.buf, off)[0] == seq:
+                return seq, data
+        return None
+
+    def close(self):
+        self.buf = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def _dumps(d: dict) -> bytes:
+    return json.dumps(d, separators=(",", ":")).encode()
+
+
+def assign(coins: list[str], shards: int) -> list[list[str]]:
+    # round-robin, so adding coins keeps the shards even
+    return [g for g in (coins[i::shards] for i in range(shards)) if g]
+
+
+def checkpoint_path(coins: list[str]) -> str:
+    # one checkpoint per coin group: data/checkpoint.BTC-SOL.npz
+    return checkpoint.path_for(*coins)
+
+
+# ── worker ────────────────────────────────────────────────────
+async def publish(slots: Slots, states: dict):
+    # states: slot index → State; a market's slot is rewritten whenever its
+    # snapshot version moves, at most MAX_FPS times a second
+    frame  = 1 / config.MAX_FPS
+    vers   = {}
+    warned = set()
+    while True:
+        for i, st in states.items():
+            if not st.mid:
+                continue
+            ver = snp.version(st)
+            if ver == vers.get(i):
+                continue
+            vers[i] = ver
+            if not slots.write(i, _dumps(snp.take(st).to_dict())) and i not in warned:
+                warned.add(i)
+                print(f"  [shard] slot {i}: snapshot larger than SHM_SLOT ({config.SHM_SLOT} B), not published")
+        await asyncio.sleep(frame)
+
+
+async def _work(name: str, keys: list[tuple[str, str]], coins: list[str], tfs: list[str], warm: bool):
+    from scanner import Scanner
+
+    slots   = Slots(len(keys), name)
+    scanner = Scanner(coins, tfs, store_dir=config.CANDLE_DIR)
+    path    = checkpoint_path(coins)
+    print(f"  [shard] {'/'.join(coins)}: bootstrapping {len(scanner.markets)} markets …")
+    await scanner.bootstrap(warm, path)
+    try:
+        await asyncio.gather(
+            scanner.run(),
+            publish(slots, {keys.index(k): st for k, st in scanner.markets.items()}),
+            checkpoint.run(scanner.symbols(), path),
+        )
+    finally:
+        slots.close()
+
+
+def _stop(*_):
+    raise KeyboardInterrupt
+
+
+def worker(index: int, name: str, keys: list, coins: list[str], tfs: list[str], warm: bool):
+    # process entry point; the coordinator owns the terminal, so worker
+    # output goes to data/shards/shard<index>.log.  Ctrl-C is the
+    # coordinator's to handle; it stops workers with SIGTERM, which shuts
+    # down like Ctrl-C would (the checkpoint is saved on the way out).
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _stop)
+    os.makedirs(config.SHARD_LOGS, exist_ok=True)
+    log = open(os.path.join(config.SHARD_LOGS, f"shard{index}.log"), "a", buffering=1, encoding="utf-8")
+    sys.stdout = sys.stderr = log
+    try:
+        asyncio.run(_work(name, [tuple(k) for k in keys], coins, tfs, warm))
+    except KeyboardInterrupt:
+        pass
+
+
+# ── coordinator ───────────────────────────────────────────────
+class Coordinator:
+    def __init__(self, shards: int, coins: list[str] = config.COINS,
+                 tfs: list[str] = config.TIMEFRAMES, warm: bool = False):
+        self.keys   = [(c, tf) for c in coins for tf in tfs]
+        self.groups = assign(coins, shards)
+        self.tfs    = tfs
+        self.warm   = warm
+        self.snaps: dict[tuple[str, str], Snapshot | None] = dict.fromkeys(self.keys)
+        self.restarts = 0
+
+        self._slots   = None
+        self._seen    = [0] * len(self.keys)
+        self._procs   = [None] * len(self.groups)
+        self._started = [0.0] * len(self.groups)
+        self._ctx     = mp.get_context("spawn")
+
+    def __enter__(self) -> "Coordinator":
+        self._slots = Slots(len(self.keys))
+        for i in range(len(self.groups)):
+            self._spawn(i)
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _spawn(self, i: int):
+        p = self._ctx.Process(
+            target=worker, name=f"shard{i}", daemon=True,
+            args=(i, self._slots.name, self.keys, self.groups[i], self.tfs, self.warm),
+        )
+        p.start()
+        self._procs[i]   = p
+        self._started[i] = time.monotonic()
+
+    def poll(self) -> list[tuple[str, dict]]:
+        # markets whose slot changed since the last poll, as ("BTC 15m",
+        # snapshot dict); self.snaps follows along
+        out = []
+        for i, key in enumerate(self.keys):
+            if self._slots.seq(i) == self._seen[i]:
+                continue
+            got = self._slots.read(i)
+            if got is None:
+                continue
+            seq, raw = got
+            try:
+                d = json.loads(raw)
+            except ValueError:
+                continue
+            self._seen[i]  = seq
+            self.snaps[key] = Snapshot.from_dict(d)
+            out.append((f"{key[0]} {key[1]}", d))
+        return out
+
+    def latest(self) -> dict:
+        self.poll()
+        return self.snaps
+
+    async def run(self):
+        # restart workers that died, with the feeds' reconnect backoff; a
+        # restarted worker comes back warm from its own checkpoint
+        fails = [0] * len(self.groups)
+        due: dict[int, float] = {}
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            for i, p in enumerate(self._procs):
+                if p is None or p.is_alive():
+                    continue
+                if i not in due:
+                    if now - self._started[i] >= config.RECONNECT_RESET:
+                        fails[i] = 0
+                    delay = min(config.RECONNECT_MAX, config.RECONNECT_BASE * 2 ** fails[i])
+                    delay *= random.uniform(0.5, 1.5)
+                    fails[i] += 1
+                    due[i] = now + delay
+                    print(f"  [shard] {'/'.join(self.groups[i])} exited ({p.exitcode}) – "
+                          f"restarting in {delay:.1f}s")
+                elif now >= due[i]:
+                    del due[i]
+                    self.restarts += 1
+                    self.warm = True
+                    self._spawn(i)
+
+    def close(self):
+        # workers take SIGTERM as a clean shutdown and save their checkpoints
+        procs, self._procs = [p for p in self._procs if p is not None], [None] * len(self.groups)
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        deadline = time.monotonic() + 10
+        for p in procs:
+            p.join(max(0.0, deadline - time.monotonic()))
+            if p.is_alive():
+                p.kill()
+                p.join()
+        if self._slots is not None:
+            self._slots.close()
+            self._slots.unlink()
+            self._slots = None
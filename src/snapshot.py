@@ -0,0 +1,231 @@
+import time
+
+import clock
+import config
+import metrics
+import pmbook
+import supervisor
+
+
+TREND_THRESH = 3
+
+
+# One Snapshot holds every value the dashboard shows.  take() rebuilds only
+# the slices whose State version moved since the previous snapshot, so each
+# indicator runs at most once per change no matter how many panels read it.
+
+
+class Snapshot:
+    def __init__(self):
+        self.key = None
+
+        self.mid   = 0.0
+        self.pm_up = None
+        self.pm_dn = None
+
+        # Polymarket books: {"up": stats, "dn": stats} and Up + Down − 1
+        self.pm_liq  = {}
+        self.pm_over = None
+
+        # order book
+        self.obi   = 0.0
+        self.bw    = []
+        self.aw    = []
+        self.depth = {}
+
+        # flow
+        self.cvd   = {}
+        self.delta = 0.0
+
+        # trade volume profile: VP_BINS rows, buy share per row, value area
+        self.poc    = 0.0
+        self.vp     = []
+        self.vp_buy = []
+        self.val    = 0.0
+        self.vah    = 0.0
+
+        # klines
+        self.rsi   = None
+        self.macd  = None
+        self.sig   = None
+        self.hist  = None
+        self.vwap  = 0.0
+        self.ema_s = None
+        self.ema_l = None
+        self.ha    = []
+
+        # ingestion health
+        self.lag        = None
+        self.degraded   = False
+        self.reconnects = 0
+        self.gap        = 0.0
+        # (feed, exchange t, recv t, applied t, computed t) of the newest
+        # event behind this snapshot; only kept while metrics are on
+        self.stamp      = None
+
+        self.score = 0
+        self.label = "NEUTRAL"
+        self.col   = "yellow"
+
+    # JSON-safe form for the fan-out server (dict keys become strings)
+    def to_dict(self) -> dict:
+        d = dict(self.__dict__)
+        d["depth"] = {str(k): v for k, v in self.depth.items()}
+        d["cvd"]   = {str(k): v for k, v in self.cvd.items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Snapshot":
+        s = cls()
+        s.__dict__.update(d)
+        s.key   = tuple(d["key"]) if d.get("key") is not None else None
+        s.depth = {float(k): v for k, v in d.get("depth", {}).items()}
+        s.cvd   = {int(k): v for k, v in d.get("cvd", {}).items()}
+        s.bw    = [tuple(w) for w in d.get("bw", [])]
+        s.aw    = [tuple(w) for w in d.get("aw", [])]
+        s.vp    = [tuple(b) for b in d.get("vp", [])]
+        s.stamp = tuple(d["stamp"]) if d.get("stamp") else None
+        return s
+
+
+def _book(s, st):
+    bs      = st.book.analytics()
+    s.mid   = st.mid
+    s.obi   = bs.obi(st.mid) if st.mid else 0.0
+    s.bw, s.aw = bs.walls()
+    s.depth = bs.depth_usd(st.mid) if st.mid else {}
+
+
+def _flow(s, st):
+    now     = clock.now()
+    s.cvd   = {secs: st.trades.cvd(secs, now) for secs in config.CVD_WINDOWS}
+    s.delta = st.trades.cvd(config.DELTA_WINDOW, now)
+
+    vp = st.profile.view()
+    s.poc, s.vp, s.vp_buy = vp["poc"], vp["vp"], vp["buy"]
+    s.val, s.vah = vp["val"], vp["vah"]
+
+
+def _klines(s, st):
+    eng, cur = st.engine, st.cur_kline
+    s.rsi = eng.rsi(cur)
+    s.macd, s.sig, s.hist = eng.macd(cur)
+    s.vwap = eng.vwap(cur)
+    s.ema_s, s.ema_l = eng.emas(cur)
+    s.ha = eng.heikin_ashi(cur)
+
+
+def _pm(s, st):
+    s.pm_up, s.pm_dn = st.pm_up, st.pm_dn
+    s.pm_liq  = {"up": st.pm_up_book.stats(), "dn": st.pm_dn_book.stats()}
+    s.pm_over = pmbook.overround(st.pm_up_book, st.pm_dn_book)
+
+
+def score_trend(s):
+    score = 0
+
+    if s.obi > config.OBI_THRESH:
+        score += 1
+    elif s.obi < -config.OBI_THRESH:
+        score -= 1
+
+    cvd5 = s.cvd.get(300, 0.0)
+    score += 1 if cvd5 > 0 else -1 if cvd5 < 0 else 0
+
+    if s.rsi is not None:
+        if s.rsi > config.RSI_OB:
+            score -= 1
+        elif s.rsi < config.RSI_OS:
+            score += 1
+
+    if s.hist is not None:
+        score += 1 if s.hist > 0 else -1
+
+    if s.vwap and s.mid:
+        score += 1 if s.mid > s.vwap else -1
+
+    if s.ema_s is not None and s.ema_l is not None:
+        score += 1 if s.ema_s > s.ema_l else -1
+
+    score += min(len(s.bw), 2)
+    score -= min(len(s.aw), 2)
+
+    if len(s.ha) >= 3:
+        last3 = s.ha[-3:]
+        if all(c["green"] for c in last3):
+            score += 1
+        elif all(not c["green"] for c in last3):
+            score -= 1
+
+    if score >= TREND_THRESH:
+        return score, "BULLISH",  "green"
+    elif score <= -TREND_THRESH:
+        return score, "BEARISH",  "red"
+    else:
+        return score, "NEUTRAL",  "yellow"
+
+
+def breadth(snaps: dict) -> dict:
+    # cross-market view over (coin, tf) → Snapshot (None = not synced yet):
+    # how many markets lean each way, their mean score, and the coins whose
+    # timeframes all give the same non-neutral call
+    labels: dict[str, list[str]] = {}
+    scores = []
+    for (coin, _), s in snaps.items():
+        if s is None:
+            continue
+        labels.setdefault(coin, []).append(s.label)
+        scores.append(s.score)
+    flat = [l for ls in labels.values() for l in ls]
+    return {
+        "bull":    flat.count("BULLISH"),
+        "bear":    flat.count("BEARISH"),
+        "neutral": flat.count("NEUTRAL"),
+        "score":   sum(scores) / len(scores) if scores else 0.0,
+        "aligned": {c: ls[0] for c, ls in labels.items()
+                    if len(ls) > 1 and ls[0] != "NEUTRAL" and len(set(ls)) == 1},
+    }
+
+
+def version(st) -> tuple:
+    # CVD windows slide with the wall clock, so the flow slice also
+    # expires once per second even when no trade arrived
+    return st.book_ver, st.trade_ver, int(clock.now()), st.kline_ver, st.pm_ver
+
+
+def take(st) -> Snapshot:
+    key  = version(st)
+    prev = st.snapshot
+    if prev is not None and prev.key == key:
+        return prev
+
+    s = Snapshot()
+    if prev is not None:
+        s.__dict__.update(prev.__dict__)
+    s.key = key
+
+    todo = []
+    if prev is None or prev.key[0] != key[0]:
+        todo.append(_book)
+    if prev is None or prev.key[1:3] != key[1:3]:
+        todo.append(_flow)
+    if prev is None or prev.key[3] != key[3]:
+        todo.append(_klines)
+    if prev is None or prev.key[4] != key[4]:
+        todo.append(_pm)
+    for fn in todo:
+        if metrics.on:
+            t0 = time.perf_counter()
+            fn(s, st)
+            metrics.record("indicators", fn.__name__[1:], time.perf_counter() - t0)
+        else:
+            fn(s, st)
+    if st.ingest is not None:
+        s.lag, s.degraded = st.ingest.lag, st.ingest.degraded
+    s.reconnects, s.gap = supervisor.reconnects(), supervisor.last_gap()
+
+    s.score, s.label, s.col = score_trend(s)
+    if metrics.on:
+        s.stamp = metrics.computed(st)
+    st.snapshot = s
+    return s
@@ -0,0 +1,83 @@
+import asyncio
+import random
+import time
+
+import config
+
+
+# Restarts a feed whenever its connection drops, with jittered exponential
+# backoff (reset once a connection has stayed up for RECONNECT_RESET).  A
+# feed's connect(ready) coroutine calls ready() as soon as its socket is
+# open; that records the outage and runs the feed's resume hook (the REST
+# backfill) before any live frame is applied.
+
+
+class FeedStats:
+    def __init__(self, name: str):
+        self.name       = name
+        self.connects   = 0
+        self.reconnects = 0
+        self.up         = False
+        self.down_since: float | None = None
+        self.last_gap   = 0.0      # seconds the last outage lasted
+        self.total_gap  = 0.0
+        self.max_gap    = 0.0
+        self.last_error = ""
+
+
+# feed name → stats, for the dashboard and metrics
+stats: dict[str, FeedStats] = {}
+
+
+def reconnects() -> int:
+    return sum(m.reconnects for m in stats.values())
+
+
+def last_gap() -> float:
+    return max((m.last_gap for m in stats.values()), default=0.0)
+
+
+async def run(name: str, connect, resume=None):
+    m = stats.get(name)
+    if m is None:
+        m = stats[name] = FeedStats(name)
+
+    async def ready():
+        now = time.time()
+        if m.down_since is not None:
+            gap = now - m.down_since
+            m.reconnects += 1
+            m.last_gap    = gap
+            m.total_gap  += gap
+            m.max_gap     = max(m.max_gap, gap)
+            m.down_since  = None
+        m.connects += 1
+        m.up        = True
+        if resume is not None:
+            try:
+                await resume()
+            except Exception as e:
+                print(f"  [{name}] backfill failed: {e}")
+
+    fails = 0
+    while True:
+        t0 = time.time()
+        try:
+            await connect(ready)
+            m.last_error = "closed"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            m.last_error = f"{type(e).__name__}: {e}"
+
+        now = time.time()
+        if m.up:
+            m.down_since = now
+        m.up = False
+        if now - t0 >= config.RECONNECT_RESET:
+            fails = 0
+        delay = min(config.RECONNECT_MAX, config.RECONNECT_BASE * 2 ** fails)
+        delay *= random.uniform(0.5, 1.5)
+        fails += 1
+        print(f"  [{name}] {m.last_error} – reconnecting in {delay:.1f}s")
+        await asyncio.sleep(delay)
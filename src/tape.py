@@ -0,0 +1,175 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_right
+
+import clock
+import decode
+import profiler
+
+
+# Append-only tape of everything the feeds saw, for offline replay.
+#
+#   <path>       8-byte magic, then records of
+#                [recv_ts f64][source u8][len u32][payload bytes]
+#   <path>.idx   (recv_ts f64, offset u64) for every INDEX_EVERY-th record
+#
+# Payloads are the raw websocket frames (or REST bodies as JSON), so the
+# tape replays through the same decode → route → State path as a live run.
+
+MAGIC       = b"PMTAPE\x00\x01"
+INDEX_EVERY = 1024
+
+SRC_BINANCE  = 0    # Binance combined-stream frame
+SRC_PM       = 1    # Polymarket market-channel frame
+SRC_DEPTH    = 2    # {"symbol", "snap"}   REST depth snapshot
+SRC_KLINES   = 3    # {"symbol", "klines"} 1m bootstrap history
+SRC_META     = 4    # {"coins", "tfs", "pm", "next"} what was being watched
+SRC_BACKFILL = 5    # {"symbol", "klines", "trades"} REST gap fill on reconnect
+
+_REC = struct.Struct("<dBI")
+_IDX = struct.Struct("<dQ")
+
+
+class Recorder:
+    def __init__(self, path: str):
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f   = open(path, "ab")
+        self._idx = open(path + ".idx", "ab")
+        if new:
+            self._f.write(MAGIC)
+        self._off = self._f.tell()
+        self._n   = 0
+
+    def write(self, src: int, payload: str | bytes, ts: float | None = None):
+        if ts is None:
+            ts = time.time()
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if self._n % INDEX_EVERY == 0:
+            self._idx.write(_IDX.pack(ts, self._off))
+        self._f.write(_REC.pack(ts, src, len(payload)))
+        self._f.write(payload)
+        self._off += _REC.size + len(payload)
+        self._n   += 1
+
+    def write_json(self, src: int, obj, ts: float | None = None):
+        self.write(src, json.dumps(obj, separators=(",", ":")), ts)
+
+    def flush(self):
+        self._f.flush()
+        self._idx.flush()
+
+    def close(self):
+        self.flush()
+        self._f.close()
+        self._idx.close()
+
+
+# set by main --record; the feeds write through it when present
+recorder: Recorder | None = None
+
+
+class Tape:
+    def __init__(self, path: str):
+        self._f  = open(path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a tape file")
+
+        self._its, self._ioff = [], []
+        if os.path.exists(path + ".idx"):
+            with open(path + ".idx", "rb") as f:
+                for ts, off in _IDX.iter_unpack(f.read()):
+                    self._its.append(ts)
+                    self._ioff.append(off)
+
+    def records(self, start: float | None = None):
+        # (recv_ts, source, payload) from the first record at or after `start`
+        mm, end = self._mm, len(self._mm)
+        off = len(MAGIC)
+        if start is not None and self._its:
+            i = bisect_right(self._its, start) - 1
+            if i >= 0:
+                off = self._ioff[i]
+        while off + _REC.size <= end:
+            ts, src, n = _REC.unpack_from(mm, off)
+            off += _REC.size
+            if off + n > end:
+                break                         # torn tail from a killed recorder
+            if start is None or ts >= start:
+                yield ts, src, mm[off:off + n].decode()
+            off += n
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+
+def meta(path: str) -> dict:
+    reader = Tape(path)
+    try:
+        for _, src, payload in reader.records():
+            if src == SRC_META:
+                return json.loads(payload)
+    finally:
+        reader.close()
+    return {}
+
+
+async def replay(path: str, scanner, speed: float = 0.0, start: float | None = None,
+                 on_frame=None):
+    # Drive a Scanner's States from a tape.  speed 0 = as fast as possible,
+    # 1 = real time.  clock is pinned to tape time throughout.
+    routes = scanner.routes()
+    books  = scanner.books
+    profiler.track(routes)
+    for book in books.values():
+        book.syncing = True          # snapshots come from the tape, never REST
+
+    reader = Tape(path)
+    first  = wall = None
+    n      = 0
+    try:
+        for ts, src, payload in reader.records(start):
+            if speed > 0:
+                if first is None:
+                    first, wall = ts, time.monotonic()
+                delay = (ts - first) / speed - (time.monotonic() - wall)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            clock.pin(ts)
+
+            if src == SRC_BINANCE:
+                stream, body = decode.split(payload)
+                handler = routes.get(stream)
+                if handler is not None:
+                    handler(body)
+            elif src == SRC_PM:
+                scanner.pm_frame(payload)
+            elif src == SRC_DEPTH:
+                rec  = json.loads(payload)
+                book = books.get(rec["symbol"])
+                if book is not None:
+                    book.load(rec["snap"])
+            elif src == SRC_META:
+                scanner.load_meta(json.loads(payload))
+            elif src == SRC_BACKFILL:
+                rec = json.loads(payload)
+                sym = rec["symbol"]
+                scanner.backfill(sym, rec["klines"], rec["trades"], ts)
+            elif src == SRC_KLINES:
+                rec = json.loads(payload)
+                scanner.seed(rec["symbol"], rec["klines"])
+
+            if on_frame is not None:
+                on_frame(ts, src)
+            n += 1
+            if speed <= 0 and n % 256 == 0:
+                await asyncio.sleep(0)     # let the display loop in
+    finally:
+        reader.close()
+        profiler.untrack(routes)
@@ -0,0 +1,128 @@
+from array import array
+
+import clock
+import config
+
+
+# Columnar ring buffer of trades.  Rows are addressed by a monotonically
+# increasing sequence number; row `i` lives in slot `i % cap`.  Each tracked
+# CVD window keeps the sequence number of its oldest row plus the running
+# signed notional of everything newer, so window reads only pay for rows
+# that slid out since the last read.
+
+
+class TradeBuffer:
+    def __init__(self, cap: int = config.TRADE_CAP, ttl: float = config.TRADE_TTL,
+                 windows=None):
+        if windows is None:
+            windows = set(config.CVD_WINDOWS) | {config.DELTA_WINDOW}
+        self.cap = cap
+        self.ttl = ttl
+
+        self.ts  = array("d", bytes(8 * cap))
+        self.px  = array("d", bytes(8 * cap))
+        self.qty = array("d", bytes(8 * cap))
+        self.buy = array("b", bytes(cap))
+        self.sn  = array("d", bytes(8 * cap))      # signed notional
+
+        self.head = 0      # next sequence number
+        self.tail = 0      # oldest live sequence number
+
+        # pushes at or before this time are dropped: set by a REST backfill
+        # so the live frames queued behind it don't count twice
+        self.floor = 0.0
+
+        # volume profiles fed with every accepted trade
+        self.profiles: list = []
+
+        # secs → [oldest seq in window, running signed notional]
+        self._win = {secs: [0, 0.0] for secs in windows}
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, t: float, price: float, qty: float, is_buy: bool):
+        if t <= self.floor:
+            return
+        if self.head - self.tail == self.cap:
+            self._drop_tail()
+
+        i = self.head % self.cap
+        n = price * qty * (1 if is_buy else -1)
+        self.ts[i]  = t
+        self.px[i]  = price
+        self.qty[i] = qty
+        self.buy[i] = is_buy
+        self.sn[i]  = n
+        self.head  += 1
+
+        for w in self._win.values():
+            w[1] += n
+        for vp in self.profiles:
+            vp.push(t, price, qty, is_buy)
+
+        if t - self.ts[self.tail % self.cap] > self.ttl:
+            self._evict(t - self.ttl)
+
+    def load(self, ts: array, px: array, qty: array, buy: array):
+        # bulk restore of time-ordered rows (a checkpoint); replaces the
+        # buffer and does not feed the profiles, which restore themselves
+        n = min(len(ts), self.cap)
+        ts, px, qty, buy = ts[-n:], px[-n:], qty[-n:], buy[-n:]
+        self.ts[:n], self.px[:n], self.qty[:n], self.buy[:n] = ts, px, qty, buy
+        sn = array("d", (p * q * (1 if b else -1) for p, q, b in zip(px, qty, buy)))
+        self.sn[:n] = sn
+        self.tail, self.head = 0, n
+        total = sum(sn)
+        for w in self._win.values():
+            w[0], w[1] = 0, total
+        if n:
+            self.floor = ts[-1]
+
+    @property
+    def last_t(self) -> float | None:
+        return self.ts[(self.head - 1) % self.cap] if self.head > self.tail else None
+
+    def _drop_tail(self):
+        # capacity overflow: the oldest row leaves every window still holding it
+        old = self.tail
+        for w in self._win.values():
+            if w[0] == old:
+                w[1] -= self.sn[old % self.cap]
+                w[0] += 1
+        self.tail += 1
+
+    def _evict(self, cut):
+        while self.tail < self.head and self.ts[self.tail % self.cap] < cut:
+            self._drop_tail()
+
+    def _slide(self, w, cut):
+        seq, acc = w
+        cap, ts, sn, head = self.cap, self.ts, self.sn, self.head
+        while seq < head and ts[seq % cap] < cut:
+            acc -= sn[seq % cap]
+            seq += 1
+        # reset on empty so add/subtract rounding never accumulates
+        w[0], w[1] = seq, (acc if seq < head else 0.0)
+
+    def cvd(self, secs: float, now: float | None = None) -> float:
+        cut = (clock.now() if now is None else now) - secs
+        w = self._win.get(secs)
+        if w is not None:
+            self._slide(w, cut)
+            return w[1]
+
+        start = self._seek(cut)
+        return sum(self.sn[i % self.cap] for i in range(start, self.head))
+
+    def _seek(self, t: float) -> int:
+        # first live sequence number with timestamp >= t
+        lo, hi = self.tail, self.head
+        ts, cap = self.ts, self.cap
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if ts[mid % cap] < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
@@ -0,0 +1,167 @@
+import numpy as np
+
+import config
+
+
+# The indicators.py functions for N symbols at once.  Candles are
+# struct-of-arrays: "o", "h", "l", "c", "v" are N×T float arrays, left-
+# aligned and NaN-padded, and "n" holds each row's candle count (see
+# stack).  Every function returns one value per row, NaN where the scalar
+# function would return None.
+#
+# Results are bit-identical to the scalar versions, not just close: sums
+# use np.cumsum (a left-to-right running sum, like Python's sum) and the
+# recursive EMA / RSI / Heikin Ashi steps loop over T with each step one
+# NumPy op across all N rows, in the same operation order as the scalar
+# loop.  T is bounded by KLINE_MAX, so the cost is T array ops whatever N.
+
+
+def stack(series: list[list[dict]]) -> dict:
+    n = np.array([len(ks) for ks in series], dtype=np.int64)
+    T = int(n.max()) if len(n) else 0
+    out = {"n": n}
+    for f in "ohlcv":
+        a = np.full((len(series), T), np.nan)
+        for i, ks in enumerate(series):
+            a[i, :len(ks)] = [k[f] for k in ks]
+        out[f] = a
+    return out
+
+
+def _last(x: np.ndarray, n: np.ndarray) -> np.ndarray:
+    # x[i, n[i] - 1], NaN for empty rows
+    if not x.shape[1]:
+        return np.full(len(n), np.nan)
+    rows = np.arange(len(n))
+    out  = x[rows, np.maximum(n - 1, 0)].astype(float)
+    out[n == 0] = np.nan
+    return out
+
+
+def _ema_rows(x: np.ndarray, period: int) -> np.ndarray:
+    # indicators._ema_series per row; NaN before the seed.  Rows shorter
+    # than `period` see NaN padding in the seed and stay NaN.
+    N, T = x.shape
+    out  = np.full((N, T), np.nan)
+    if T < period:
+        return out
+    mult = 2.0 / (period + 1)
+    out[:, period - 1] = np.cumsum(x[:, :period], axis=1)[:, -1] / period
+    for j in range(period, T):
+        out[:, j] = x[:, j] * mult + out[:, j - 1] * (1 - mult)
+    return out
+
+
+# ── indicators ─────────────────────────────────────────────────
+def rsi(k: dict) -> np.ndarray:
+    c, n = k["c"], k["n"]
+    p    = config.RSI_PERIOD
+    N, T = c.shape
+    if T < p + 1:
+        return np.full(N, np.nan)
+
+    ch = c[:, 1:] - c[:, :-1]
+    up = np.maximum(ch, 0)
+    dn = np.maximum(-ch, 0)
+    ag = np.cumsum(up[:, :p], axis=1)[:, -1] / p
+    al = np.cumsum(dn[:, :p], axis=1)[:, -1] / p
+
+    # step only the rows that still have candles at column j
+    for j in range(p, T - 1):
+        live = j < n - 1
+        ag = np.where(live, (ag * (p - 1) + up[:, j]) / p, ag)
+        al = np.where(live, (al * (p - 1) + dn[:, j]) / p, al)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(al == 0, 100.0, 100.0 - 100.0 / (1 + ag / al))
+    out[n < p + 1] = np.nan
+    return out
+
+
+def macd(k: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    c, n = k["c"], k["n"]
+    N    = len(n)
+    first = config.MACD_SLOW - 1
+    if c.shape[1] <= first:
+        return np.full(N, np.nan), np.full(N, np.nan), np.full(N, np.nan)
+
+    ml = (_ema_rows(c, config.MACD_FAST) - _ema_rows(c, config.MACD_SLOW))[:, first:]
+    sig = _ema_rows(ml, config.MACD_SIG)
+    m = _last(ml,  np.maximum(n - first, 0))
+    s = _last(sig, np.maximum(n - first, 0))
+    return m, s, m - s
+
+
+def vwap(k: dict) -> np.ndarray:
+    n   = k["n"]
+    tpv = _last(np.cumsum((k["h"] + k["l"] + k["c"]) / 3 * k["v"], axis=1), n)
+    v   = _last(np.cumsum(k["v"], axis=1), n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(v > 0, tpv / v, 0.0)
+
+
+def emas(k: dict) -> tuple[np.ndarray, np.ndarray]:
+    c, n = k["c"], k["n"]
+    return _last(_ema_rows(c, config.EMA_S), n), _last(_ema_rows(c, config.EMA_L), n)
+
+
+def heikin_ashi(k: dict) -> dict:
+    # N×T "o", "h", "l", "c", "green"; columns past a row's n are NaN / False
+    o, h, l, c = k["o"], k["h"], k["l"], k["c"]
+    hc = (o + h + l + c) / 4
+    ho = np.empty_like(hc)
+    if hc.shape[1]:
+        ho[:, 0] = (o[:, 0] + c[:, 0]) / 2
+        for j in range(1, hc.shape[1]):
+            ho[:, j] = (ho[:, j - 1] + hc[:, j - 1]) / 2
+    return {
+        "o": ho,
+        "h": np.maximum(np.maximum(h, ho), hc),
+        "l": np.minimum(np.minimum(l, ho), hc),
+        "c": hc,
+        "green": hc >= ho,
+    }
+
+
+def vol_profile(k: dict, bins: int = config.VP_BINS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (poc, prices, volumes), prices / volumes N×bins.  A row whose range is
+    # a single price gets one bucket (column 0, the rest NaN), like the
+    # scalar version; an empty row gets poc 0.0 and all NaN.
+    n = k["n"]
+    N, T = k["l"].shape
+    cols = np.arange(T)
+    live = cols[None, :] < n[:, None]
+
+    lo  = np.min(np.where(live, k["l"], np.inf), axis=1, initial=np.inf)
+    hi  = np.max(np.where(live, k["h"], -np.inf), axis=1, initial=-np.inf)
+    flat = (hi == lo) & (n > 0)
+    with np.errstate(invalid="ignore"):
+        bsz = np.where(hi > lo, (hi - lo) / bins, 1.0)
+
+    vol = np.zeros((N, bins))
+    idx = np.arange(bins)
+    for j in range(T):
+        on = live[:, j] & ~flat
+        if not on.any():
+            continue
+        with np.errstate(invalid="ignore"):
+            b_lo = np.maximum(0,        np.trunc((k["l"][:, j] - lo) / bsz))
+            b_hi = np.minimum(bins - 1, np.trunc((k["h"][:, j] - lo) / bsz))
+        share = k["v"][:, j] / np.maximum(1, b_hi - b_lo + 1)
+        hit   = on[:, None] & (idx >= b_lo[:, None]) & (idx <= b_hi[:, None])
+        vol  += np.where(hit, share[:, None], 0.0)
+
+    price = lo[:, None] + (idx + 0.5) * bsz[:, None]
+    poc   = lo + (np.argmax(vol, axis=1) + 0.5) * bsz
+
+    if flat.any():
+        price[flat] = np.nan
+        vol[flat]   = np.nan
+        price[flat, 0] = lo[flat]
+        vol[flat, 0]   = _last(np.cumsum(k["v"], axis=1), n)[flat]
+        poc[flat]      = lo[flat]
+    empty = n == 0
+    price[empty] = np.nan
+    vol[empty]   = np.nan
+    poc[empty]   = 0.0
+    return poc, price, vol
@@ -0,0 +1,159 @@
+from collections import deque
+
+import config
+
+
+# Volume profile at tick resolution, fed trade by trade.  Buckets are a
+# fixed price width (VP_TICK_BP of the first price seen) and hold buy and
+# sell volume separately; a trade is two dict adds.  Volume is also kept
+# in one-minute slices so the rolling window evicts a minute at a time,
+# and a session profile (`session` = t → (start, end)) starts over at each
+# boundary.  view() re-buckets to VP_BINS rows for the dashboard and is
+# cached until the next trade.
+
+_SLICE = 60
+
+
+class VolumeProfile:
+    def __init__(self, tick_bp: float = config.VP_TICK_BP, window: float = config.VP_WINDOW,
+                 session=None):
+        self.tick_bp = tick_bp
+        self.window  = window
+        self.session = session
+        self.tick: float | None = None
+
+        self.buy:  dict[int, float] = {}
+        self.sell: dict[int, float] = {}
+        self._slices: deque = deque()         # (minute, {bucket: [buy, sell]})
+        self._end     = None                  # session end
+        self.version  = 0
+        self._view    = (-1, None)
+
+    def reset(self):
+        self.buy, self.sell = {}, {}
+        self._slices.clear()
+        self.version += 1
+
+    def push(self, t: float, price: float, qty: float, is_buy: bool):
+        if self.tick is None:
+            self.tick = price * self.tick_bp / 1e4
+        if self.session is not None and (self._end is None or t >= self._end):
+            if self._end is not None:
+                self.reset()
+            self._end = self.session(t)[1]
+
+        b = int(price // self.tick)
+        side = self.buy if is_buy else self.sell
+        side[b] = side.get(b, 0.0) + qty
+
+        minute = int(t // _SLICE)
+        if not self._slices or self._slices[-1][0] != minute:
+            self._slices.append((minute, {}))
+            self._evict(t)
+        cell = self._slices[-1][1].get(b)
+        if cell is None:
+            cell = self._slices[-1][1][b] = [0.0, 0.0]
+        cell[0 if is_buy else 1] += qty
+        self.version += 1
+
+    def _evict(self, t: float):
+        if not self.window:
+            return
+        cut = (t - self.window) // _SLICE
+        while self._slices and self._slices[0][0] < cut:
+            _, cells = self._slices.popleft()
+            for b, (bq, sq) in cells.items():
+                self._sub(self.buy, b, bq)
+                self._sub(self.sell, b, sq)
+
+    @staticmethod
+    def _sub(side, b, q):
+        if not q:
+            return
+        left = side.get(b, 0.0) - q
+        if left > 1e-12:
+            side[b] = left
+        else:
+            side.pop(b, None)
+
+    def seed(self, klines: list[dict]):
+        # history before the first trade: each candle's volume spread evenly
+        # over its range, split half buy / half sell
+        if self.window and klines:
+            klines = [k for k in klines if k["t"] >= klines[-1]["t"] - self.window]
+        for k in klines:
+            if self.tick is None:
+                self.tick = k["c"] * self.tick_bp / 1e4
+            lo, hi = int(k["l"] // self.tick), int(k["h"] // self.tick)
+            share  = k["v"] / (hi - lo + 1) / 2
+            for b in range(lo, hi + 1):
+                self.push(k["t"], (b + 0.5) * self.tick, share, True)
+                self.push(k["t"], (b + 0.5) * self.tick, share, False)
+
+    # ── checkpoint ────────────────────────────────────────────
+    def checkpoint(self) -> dict:
+        rows = [(m, b, bq, sq) for m, cells in self._slices for b, (bq, sq) in cells.items()]
+        return {"tick": self.tick, "end": self._end, "rows": rows}
+
+    def restore(self, d: dict):
+        self.reset()
+        self.tick, self._end = d["tick"], d["end"]
+        for m, b, bq, sq in d["rows"]:
+            m, b = int(m), int(b)
+            if not self._slices or self._slices[-1][0] != m:
+                self._slices.append((m, {}))
+            self._slices[-1][1][b] = [bq, sq]
+            if bq:
+                self.buy[b] = self.buy.get(b, 0.0) + bq
+            if sq:
+                self.sell[b] = self.sell.get(b, 0.0) + sq
+
+    # ── views ─────────────────────────────────────────────────
+    def levels(self) -> list[tuple[float, float, float]]:
+        # (bucket mid price, buy, sell), ascending
+        buy, sell, tick = self.buy, self.sell, self.tick
+        keys = sorted(buy.keys() | sell.keys())
+        return [((b + 0.5) * tick, buy.get(b, 0.0), sell.get(b, 0.0)) for b in keys]
+
+    def view(self, bins: int = config.VP_BINS, value: float = config.VP_VALUE) -> dict:
+        if self._view[0] == self.version:
+            return self._view[1]
+
+        lv  = self.levels()
+        out = {"poc": 0.0, "vp": [], "buy": [], "val": 0.0, "vah": 0.0}
+        if lv:
+            vol = [b + s for _, b, s in lv]
+            poc = max(range(len(lv)), key=vol.__getitem__)
+            out["poc"] = lv[poc][0]
+            out["val"], out["vah"] = _value_area(lv, vol, poc, value)
+
+            lo, hi = lv[0][0], lv[-1][0]
+            n   = bins if hi > lo else 1
+            bsz = (hi - lo) / n if hi > lo else 1.0
+            bb, ss = [0.0] * n, [0.0] * n
+            for p, b, s in lv:
+                i = min(n - 1, int((p - lo) / bsz))
+                bb[i] += b
+                ss[i] += s
+            out["vp"]  = [(lo + (i + 0.5) * bsz if n > 1 else lo, bb[i] + ss[i]) for i in range(n)]
+            out["buy"] = [bb[i] / (bb[i] + ss[i]) if bb[i] + ss[i] else 0.0 for i in range(n)]
+
+        self._view = (self.version, out)
+        return out
+
+
+def _value_area(lv, vol, poc, share):
+    # grow from the POC toward the heavier neighbour until `share` of volume
+    total  = sum(vol)
+    lo = hi = poc
+    acc = vol[poc]
+    while acc < share * total and (lo > 0 or hi < len(vol) - 1):
+        down = vol[lo - 1] if lo > 0 else -1.0
+        up   = vol[hi + 1] if hi < len(vol) - 1 else -1.0
+        if up >= down:
+            hi  += 1
+            acc += up
+        else:
+            lo  -= 1
+            acc += down
+    return lv[lo][0], lv[hi][0]
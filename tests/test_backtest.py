@@ -0,0 +1,39 @@
+import asyncio
+
+import numpy as np
+
+import backtest
+import config
+
+
+# Backtest edge cases: no history, and one tape replay per coin.
+
+def _history(n: int) -> dict:
+    rng = np.random.default_rng(7)
+    t = 1_700_000_100 // 86400 * 86400 + np.arange(n, dtype=float) * 60
+    c = 100 + np.cumsum(rng.normal(0, 0.1, n))
+    return {"t": t, "o": c, "h": c + 0.1, "l": c - 0.1, "c": c, "v": np.ones(n)}
+
+
+def test_evaluate_without_history():
+    for tf in config.TIMEFRAMES:
+        r = backtest.evaluate(_history(0), tf)
+        assert (r["windows"], r["calls"], r["hit_rate"]) == (0, 0, 0.0)
+
+
+def test_tape_replayed_once_per_coin(monkeypatch):
+    replays = []
+
+    async def history(symbol, days):
+        return _history(3000)
+
+    async def replay(path, scanner, speed=0.0, start=None, on_frame=None):
+        replays.append(sorted(tf for _, tf in scanner.markets))
+        on_frame(2e9, None)
+
+    monkeypatch.setattr(backtest, "load_history", history)
+    monkeypatch.setattr(backtest.tape, "replay", replay)
+    out = asyncio.run(backtest.run(["BTC", "ETH"], 3, "session.tape"))
+    assert replays == [sorted(config.TIMEFRAMES)] * 2
+    assert set(out) == {(c, tf) for c in ("BTC", "ETH") for tf in config.TIMEFRAMES}
+    assert out[("BTC", "15m")]["windows"] > 0
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import indicators
+from book import OrderBook
+from bookstats import BookStats
+
+
+# BookStats must give exactly what the indicators.* reference functions
+# give on the same book, types included (an empty sum() is the int 0).
+
+def _side(rng: random.Random, n: int, best: float, step: float) -> list[tuple[float, float]]:
+    out, px = [], best
+    for _ in range(n):
+        q = rng.choice((rng.expovariate(1), rng.uniform(20, 80), 0.001))
+        out.append((round(px, 8), round(q, 6)))
+        px += step * rng.randint(1, 3)
+    return out
+
+
+def _book(seed: int):
+    rng  = random.Random(seed)
+    mid  = rng.choice((65000.0, 1.2345, 0.5))
+    tick = mid * rng.choice((1e-6, 1e-4, 1e-3))
+    nb, na = (rng.choice((0, 1, 2, 20, 500)) for _ in "ba")
+    bids = _side(rng, nb, mid - tick, -tick)
+    asks = _side(rng, na, mid + tick, tick)
+    return bids, asks, mid
+
+
+def _same(got, ref):
+    assert got == ref and type(got) is type(ref)
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_indicators(seed):
+    bids, asks, mid = _book(seed)
+    ob = OrderBook()
+    ob.load({"lastUpdateId": 1,
+             "bids": [[repr(p), repr(q)] for p, q in bids],
+             "asks": [[repr(p), repr(q)] for p, q in asks]})
+    assert (ob.bids, ob.asks) == (bids, asks)
+
+    for st in (ob.analytics(), BookStats.from_levels(bids, asks)):
+        _same(st.obi(mid), indicators.obi(bids, asks, mid))
+        got, ref = st.depth_usd(mid), indicators.depth_usd(bids, asks, mid)
+        assert got.keys() == ref.keys()
+        for k in ref:
+            _same(got[k], ref[k])
+        assert st.walls() == indicators.walls(bids, asks)
+
+
+def test_empty_book():
+    st = BookStats.from_levels([], [])
+    _same(st.obi(100.0), indicators.obi([], [], 100.0))
+    assert st.depth_usd(100.0) == indicators.depth_usd([], [], 100.0)
+    assert st.walls() == ([], [])
@@ -0,0 +1,94 @@
+import random
+
+import feeds
+from candles import CandleSeries
+from candlestore import CandleStore
+
+
+# A bootstrap or backfill after downtime must not chart or seed indicators
+# across the gap between the stored candles and the fresh history.
+
+def _klines(t0: int, n: int, seed: int = 0) -> list[dict]:
+    rng, px, out = random.Random(seed), 100.0, []
+    for i in range(n):
+        c = px * (1 + rng.gauss(0, 0.01))
+        out.append({"t": t0 + i * 60, "o": px, "h": max(px, c), "l": min(px, c), "c": c, "v": rng.random()})
+        px = c
+    return out
+
+
+def _engine(series: CandleSeries):
+    e = series.engine
+    return e.rsi(), e.macd(), e.emas(), e.vwap()
+
+
+def test_seed_after_gap_uses_fresh_history_only():
+    old, new = _klines(0, 100, 1), _klines(100 * 60 + 3600, 50, 2)
+    series = CandleSeries("1m")
+    series.seed(old)
+    series.seed(new)
+    assert list(series.klines) == new
+    assert len(series.store) == 150
+
+    fresh = CandleSeries("1m")
+    fresh.seed(new)
+    assert _engine(series) == _engine(fresh)
+
+
+def test_overlapping_seed_keeps_one_segment():
+    ks = _klines(0, 120, 3)
+    series = CandleSeries("1m")
+    series.seed(ks[:80])
+    series.seed(ks[40:])
+    assert list(series.klines) == ks
+
+
+def test_segment_survives_growth_and_reopen(tmp_path):
+    path = str(tmp_path / "BTCUSDT_1m.candles")
+    old, new = _klines(0, 10, 4), _klines(10 * 60 + 3600, 10, 5)
+    for store in (CandleStore(cap=16), CandleStore(path, cap=16)):
+        series = CandleSeries("1m", store)
+        series.seed(old)
+        series.seed(new)    # past cap: the file doubles, memory drops its older half
+        assert list(series.klines) == new
+    store.close()
+    assert list(CandleSeries("1m", CandleStore(path)).klines) == new
+
+
+def test_backfill_after_long_outage_starts_new_segment():
+    old, new = _klines(0, 121, 6), _klines(121 * 60 + 7200, 91, 7)
+    end = new[-1]["t"] + 30         # the last backfilled minute is still open
+    for iv in ("1m", "15m"):
+        series, fresh = CandleSeries(iv), CandleSeries(iv)
+        series.seed_base(old)
+        feeds.apply_backfill(feeds.TradeBuffer(), [series], new, [], end)
+        fresh.seed_base(new)
+        assert list(series.klines) == list(fresh.klines)
+        assert series.klines[0]["t"] >= new[0]["t"]
+        assert _engine(series) == _engine(fresh)
+
+
+def test_contiguous_backfill_appends():
+    ks  = _klines(0, 60, 8)
+    end = ks[-1]["t"] + 30
+    series = CandleSeries("1m")
+    series.seed_base(ks[:30])
+    feeds.apply_backfill(feeds.TradeBuffer(), [series], ks[28:], [], end)
+    assert list(series.klines) == ks[:-1]
+    assert series.cur == ks[-1]
+
+
+def test_second_process_on_a_store_keeps_it_in_memory(tmp_path):
+    # flock is per open file, so two stores in one process contend like two processes
+    path  = str(tmp_path / "BTCUSDT_1m.candles")
+    ks    = _klines(0, 40, 9)
+    first = CandleStore(path, cap=16)
+    other = CandleStore(path, cap=16)
+    assert first.path == path and other.path is None
+    CandleSeries("1m", first).seed(ks)          # grows the file twice
+    CandleSeries("1m", other).seed(ks[:5])
+    first.close()
+    again = CandleStore(path)
+    assert again.path == path
+    assert list(CandleSeries("1m", again).klines) == ks
+    again.close()
@@ -0,0 +1,52 @@
+import asyncio
+
+import config
+import checkpoint
+from candles import CandleSeries
+from trades import TradeBuffer
+
+
+# Checkpoints of concurrent processes stay apart, and a failed write
+# doesn't end the process.
+
+def test_paths_are_keyed_per_process(monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_PATH", "data/checkpoint.npz")
+    paths = {checkpoint.path_for("scan"), checkpoint.path_for("serve"),
+             checkpoint.path_for("BTC", "15m"), checkpoint.path_for("BTC", "1h")}
+    assert len(paths) == 4
+    assert checkpoint.path_for("BTC", "15m") == "data/checkpoint.BTC-15m.npz"
+
+
+def test_failed_write_is_logged(tmp_path, capsys):
+    symbols = {"BTCUSDT": (TradeBuffer(), [CandleSeries("1m")])}
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    path    = str(blocker / "checkpoint.npz")     # its directory is a file
+
+    async def go():
+        task = asyncio.create_task(checkpoint.run(symbols, path, every=0.01))
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(go())
+    assert "[checkpoint] write failed" in capsys.readouterr().out
+
+
+def test_writes_use_a_per_process_temp_file(tmp_path, monkeypatch):
+    symbols = {"BTCUSDT": (TradeBuffer(), [CandleSeries("1m")])}
+    path    = str(tmp_path / "checkpoint.npz")
+    replace = checkpoint.os.replace
+    tmps    = []
+
+    def record(src, dst):
+        tmps.append(src)
+        replace(src, dst)
+
+    monkeypatch.setattr(checkpoint.os, "replace", record)
+    for pid in (101, 102):
+        monkeypatch.setattr(checkpoint.os, "getpid", lambda pid=pid: pid)
+        checkpoint.save(symbols, path)
+    assert len(set(tmps)) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ["checkpoint.npz"]
@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import config
+import fanout
+from snapshot import Snapshot
+
+
+# Thin-client reconnects and the server's handling of a bad hello.
+
+def _line(msg) -> bytes:
+    return json.dumps(msg).encode() + b"\n"
+
+
+def test_remote_reconnects_and_marks_stale(monkeypatch):
+    monkeypatch.setattr(config, "RECONNECT_BASE", 0.01)
+    hellos = []
+
+    async def serve(reader, writer):
+        # one snapshot, then the server goes away
+        hellos.append(json.loads(await reader.readline()))
+        writer.write(_line({"type": "hello", "markets": ["BTC 15m"]}))
+        writer.write(_line({"type": "snapshot", "market": "BTC 15m", "data": Snapshot().to_dict()}))
+        await writer.drain()
+        writer.close()
+
+    async def go():
+        srv    = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port   = srv.sockets[0].getsockname()[1]
+        remote = fanout.Remote("127.0.0.1", port, ["BTC 15m"])
+        task   = asyncio.create_task(remote.run())
+        stale  = False
+        try:
+            while len(hellos) < 2:
+                await asyncio.sleep(0.005)
+                stale = stale or (remote.snaps and not remote.connected)
+        finally:
+            task.cancel()
+            srv.close()
+        return remote, stale
+
+    remote, stale = asyncio.run(asyncio.wait_for(go(), 10))
+    assert hellos == [{"markets": ["BTC 15m"]}] * 2
+    assert stale
+    assert "BTC 15m" in remote.snaps
+
+
+def test_server_closes_on_malformed_hello():
+    async def go(hello: bytes) -> bytes:
+        server = fanout.Server({}, poll=lambda: [])
+        srv    = await asyncio.start_server(server._serve, "127.0.0.1", 0)
+        port   = srv.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(hello)
+            out = await asyncio.wait_for(reader.readline(), 5)
+            writer.close()
+            return out
+        finally:
+            srv.close()
+
+    for bad in (b"[1, 2]\n", b'"BTC 15m"\n', b'{"markets": "BTC 15m"}\n', b'{"markets": [1]}\n'):
+        assert asyncio.run(go(bad)) == b""
+    assert asyncio.run(go(b'{"markets": []}\n')).startswith(b'{"type":"hello"')
@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+import pytest
+
+from ingest import Ingest
+
+
+# A handler that raises must end Ingest.run with that error (so the
+# supervisor reconnects) instead of killing the pump silently and leaving
+# the reader blocked on a full queue.
+
+FRAME = '{"stream":"btcusdt@trade","data":{"E":1700000000000,"p":"1","q":"1","T":1700000000000,"m":true}}'
+
+
+class _Socket:
+    def __init__(self):
+        self.sent = 0
+
+    async def recv(self):
+        self.sent += 1
+        await asyncio.sleep(0)
+        return FRAME
+
+
+def _boom(body):
+    raise RuntimeError("handler failed")
+
+
+async def _run(ready=None):
+    ing = Ingest(batch=10, queue=100)
+    ws  = _Socket()
+    await asyncio.wait_for(ing.run(ws, {"btcusdt@trade": _boom}, ready), 5)
+
+
+def test_handler_error_ends_run():
+    with pytest.raises(RuntimeError, match="handler failed"):
+        asyncio.run(_run())
+
+
+def test_handler_error_after_ready():
+    async def ready():
+        await asyncio.sleep(0.05)
+
+    with pytest.raises(RuntimeError, match="handler failed"):
+        asyncio.run(_run(ready))
+
+
+def test_socket_error_ends_run():
+    class _Closed(_Socket):
+        async def recv(self):
+            raise ConnectionError("closed")
+
+    async def go():
+        ing = Ingest()
+        await asyncio.wait_for(ing.run(_Closed(), {}), 5)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(go())
+
+
+# Degraded-mode coalescing keeps closed candles and the order across streams.
+
+def _frame(stream, data, spaced=False):
+    msg = {"stream": stream, "data": data}
+    return json.dumps(msg) if spaced else json.dumps(msg, separators=(",", ":"))
+
+
+def _kline(t, closed):
+    return {"e": "kline", "E": 1700000000000, "k": {"t": t, "c": "1", "x": closed}}
+
+
+def _diff(U, u, px):
+    return {"e": "depthUpdate", "E": 1700000000000, "U": U, "u": u, "b": [[px, "1"]], "a": []}
+
+
+def _apply(raws):
+    seen = []
+    rec  = lambda stream: lambda body: seen.append((stream, body))
+    streams = ("btcusdt@kline_1m", "btcusdt@trade", "btcusdt@depth@100ms")
+    ing = Ingest()
+    ing.degraded = True
+    ing.apply([(0.0, r) for r in raws], {s: rec(s) for s in streams})
+    return seen
+
+
+@pytest.mark.parametrize("spaced", [False, True])
+def test_coalesce_keeps_closed_klines(spaced):
+    seen = _apply([_frame("btcusdt@kline_1m", _kline(0, False), spaced),
+                   _frame("btcusdt@kline_1m", _kline(0, True), spaced),
+                   _frame("btcusdt@kline_1m", _kline(60, False), spaced),
+                   _frame("btcusdt@kline_1m", _kline(60, False), spaced)])
+    assert [json.loads(b)["k"]["x"] for _, b in seen] == [True, False]
+
+
+def test_coalesce_keeps_stream_order():
+    seen = _apply([_frame("btcusdt@depth@100ms", _diff(1, 1, "10")),
+                   _frame("btcusdt@kline_1m", _kline(0, False)),
+                   _frame("btcusdt@trade", {"E": 1700000000000, "p": "1", "q": "1", "T": 1, "m": True}),
+                   _frame("btcusdt@depth@100ms", _diff(2, 2, "11")),
+                   _frame("btcusdt@kline_1m", _kline(0, True)),
+                   _frame("btcusdt@trade", {"E": 1700000000000, "p": "2", "q": "1", "T": 2, "m": True})])
+    assert [s for s, _ in seen] == ["btcusdt@trade", "btcusdt@depth@100ms",
+                                    "btcusdt@kline_1m", "btcusdt@trade"]
+    merged = seen[1][1]
+    assert (merged["U"], merged["u"], merged["b"]) == (1, 2, [("10", "1"), ("11", "1")])
@@ -0,0 +1,24 @@
+import feeds
+
+
+# Polymarket price_change handling for a book that is waiting on a resync.
+
+def _market():
+    st = feeds.State()
+    st.pm_up_id, st.pm_dn_id = "up", "dn"
+    st.pm_up = 0.55
+    st.pm_book("up").synced = False
+    return st, feeds.pm_assets([st])
+
+
+def test_unsynced_change_without_best_ask_keeps_price():
+    st, markets = _market()
+    feeds._pm_change({"asset_id": "up", "price": "0.5", "size": "10", "side": "SELL"}, markets)
+    assert st.pm_up == 0.55
+
+
+def test_unsynced_change_uses_server_best_ask():
+    st, markets = _market()
+    feeds._pm_change({"asset_id": "up", "price": "0.5", "size": "10", "side": "SELL",
+                      "best_ask": "0.57"}, markets)
+    assert st.pm_up == 0.57
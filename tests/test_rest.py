@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rest import RestClient
+
+
+# The REST client must keep the event loop free while a slow server holds
+# requests open: a ticker task measures the longest gap between its wakeups.
+
+DELAY = 0.3
+TICK  = 0.005
+
+
+class _Slow(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(DELAY)
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Slow)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+async def _stall(work) -> tuple[float, object]:
+    # (longest loop stall beyond one tick, result of work())
+    worst = 0.0
+    done  = False
+
+    async def ticker():
+        nonlocal worst
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(TICK)
+            now   = time.perf_counter()
+            worst = max(worst, now - last - TICK)
+            last  = now
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 2)
+    try:
+        res = await work()
+    finally:
+        done = True
+        await tick
+    return worst, res
+
+
+def test_get_json_keeps_loop_free(stub):
+    client = RestClient(max_conc=4, timeout=5)
+
+    async def work():
+        return await asyncio.gather(*(client.get_json(f"{stub}/r{i}") for i in range(12)))
+
+    try:
+        worst, res = asyncio.run(_stall(work))
+    finally:
+        client.close()
+    assert [r["path"] for r in res] == [f"/r{i}" for i in range(12)]
+    assert worst < 0.1, f"event loop stalled {worst * 1e3:.0f} ms"
+
+
+def test_stall_probe_sees_blocking_call(stub):
+    # the probe itself must notice a call made on the loop thread
+    client = RestClient(max_conc=1, timeout=5)
+
+    async def work():
+        return client._get(f"{stub}/blocking", None, None)
+
+    try:
+        worst, _ = asyncio.run(_stall(work))
+    finally:
+        client.close()
+    assert worst >= DELAY * 0.8
@@ -0,0 +1,86 @@
+import asyncio
+
+import config
+import feeds
+import rollover
+from rollover import MarketScheduler
+
+
+# Window rollover when a window's tokens never resolve, or resolve late.
+
+class _Cache:
+    def __init__(self, found=None):
+        self.found = found or {}
+
+    async def resolve(self, slugs):
+        return {s: self.found[s] for s in slugs if s in self.found}
+
+
+def _scheduler(cache, start=1_800_000_000.0):
+    st = feeds.State()
+    st.pm_switch("up0", "dn0")
+    sched = MarketScheduler({("BTC", "15m"): st}, cache)
+    sched._end[("BTC", "15m")] = feeds.window_bounds("15m", start)[1]
+    sched.assets.update(feeds.pm_assets([st]))
+    return sched, st
+
+
+def _tick(sched, now):
+    asyncio.run(sched._prefetch(now))
+    sched._subscribe_next(now)
+    sched._switch(now)
+
+
+def test_unresolved_window_moves_on():
+    sched, st = _scheduler(_Cache())
+    end = sched._end[("BTC", "15m")]
+    _tick(sched, end + 1)
+    assert (st.pm_up_id, st.pm_dn_id) == (None, None)
+    assert sched._end[("BTC", "15m")] == end + 900
+    assert "up0" not in sched.assets
+    assert sched.outbox.get_nowait() == {"assets_ids": ["up0", "dn0"], "operation": "unsubscribe"}
+
+
+def test_later_window_resolves_after_a_miss():
+    cache = _Cache()
+    sched, st = _scheduler(cache)
+    end = sched._end[("BTC", "15m")]
+    _tick(sched, end + 1)
+    cache.found[feeds._build_slug("BTC", "15m", end + 900)] = ("up2", "dn2")
+    _tick(sched, end + 900 - 60)
+    assert st.pm_next == ("up2", "dn2")
+    _tick(sched, end + 900)
+    assert (st.pm_up_id, st.pm_dn_id) == ("up2", "dn2")
+    assert sched._end[("BTC", "15m")] == end + 1800
+
+
+def test_stale_next_is_dropped():
+    # tokens resolved for a window that passed while the loop was stalled
+    sched, st = _scheduler(_Cache())
+    end = sched._end[("BTC", "15m")]
+    st.pm_next = ("up1", "dn1")
+    sched._subscribe_next(end - 1)
+    sched._switch(end + 2000)
+    assert (st.pm_up_id, st.pm_dn_id, st.pm_next) == (None, None, None)
+    assert sched._end[("BTC", "15m")] == feeds.window_bounds("15m", end + 2000)[1]
+    assert not sched.assets
+
+
+def test_failed_bootstrap_retries_current_window(monkeypatch):
+    cache = _Cache()
+    st    = feeds.State()
+    sched = MarketScheduler({("BTC", "15m"): st}, cache)
+    now   = feeds.window_bounds("15m", 1_800_000_000.0)[0] + 30
+    monkeypatch.setattr(rollover.time, "time", lambda: now)
+    asyncio.run(sched.bootstrap())
+    assert st.pm_up_id is None and not sched.assets
+
+    _tick(sched, now + 1)       # the lookup failed: retried once per PM_RETRY
+    cache.found[feeds._build_slug("BTC", "15m", now)] = ("up0", "dn0")
+    _tick(sched, now + config.PM_RETRY - 1)
+    assert st.pm_up_id is None
+
+    _tick(sched, now + config.PM_RETRY + 1)
+    assert (st.pm_up_id, st.pm_dn_id) == ("up0", "dn0")
+    assert sched.assets == {"up0": st, "dn0": st}
+    assert sched.outbox.get_nowait() == {"assets_ids": ["up0", "dn0"], "operation": "subscribe"}
@@ -0,0 +1,21 @@
+import config
+import shard
+
+
+# Seqlock slots after a writer died mid-write.
+
+def test_write_recovers_from_an_odd_seq():
+    slots = shard.Slots(2)
+    try:
+        assert slots.write(1, b'{"a":1}')
+        seq = slots.seq(1)
+        shard._SEQ.pack_into(slots.buf, config.SHM_SLOT, seq + 1)    # killed after marking busy
+        assert slots.read(1) is None
+
+        assert slots.write(1, b'{"a":2}')
+        got = slots.read(1)
+        assert got is not None and got[0] % 2 == 0 and got[0] > seq
+        assert got[1] == b'{"a":2}'
+    finally:
+        slots.close()
+        slots.unlink()
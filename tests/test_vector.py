@@ -0,0 +1,84 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+import config
+import indicators
+import vector
+
+
+# vector.* against indicators.* row by row, over ragged batches: empty
+# rows, rows shorter than every period, flat rows, and the all-empty batch.
+# The vector kernels promise bit-identical results, so floats compare ==.
+
+def _klines(rng: random.Random, n: int, flat: bool = False) -> list[dict]:
+    out, px = [], rng.uniform(10, 1000)
+    for i in range(n):
+        o = px
+        c = px if flat else px * (1 + rng.gauss(0, 0.01))
+        h = max(o, c) * (1 if flat else 1 + rng.random() * 0.005)
+        l = min(o, c) * (1 if flat else 1 - rng.random() * 0.005)
+        v = 0.0 if rng.random() < 0.1 else rng.expovariate(1 / 50)
+        out.append({"t": i * 60, "o": o, "h": h, "l": l, "c": c, "v": v})
+        px = c
+    return out
+
+
+def _batch(rng: random.Random) -> list[list[dict]]:
+    top = config.MACD_SLOW + config.MACD_SIG + 10
+    rows = [_klines(rng, rng.choice((0, 1, rng.randrange(top))), flat=rng.random() < 0.1)
+            for _ in range(rng.randrange(1, 8))]
+    rows.append([])
+    rng.shuffle(rows)
+    return rows
+
+
+def _same(vec, ref):
+    if ref is None:
+        assert math.isnan(vec)
+    else:
+        assert vec == ref
+
+
+BATCHES = [[[]], [[], [], []]] + [_batch(random.Random(seed)) for seed in range(40)]
+
+
+@pytest.mark.parametrize("series", BATCHES)
+def test_matches_scalar(series):
+    k = vector.stack(series)
+    rsi, vwap = vector.rsi(k), vector.vwap(k)
+    m, s, h  = vector.macd(k)
+    es, el   = vector.emas(k)
+    poc, price, vol = vector.vol_profile(k)
+    ha = vector.heikin_ashi(k)
+
+    for i, ks in enumerate(series):
+        _same(rsi[i], indicators.rsi(ks))
+        _same(vwap[i], indicators.vwap(ks))
+        for got, ref in zip((m[i], s[i], h[i]), indicators.macd(ks)):
+            _same(got, ref)
+        for got, ref in zip((es[i], el[i]), indicators.emas(ks)):
+            _same(got, ref)
+
+        ref_poc, ref_bins = indicators.vol_profile(ks)
+        assert poc[i] == ref_poc
+        got = [(p, v) for p, v in zip(price[i], vol[i]) if not np.isnan(p)]
+        assert got == ref_bins
+
+        for j, bar in enumerate(indicators.heikin_ashi(ks)):
+            assert {f: ha[f][i, j] for f in bar} == bar
+
+
+def test_all_empty_returns_nan():
+    k = vector.stack([[], []])
+    for out in (vector.rsi(k), *vector.macd(k), *vector.emas(k)):
+        assert np.isnan(out).all()
+    assert (vector.vwap(k) == 0.0).all()    # indicators.vwap([]) is 0.0
+
+
+def test_macd_outputs_are_separate_arrays():
+    m, s, h = vector.macd(vector.stack([[], []]))
+    m[0] = 1.0
+    assert np.isnan(s[0]) and np.isnan(h[0])